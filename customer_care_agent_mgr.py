@@ -1,124 +1,334 @@
 import os  
 import asyncio  
 import json
-import types
 import pathlib
-from pydantic import BaseModel
+import threading
+from typing import AsyncIterator
 from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, AzureChatPromptExecutionSettings
 from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
-from semantic_kernel.connectors.mcp import MCPStdioPlugin
-from semantic_kernel import Kernel
-from semantic_kernel.contents import ChatHistory 
+from semantic_kernel.contents import ChatHistory, ChatMessageContent
 from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
 from semantic_kernel.contents.utils.author_role import AuthorRole
 from semantic_kernel.functions import KernelArguments
+from semantic_kernel.prompt_template import InputVariable, PromptTemplateConfig
 from semantic_kernel.agents import ChatCompletionAgent, Agent
+from semantic_kernel.filters import FilterTypes
 from dotenv import load_dotenv
+from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+from semantic_kernel.connectors.ai.open_ai.const import DEFAULT_AZURE_API_VERSION
+from customer_care_mcp_pool import get_mcp_pool
+from customer_care_router import IntentRouter
+from customer_care_cache import ResponseCache
+from customer_care_tool_calls import OrderedToolCallKernel
+from customer_care_tracing import get_tracer, record_usage
+from customer_care_singleflight import FlightAbandoned, SingleFlight
+from customer_care_answer import ANSWER_FORMAT_INSTRUCTIONS, STRUCTURED_AGENTS, AnswerRenderer
+from customer_care_rate_limit import (
+    DeploymentBusyError, Priority, RateLimitedTransport, get_scheduler, is_rate_limited, rate_limit_retry_after,
+    request_priority,
+)
+from customer_care_prefetch import (
+    CUSTOMER_LOOKUP_TOOL, SUMMARY_FIELDS, CustomerPrefetch, customer_summary, record_tool_call, start_turn_tool_log,
+)
+from customer_care_sessions import (
+    SessionStore, SessionTurn, Turn, extractive_summary, record_tool_output, start_turn_tool_outputs,
+)
 
 # Semantic Kernel agent with MCP stdio plugin integration
 
-# Your existing ArticleAnalysis model  
-class ArticleAnalysis(BaseModel):  
-    themes: list[str] = []  
-    sentiments: list[str] = []  
-    entities: list[str] = []  
-    customer_care_response: str = ""  
+# System prompts are module constants so every agent and request shares a single copy
+AGENT_CARE_INSTRUCTIONS = (
+    "No inventes nada y no uses información que no esté en las herramientas. "
+    "Eres un agente de atención al cliente en Chile, listo para responder todo tipo de preguntas de los clientes. "
+    "Puedes ayudar con información del cliente, verificar el estado de sus cuentas y determinar si un dispositivo es compatible con eSIM. "
+    "Para responder preguntas sobre información del cliente, utilizas las herramientas de atención al cliente, "
+    "que recuperan datos del cliente pasando el ID del cliente al servicio de atención al cliente. "
+    "Si el usuario no proporciona el ID del cliente, debes solicitarlo amablemente y explicar por qué lo necesitas. "
+    "Por ejemplo: 'Para poder proporcionarle información detallada sobre su cuenta, ¿podría facilitarme su número de ID de cliente?' "
+    "Si se te da el nombre del cliente, solamente busca un método para traer el nombre del cliente y no uses el ID. "
+    "Para preguntas sobre la calidad de la señal, fallas, celdas, roaming o uso de 4G/5G, usa la herramienta get_signal_quality_summary en lugar de listar los eventos uno por uno. "
+    "Para verificar si un dispositivo es compatible con eSIM, utiliza la herramienta check_esim_compatibility del servidor de internet con la marca y el modelo exacto del dispositivo del cliente. "
+    "Solo si esa herramienta no está disponible o devuelve un error, utiliza la herramienta que extrae datos de una página web. "
+    "Los datos deben ser extraídos de los siguientes URLs: "
+    "urlApple = https://esimblow.com/es/dispositivos/dispositivos-apple-esim/ y "
+    "urlSamsung = https://www.samsung.com/latin/support/mobile-devices/galaxy-esim-and-supported-network-carriers/?msockid=1803ea69355c6f270dc0ffb034346ee2. "
+    "Una vez que hayas obtenido la información, proporciona una respuesta clara al cliente sobre la compatibilidad con eSIM. "
+    "Siempre proporciona respuestas claras y útiles, y explica qué herramienta utilizaste si es relevante. "
+    "Si el cliente quiere saber si su dispositivo móvil es compatible con eSIM, solo contesta 'sí' o 'no' y explica de dónde sacaste la información. "
+    "Si usaste la página web, revisa la lista que recibiste del web site de Apple o Samsung y con cuidado ve si el modelo exacto del dispositivo se encuentra en la lista. No basta con que diga iPhone o Samsung, debe ser el modelo específico. "
+    "NO inventes nada, es muy importante tener la respuesta correcta. Si no encuentras la información exacta, indícalo claramente. "
+)
 
-async def agent_care(question: str) -> str:
-    """Implementation of the agent care functionality"""
-    # Load environment variables from .env file
-    current_dir = pathlib.Path(__file__).parent
-    env_path = current_dir / ".env"
-    load_dotenv(dotenv_path=env_path)
-    
-    # Find the correct paths to the MCP server scripts
-    mcp_internet_path = current_dir / "mcp_internet_extarct_server.py"
-    mcp_knowledge_base_path = current_dir / "customer_care_knowledge_base_server.py"
-
-    # Make sure the server scripts exist
-    if not mcp_internet_path.exists():
-        return f"Error: MCP internet server script not found at {mcp_internet_path}"
-    if not mcp_knowledge_base_path.exists():
-        return f"Error: MCP knowledge base server script not found at {mcp_knowledge_base_path}"
-
-    kernel = Kernel()
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
-    api_key = os.getenv("AZURE_OPENAI_KEY")
-    if not all([endpoint, deployment, api_key]):
-        return "Error: AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT, and AZURE_OPENAI_DEPLOYMENT must be set in your .env file."
-    
-    service = AzureChatCompletion(
-        endpoint=endpoint,
-        api_key=api_key,
-        deployment_name=deployment
-    )
-    kernel.add_service(service)
-    settings = AzureChatPromptExecutionSettings()
-    settings.function_choice_behavior = FunctionChoiceBehavior.Auto()
-    
-    async with MCPStdioPlugin(
-        name="InternetServer",
-        command="python",
-        args=[str(mcp_internet_path)]
-    ) as internet_plugin, MCPStdioPlugin(
-        name="KnowledgeBaseServer",
-        command="python",
-        args=[str(mcp_knowledge_base_path)]
-    ) as kb_plugin:
+# Model-made HTML, used instead of ANSWER_FORMAT_INSTRUCTIONS when STRUCTURED_ANSWERS=0
+AGENT_CARE_HTML_FORMAT = (
+    "Contesta siempre en un formato HTML, con un título y párrafos claros. Usa colores, títulos, espacios, listas y fuentes adecuadas. "
+    "No uses azul en el título porque mi background es negro. No comiences con ```html o termines con ```; manténlo simple. "
+    "Siempre usa background negro y no uses colores claros para el font; usa gold en títulos ya que el background que tengo es negro."
+)
+
+MANAGER_INSTRUCTIONS = (
+    "You are a manager agent that helps select the appropriate agent for customer inquiries. "
+    "Your task is to analyze each question and determine which of these agents should handle it:\n"
+    "1. SentimentAnalysisAgent - For analyzing call emotions and customer satisfaction\n"
+    "2. RatePlansExpertAgent - For rate plans, pricing, and service costs information\n"
+    "3. AgentCare - For general queries and service issues like devices, sim cards, etc\n\n"
+    "Response format: A JSON object with:\n"
+    "Do not change the question. Kepp it as is.\n"
+    '{"agent": "AgentName", "question": "processed question"}\n\n'
+    "Example:\n"
+    '{"agent": "RatePlansExpertAgent", "question": "What are the available mobile plans and their prices?"}\n\n'
+    "ALWAYS return a valid JSON response."
+)
+
+SENTIMENT_ANALYSIS_INSTRUCTIONS = (
+    "Eres un analista experto en emociones y sentimientos de llamadas de clientes de Telefónica. Tu tarea es:\n"
+    "1. Analizar detalladamente el sentimiento del cliente durante la llamada\n"
+    "2. Identificar puntos específicos donde la emoción cambia\n"
+    "3. Clasificar el nivel de satisfacción en una escala de 1-5\n"
+    "4. Detectar palabras clave que indican frustración o satisfacción\n"
+    "5. Sugerir acciones específicas basadas en el análisis emocional"
+)
+
+RATE_PLANS_INSTRUCTIONS = (
+    "Eres el experto en planes tarifarios y precios de servicios de Telefónica Chile. Tus responsabilidades son:\n"
+    "1. Proporcionar información detallada sobre todos los planes tarifarios disponibles\n"
+    "2. Explicar precios y costos de servicios móviles, fijos e internet\n"
+    "3. Detallar promociones y ofertas vigentes\n"
+    "4. Comparar diferentes planes y recomendar el más adecuado según las necesidades del cliente\n"
+    "5. Aclarar condiciones, términos y beneficios incluidos en cada plan\n"
+    "6. Explicar procesos de cambio de plan y costos asociados\n"
+    "IMPORTANTE: Enfócate exclusivamente en planes tarifarios y precios de Telefónica Chile.\n"
+)
+
+RATE_PLANS_HTML_FORMAT = "Formatea tus respuestas en HTML claro y estructurado, usando colores compatibles con fondo negro."
+
+SESSION_SUMMARY_INSTRUCTIONS = (
+    "Mantienes el resumen de una conversación de atención al cliente. Recibirás el resumen actual y "
+    "los turnos nuevos que salen de la ventana de contexto. Devuelve el resumen actualizado, en texto "
+    "plano y en menos de {words} palabras, conservando los datos del cliente, su dispositivo, lo que "
+    "preguntó y las respuestas clave. No inventes nada."
+)
+
+# The chat history is rendered as <message> XML and parsed back by the prompt function, so it must
+# not be HTML-encoded (recent Semantic Kernel versions refuse to render it unless this is explicit)
+CHAT_HISTORY_PROMPT = PromptTemplateConfig(
+    template="{{$chat_history}}",
+    input_variables=[InputVariable(name="chat_history", allow_dangerously_set_content=True)],
+)
+
+def create_chat_service() -> AzureChatCompletion:
+    """Create the Azure OpenAI chat service from the .env settings.
+
+    AZURE_OPENAI_BASE_URL (the full deployment URL) can replace AZURE_OPENAI_ENDPOINT; unlike the
+    endpoint it may be plain http, as for the local fake deployment used by the benchmarks.
+    """
+    with get_tracer().span("load_dotenv"):
+        load_dotenv(dotenv_path=pathlib.Path(__file__).parent / ".env")
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")  
+    base_url = os.getenv("AZURE_OPENAI_BASE_URL")
+    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")  
+    api_key = os.getenv("AZURE_OPENAI_KEY")  
+    if not all([endpoint or base_url, deployment, api_key]):  
+        raise RuntimeError("Missing environment variables: AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT, AZURE_OPENAI_KEY")  
+    async_client = None
+    if os.getenv("AZURE_OPENAI_SCHEDULER", "1") != "0":
+        # Every model call of the worker goes through the deployment's scheduler (rate budgets,
+        # priorities, Retry-After); it retries itself, so the OpenAI client must not
+        async_client = AsyncAzureOpenAI(
+            azure_endpoint=None if base_url else endpoint,
+            base_url=base_url,
+            azure_deployment=deployment,
+            api_key=api_key,
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", DEFAULT_AZURE_API_VERSION),
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(transport=RateLimitedTransport(get_scheduler(deployment))),
+        )
+    return AzureChatCompletion(  
+        endpoint=endpoint,  
+        base_url=base_url,
+        api_key=api_key,  
+        deployment_name=deployment,  
+        async_client=async_client,
+    )  
+
+class AgentRegistry:
+    """Long-lived service, kernel and agents shared by every request of a worker.
+
+    One AzureChatCompletion (and so one warm HTTP connection pool) backs the manager, the
+    specialist agents and the agent_care kernel. Per-request state is only the ChatHistory.
+    """
+
+    def __init__(self, service: AzureChatCompletion):
+        self.service = service
+        # Tool calls of one model turn run concurrently; results are merged back in request order
+        self.kernel = OrderedToolCallKernel()
+        self.kernel.add_service(service)
+        self.kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, record_tool_call)
+        self.kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, record_tool_output)
+        self.settings = AzureChatPromptExecutionSettings()
+        self.settings.function_choice_behavior = FunctionChoiceBehavior.Auto()
+        self.chat_function = self.kernel.add_function(
+            plugin_name="chat",
+            function_name="respond",
+            prompt_template_config=CHAT_HISTORY_PROMPT
+        )
+        # Answers are compact JSON rendered to HTML locally, unless STRUCTURED_ANSWERS=0
+        self.structured_answers = os.getenv("STRUCTURED_ANSWERS", "1") != "0"
+        self.agent_care_instructions = AGENT_CARE_INSTRUCTIONS + (
+            ANSWER_FORMAT_INSTRUCTIONS if self.structured_answers else AGENT_CARE_HTML_FORMAT
+        )
+        self.agents = {agent.name: agent for agent in get_agents(service, self.structured_answers)}
+        self.manager_agent = ManagerAgent(service=service)
+        # Obvious intents are routed locally; ManagerAgent is only asked below this confidence
+        self.router = IntentRouter(threshold=float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.7")))
+        self.response_cache = ResponseCache.from_env()
+        # Customer record looked up while routing and given to these agents up front
+        self.prefetch = CustomerPrefetch.from_env()
+        # Rate budgets, priorities and retries of the deployment's model calls
+        self.scheduler = get_scheduler(service.ai_model_id)
+        # Identical questions in flight at the same time are answered once (QUESTION_COALESCING=0 disables)
+        self.question_flights = SingleFlight(enabled=os.getenv("QUESTION_COALESCING", "1") != "0")
+        # Multi-turn conversations by session ID (or IMSI), kept under a token budget
+        self.sessions = SessionStore.from_env(
+            summarizer=self.summarize_turns if os.getenv("SESSION_SUMMARIZER") == "model" else extractive_summary
+        )
+        self._plugins_registered = False
+        self._start_lock = asyncio.Lock()
+
+    async def ensure_started(self) -> None:
+        """Connect the pooled MCP servers and register them on the shared kernel (once)."""
+        if self._plugins_registered:
+            return
+        async with self._start_lock:
+            if self._plugins_registered:
+                return
+            plugins = await get_mcp_pool().start()
+            for plugin_name, plugin in plugins.items():
+                self.kernel.add_plugin(plugin, plugin_name=plugin_name)
+            self._plugins_registered = True
+
+    async def summarize_turns(self, previous: str, turns: list[Turn], max_tokens: int) -> str:
+        """SESSION_SUMMARIZER=model: fold the turns leaving a session's window into its summary with the model."""
+        history = ChatHistory()
+        history.add_system_message(SESSION_SUMMARY_INSTRUCTIONS.format(words=max_tokens * 3 // 4))
+        new_turns = "\n".join(f"{turn.role}: {turn.content}" for turn in turns)
+        history.add_user_message(f"Resumen actual:\n{previous or '(vacío)'}\n\nTurnos nuevos:\n{new_turns}")
+        with get_tracer().span("session.summarize", turns=len(turns)) as span:
+            try:
+                # Nobody is waiting for the summary: it shouldn't delay interactive questions
+                with request_priority(Priority.BATCH):
+                    result = await self.service.get_chat_message_content(history, AzureChatPromptExecutionSettings())
+                record_usage(span, result)
+                return str(result)
+            except Exception as e:
+                span.set("error", str(e))
+                return extractive_summary(previous, turns, max_tokens)
+
+_REGISTRY: AgentRegistry | None = None
+# function_app may build the registry in its warm-up thread while the first request asks for it
+_REGISTRY_LOCK = threading.Lock()
+
+def get_registry() -> AgentRegistry:
+    """Return the worker-wide AgentRegistry, building it on first use."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                with get_tracer().span("registry.build"):
+                    _REGISTRY = AgentRegistry(create_chat_service())
+    return _REGISTRY
+
+async def get_customer_facts(imsi: str) -> dict:
+    """Most recent customer record from the knowledge base MCP server ({} if it can't be found)."""
+    if not imsi:
+        return {}
+    with get_tracer().span("customer_facts") as span:
         try:
-            kernel.add_plugin(internet_plugin, plugin_name="internet_extract")
-            kernel.add_plugin(kb_plugin, plugin_name="knowledge_base")
-        except Exception as e:
-            return f"Error: Could not register the MCP plugins: {str(e)}"
-        
+            plugins = await get_mcp_pool().start()
+            result = await plugins["knowledge_base"].call_tool("get_customer_by_imsi", imsi=str(imsi))
+            customer = json.loads(str(result[0]))
+        except Exception:
+            customer = {}
+        if not isinstance(customer, dict) or "error" in customer:
+            customer = {}
+        span.set("found", bool(customer))
+        return customer
+
+_SESSION_ROLES = {"system": AuthorRole.SYSTEM, "user": AuthorRole.USER, "assistant": AuthorRole.ASSISTANT}
+
+def session_messages(turn: SessionTurn | None) -> list[ChatMessageContent]:
+    """The earlier turns of the session (summary, recent questions, answers and tool outputs) as chat messages."""
+    if turn is None:
+        return []
+    return [ChatMessageContent(role=_SESSION_ROLES[role], content=content) for role, content in turn.history]
+
+async def agent_care_stream(question: str, customer_context: str | None = None,
+                            conversation: list[ChatMessageContent] | None = None) -> AsyncIterator[str]:
+    """Stream the agent care answer, yielding assistant chunks as the model produces them.
+
+    customer_context is a prefetched customer summary added to the conversation, so the model
+    doesn't need to call get_customer_by_imsi itself. conversation holds the earlier turns of
+    the customer's session, if any.
+    """
+    try:
+        registry = get_registry()
+    except RuntimeError:
+        yield "Error: AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT, and AZURE_OPENAI_DEPLOYMENT must be set in your .env file."
+        return
+
+    # MCP servers are started once per process and shared across calls
+    try:
+        await registry.ensure_started()
+    except FileNotFoundError as e:
+        yield f"Error: {str(e)}"
+        return
+    except Exception as e:
+        yield f"Error: Could not register the MCP plugins: {str(e)}"
+        return
+
+    with get_tracer().span("agent_care", prefetched=bool(customer_context)) as span:
         try:
             history = ChatHistory()
-            history.add_system_message("No inventes nada y no uses información que no esté en las herramientas. "
-                "Eres un agente de atención al cliente en Chile, listo para responder todo tipo de preguntas de los clientes. "  
-                "Puedes ayudar con información del cliente, verificar el estado de sus cuentas y determinar si un dispositivo es compatible con eSIM. "  
-                "Para responder preguntas sobre información del cliente, utilizas las herramientas de atención al cliente, "
-                "que recuperan datos del cliente pasando el ID del cliente al servicio de atención al cliente. "  
-                "Si el usuario no proporciona el ID del cliente, debes solicitarlo amablemente y explicar por qué lo necesitas. "
-                "Por ejemplo: 'Para poder proporcionarle información detallada sobre su cuenta, ¿podría facilitarme su número de ID de cliente?' "
-                "Si se te da el nombre del cliente, solamente busca un método para traer el nombre del cliente y no uses el ID. "  
-                "Para verificar si un dispositivo es compatible con eSIM, utiliza la herramienta de servidor de internet que extrae datos sobre la compatibilidad de dispositivos. "  
-                "Los datos deben ser extraídos de los siguientes URLs: "  
-                "urlApple = https://esimblow.com/es/dispositivos/dispositivos-apple-esim/ y "  
-                "urlSamsung = https://www.samsung.com/latin/support/mobile-devices/galaxy-esim-and-supported-network-carriers/?msockid=1803ea69355c6f270dc0ffb034346ee2. "  
-                "Una vez que hayas obtenido la información, proporciona una respuesta clara al cliente sobre la compatibilidad con eSIM. "  
-                "Siempre proporciona respuestas claras y útiles, y explica qué herramienta utilizaste si es relevante. "  
-                "Contesta siempre en un formato HTML, con un título y párrafos claros. Usa colores, títulos, espacios, listas y fuentes adecuadas. "  
-                "No uses azul en el título porque mi background es negro. No comiences con ```html o termines con ```; manténlo simple. "  
-                "Siempre usa background negro y no uses colores claros para el font; usa gold en títulos ya que el background que tengo es negro. "  
-                "Si el cliente quiere saber si su dispositivo móvil es compatible con eSIM, solo contesta 'sí' o 'no' y explica de dónde sacaste la información. "
-                "Importante revisa la lista que recibiste del web site de Apple o Samsung y con cuidado ve si el modelo exacto del dispositivo se encuentra en la lista. No basta con que diga iPhone o Samsung, debe ser el modelo específico. "
-                "NO inventes nada, es muy importante tener la respuesta correcta. Si no encuentras la información exacta, indícalo claramente."
-            )
+            history.add_system_message(registry.agent_care_instructions)
+            if customer_context:
+                history.add_system_message(customer_context)
+            for message in conversation or ():
+                history.add_message(message)
             history.add_user_message(question)
-            chat_function = kernel.add_function(
-                plugin_name="chat",
-                function_name="respond",
-                prompt="{{$chat_history}}"
-            )
+            tool_calls = start_turn_tool_log()
             arguments = KernelArguments(
                 chat_history=history,
-                settings=settings
+                settings=registry.settings
             )
-            try:
-                response_chunks = []
-                async for message in kernel.invoke_stream(
-                    chat_function,
-                    arguments=arguments
-                ):
-                    chunk = message[0]
-                    if isinstance(chunk, StreamingChatMessageContent) and chunk.role == AuthorRole.ASSISTANT:
-                        response_chunks.append(str(chunk))
-                return "".join(response_chunks)
-            except Exception as e:
-                return f"Error: {str(e)}"
+            async for message in registry.kernel.invoke_stream(
+                registry.chat_function,
+                arguments=arguments
+            ):
+                chunk = message[0]
+                # Token usage arrives in the last chunk of each model call (tool-call turns included)
+                record_usage(span, chunk)
+                if isinstance(chunk, StreamingChatMessageContent) and chunk.role == AuthorRole.ASSISTANT:
+                    text = str(chunk)
+                    if text:
+                        span.mark("first_token_ms")
+                    yield text
+            span.set("tool_calls", len(tool_calls))
+            if customer_context:
+                metrics = registry.prefetch.metrics
+                metrics.count("redundant_lookups" if CUSTOMER_LOOKUP_TOOL in tool_calls else "round_trips_saved")
         except Exception as e:
-            return f"Error: {str(e)}"
+            span.set("error", str(e))
+            if is_rate_limited(e):
+                # Let process_question report the deployment as busy instead of answering with the error
+                raise
+            yield f"Error: {str(e)}"
+
+async def agent_care(question: str) -> str:
+    """Implementation of the agent care functionality"""
+    response_chunks = []
+    async for chunk in agent_care_stream(question):
+        response_chunks.append(chunk)
+    return "".join(response_chunks)
 
 # Define a new agent that calls the agent_care function  
 class AgentCare(Agent):  
@@ -132,68 +342,31 @@ class AgentCare(Agent):
     async def get_response(self, *args, **kwargs):
         raise NotImplementedError("get_response is not implemented for AgentCare.")
 
-    async def invoke_stream(self, *args, **kwargs):
-        raise NotImplementedError("invoke_stream is not implemented for AgentCare.")
+    async def invoke_stream(self, question: str, customer_context: str | None = None,
+                            conversation: list[ChatMessageContent] | None = None) -> AsyncIterator[str]:
+        async for chunk in agent_care_stream(question, customer_context, conversation):
+            yield chunk
 
 # New ManagerAgent class
 class ManagerAgent(ChatCompletionAgent):
     def __init__(self, service=None):
-        instructions = (
-            "You are a manager agent that helps select the appropriate agent for customer inquiries. "
-            "Your task is to analyze each question and determine which of these agents should handle it:\n"
-            "1. SentimentAnalysisAgent - For analyzing call emotions and customer satisfaction\n"
-            "2. RatePlansExpertAgent - For rate plans, pricing, and service costs information\n" 
-            "3. AgentCare - For general queries and service issues like devices, sim cards, etc\n\n"
-            "Response format: A JSON object with:\n"
-            "Do not change the question. Kepp it as is.\n"
-            '{"agent": "AgentName", "question": "processed question"}\n\n'
-            "Example:\n"
-            '{"agent": "RatePlansExpertAgent", "question": "What are the available mobile plans and their prices?"}\n\n'
-            "ALWAYS return a valid JSON response."
-        )
-        super().__init__(service=service, instructions=instructions, name="ManagerAgent")
+        super().__init__(service=service, instructions=MANAGER_INSTRUCTIONS, name="ManagerAgent")
 
-def get_agents() -> list[Agent]:  
+def get_agents(service: AzureChatCompletion = None, structured_answers: bool = True) -> list[Agent]:  
     """Return a list of agents that will participate in the concurrent orchestration."""  
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")  
-    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")  
-    api_key = os.getenv("AZURE_OPENAI_KEY")  
-    if not all([endpoint, deployment, api_key]):  
-        raise RuntimeError("Missing environment variables: AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT, AZURE_OPENAI_KEY")  
-  
-    service = AzureChatCompletion(  
-        endpoint=endpoint,  
-        api_key=api_key,  
-        deployment_name=deployment,  
-    )  
+    if service is None:
+        service = create_chat_service()
   
     # Specialized analysis agents
     sentiment_agent = ChatCompletionAgent(  
         name="SentimentAnalysisAgent",  
-        instructions=(
-            "Eres un analista experto en emociones y sentimientos de llamadas de clientes de Telefónica. Tu tarea es:\n"
-            "1. Analizar detalladamente el sentimiento del cliente durante la llamada\n"
-            "2. Identificar puntos específicos donde la emoción cambia\n"
-            "3. Clasificar el nivel de satisfacción en una escala de 1-5\n"
-            "4. Detectar palabras clave que indican frustración o satisfacción\n"
-            "5. Sugerir acciones específicas basadas en el análisis emocional"
-        ),
+        instructions=SENTIMENT_ANALYSIS_INSTRUCTIONS,
         service=service,  
     )  
     
     rate_plans_agent = ChatCompletionAgent(  
         name="RatePlansExpertAgent",  
-        instructions=(
-            "Eres el experto en planes tarifarios y precios de servicios de Telefónica Chile. Tus responsabilidades son:\n"
-            "1. Proporcionar información detallada sobre todos los planes tarifarios disponibles\n"
-            "2. Explicar precios y costos de servicios móviles, fijos e internet\n"
-            "3. Detallar promociones y ofertas vigentes\n"
-            "4. Comparar diferentes planes y recomendar el más adecuado según las necesidades del cliente\n"
-            "5. Aclarar condiciones, términos y beneficios incluidos en cada plan\n"
-            "6. Explicar procesos de cambio de plan y costos asociados\n"
-            "Formatea tus respuestas en HTML claro y estructurado, usando colores compatibles con fondo negro.\n"
-            "IMPORTANTE: Enfócate exclusivamente en planes tarifarios y precios de Telefónica Chile."
-        ),
+        instructions=RATE_PLANS_INSTRUCTIONS + (ANSWER_FORMAT_INSTRUCTIONS if structured_answers else RATE_PLANS_HTML_FORMAT),
         service=service,  
     )  
   
@@ -202,43 +375,41 @@ def get_agents() -> list[Agent]:
   
     return [sentiment_agent, rate_plans_agent, agent_care]  
   
-async def process_question(question: str, imsi: str = None) -> str:
+async def process_question_stream(question: str, imsi: str = None, session_id: str = None) -> AsyncIterator[str]:
     """
-    Process a single question using the appropriate specialized agent.
-    
-    Args:
-        question (str): The question or text to process
-        imsi (str, optional): The IMSI of the customer
-        
-    Returns:
-        str: The response from the selected agent
-        
+    Process a single question like process_question(), yielding the answer in chunks
+    as the selected agent streams it.
+
+    With a session_id (or the IMSI, with SESSION_KEY=imsi) the question continues that
+    conversation: the agent sees the earlier turns, and the exchange is added to it.
+
     Raises:
         RuntimeError: If required environment variables are missing
         Exception: If there's an error processing the question
     """
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")  
-    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")  
-    api_key = os.getenv("AZURE_OPENAI_KEY")  
-    if not all([endpoint, deployment, api_key]):  
-        raise RuntimeError("Missing environment variables: AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT, AZURE_OPENAI_KEY")  
-  
-    service = AzureChatCompletion(  
-        endpoint=endpoint,  
-        api_key=api_key,  
-        deployment_name=deployment,  
-    )  
-      
-    # Get the list of available agents
-    all_agents = get_agents()
-    
-    # Create a dictionary of agents by name
-    agents = {
-        agent.name: agent for agent in all_agents
-    }
-    
-    # Initialize the manager agent
-    manager_agent = ManagerAgent(service=service)
+    session = get_registry().sessions.session_for(session_id, imsi)
+    if session is None:
+        async for chunk in _process_question_stream(question, imsi):
+            yield chunk
+        return
+
+    async with session.lock:
+        turn = session.begin_turn()
+        answer_chunks = []
+        async for chunk in _process_question_stream(question, imsi, turn):
+            answer_chunks.append(chunk)
+            yield chunk
+        answer = "".join(answer_chunks)
+        if answer and not answer.startswith("Error:"):
+            with get_tracer().span("session.record") as span:
+                await session.end_turn(turn, question, answer)
+                span.set("prompt_tokens", session.prompt_tokens())
+
+async def _process_question_stream(question: str, imsi: str = None, turn: SessionTurn = None) -> AsyncIterator[str]:
+    # Services and agents are built once per worker and reused by every request
+    registry = get_registry()
+    agents = registry.agents
+    manager_agent = registry.manager_agent
 
     # Prepare the question with IMSI if provided
     if imsi:
@@ -246,38 +417,193 @@ async def process_question(question: str, imsi: str = None) -> str:
     else:
         enhanced_question = question
 
-    try:
-        # Ask the manager agent which agent to use
-        response_chunks = []
-        async for message in manager_agent.invoke(enhanced_question):
-            response_chunks.append(str(message))
-        manager_response = "".join(response_chunks)
-        
-        result = json.loads(manager_response)
-        agent_name = result.get("agent")
-        processed_question = enhanced_question
-        
-        if agent_name not in agents:
-            raise ValueError(f"Unknown agent suggested: {agent_name}")
+    tracer = get_tracer()
+    with tracer.span("process_question", has_imsi=bool(imsi)) as request_span:
+        if turn is not None:
+            request_span.set("session_messages", len(turn.history))
+        # Look the customer up while the question is routed; the agent isn't known yet, so this is speculative
+        prefetch = registry.prefetch
+        facts_task = asyncio.create_task(get_customer_facts(imsi)) if imsi and prefetch.enabled else None
+        if facts_task:
+            prefetch.metrics.count("started")
+
+        flight = None
+        try:
+            # Try the local fast-path router first; only ask the manager agent when it isn't sure
+            with tracer.span("route") as span:
+                decision = registry.router.route(question)
+                span.set("agent", decision.agent)
+                span.set("confidence", round(decision.confidence, 3))
+            agent_name = decision.agent
+            if agent_name is None and turn is not None and turn.previous_agent:
+                # An unclear follow-up ("¿y cuánto cuesta?") stays with the agent of the previous turn
+                agent_name = turn.previous_agent
+                request_span.set("follow_up", True)
+            if agent_name is None:
+                with tracer.span("manager_agent") as span:
+                    response_chunks = []
+                    async for message in manager_agent.invoke(enhanced_question):
+                        response_chunks.append(str(message))
+                        record_usage(span, message)
+                    manager_response = "".join(response_chunks)
+                
+                result = json.loads(manager_response)
+                agent_name = result.get("agent")
+            processed_question = enhanced_question
+            request_span.set("agent", agent_name)
             
-        selected_agent = agents[agent_name]
-        
-        # Handle streaming (async generator) vs coroutine agents
-        invoke_result = selected_agent.invoke(processed_question)
-        if isinstance(invoke_result, types.AsyncGeneratorType):
+            if agent_name not in agents:
+                raise ValueError(f"Unknown agent suggested: {agent_name}")
+                
+            selected_agent = agents[agent_name]
+
+            # Reuse the answer given to another customer with the same question, agent and device
+            # (device-scoped questions), or to this customer (questions about their own line)
+            cache = registry.response_cache
+            flights = registry.question_flights
+            key_facts = cache.key_facts_for(agent_name, question) or ()
+            needs_facts = (cache.enabled or flights.enabled) and any(name != "imsi" for name in key_facts)
+            wants_context = prefetch.applies_to(agent_name)
+            if facts_task and (needs_facts or wants_context):
+                with tracer.span("customer_facts.wait"):
+                    customer = await facts_task
+            elif needs_facts:
+                customer = await get_customer_facts(imsi)
+            else:
+                customer = {}
+                if facts_task:
+                    facts_task.cancel()
+                    prefetch.metrics.count("discarded")
+            # The prefetched record (status, roaming, IMEI, last event) goes into the prompt, which makes
+            # the answer this customer's own; a device-scoped question only gets the brand and model, so
+            # its answer stays shared by every customer with the same phone
+            injects_context = bool(wants_context and facts_task and customer)
+            device_scoped = bool(key_facts) and "imsi" not in key_facts
+            if needs_facts and imsi and not customer:
+                # Without the customer's device we can't tell which answers apply: skip the cache
+                answer_key = None
+            elif turn is not None and turn.history:
+                # A follow-up's answer depends on the conversation so far, not just on the question
+                answer_key = None
+            else:
+                answer_key = cache.answer_key(agent_name, question, customer, imsi, personal=injects_context and not device_scoped)
+            cache_key = answer_key if cache.enabled else None
+            with tracer.span("cache.lookup") as span:
+                cached_answer = cache.get(cache_key)
+                span.set("hit", cached_answer is not None)
+            if cached_answer is not None:
+                request_span.set("answer_chars", len(cached_answer))
+                yield cached_answer
+                return
+
+            # The same question for the same facts is already being answered: wait for that answer.
+            # Flights use the answer key even with the cache off, so a question that reads the
+            # customer's data only ever joins a flight for the same IMSI
+            flight = flights.join(answer_key)
+            if flight and not flight.leader:
+                with tracer.span("coalesced.wait"):
+                    try:
+                        coalesced_answer = await flight.wait()
+                    except FlightAbandoned:
+                        coalesced_answer = None
+                        flight = None
+                if coalesced_answer is not None:
+                    request_span.set("coalesced", True)
+                    request_span.set("answer_chars", len(coalesced_answer))
+                    yield coalesced_answer
+                    return
+            
+            customer_context = None
+            if injects_context:
+                customer_context = customer_summary(imsi, customer, key_facts if device_scoped else SUMMARY_FIELDS)
+                prefetch.metrics.count("injected")
+            elif wants_context and facts_task:
+                prefetch.metrics.count("not_found")
+
+            conversation = session_messages(turn)
+            if turn is not None:
+                turn.agent = agent_name
+                if customer_context and turn.knows(customer_context):
+                    # Already in the session's history: don't repeat it
+                    customer_context = None
+                elif customer_context:
+                    turn.tool_outputs.append((CUSTOMER_LOOKUP_TOOL, customer_context))
+            tool_outputs = start_turn_tool_outputs() if turn is not None else None
+
+            if isinstance(selected_agent, AgentCare):
+                stream = selected_agent.invoke_stream(processed_question, customer_context, conversation)
+            elif customer_context or conversation:
+                context = [ChatMessageContent(role=AuthorRole.SYSTEM, content=customer_context)] if customer_context else []
+                stream = selected_agent.invoke_stream([*context, *conversation, processed_question])
+            else:
+                stream = selected_agent.invoke_stream(processed_question)
+
+            # Structured agents answer in JSON; each field is turned into HTML as soon as it's complete
+            renderer = AnswerRenderer() if registry.structured_answers and agent_name in STRUCTURED_AGENTS else None
+
+            # Forward each chunk as soon as the agent produces it
             answer_chunks = []
-            async for message in invoke_result:
-                answer_chunks.append(str(message))
+            with tracer.span("agent.stream", agent=agent_name) as span:
+                async for message in stream:
+                    chunk = str(message)
+                    record_usage(span, message)
+                    if renderer:
+                        chunk = renderer.feed(chunk)
+                    if chunk:
+                        span.mark("first_chunk_ms")
+                        span.add("chunks")
+                    answer_chunks.append(chunk)
+                    yield chunk
+                if renderer and (chunk := renderer.close()):
+                    answer_chunks.append(chunk)
+                    yield chunk
             answer = "".join(answer_chunks)
-        else:
-            answer = await invoke_result
+            request_span.set("answer_chars", len(answer))
+            if tool_outputs:
+                turn.tool_outputs.extend(tool_outputs)
+
+            if answer and not answer.startswith("Error:"):
+                cache.put(cache_key, answer)
+            if flight:
+                flight.resolve(answer)
             
-        return answer
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Could not parse manager response: {e}\n{manager_response}")
+        except Exception as e:
+            if flight and flight.leader:
+                flight.fail(e)
+            if is_rate_limited(e):
+                request_span.set("throttled", True)
+                raise DeploymentBusyError(f"Azure OpenAI is throttling requests: {str(e)}",
+                                          retry_after=rate_limit_retry_after(e)) from e
+            raise Exception(f"Error processing question: {str(e)}")
+        finally:
+            if facts_task and not facts_task.done():
+                facts_task.cancel()
+            if flight and flight.leader:
+                # Stopped early (e.g. the client went away): the followers answer on their own
+                flight.abandon()
+
+async def process_question(question: str, imsi: str = None, session_id: str = None) -> str:
+    """
+    Process a single question using the appropriate specialized agent.
+    
+    Args:
+        question (str): The question or text to process
+        imsi (str, optional): The IMSI of the customer
+        session_id (str, optional): Conversation the question belongs to (see process_question_stream)
         
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Could not parse manager response: {e}\n{manager_response}")
-    except Exception as e:
-        raise Exception(f"Error processing question: {str(e)}")
+    Returns:
+        str: The response from the selected agent
+        
+    Raises:
+        RuntimeError: If required environment variables are missing
+        Exception: If there's an error processing the question
+    """
+    answer_chunks = []
+    async for chunk in process_question_stream(question, imsi, session_id):
+        answer_chunks.append(chunk)
+    return "".join(answer_chunks)
 
 async def main():
     """Direct call to test the agent system with specific question and IMSI."""
@@ -0,0 +1,200 @@
+# Structured agent answers. AgentCare and RatePlansExpertAgent reply with a compact JSON object
+# (title, verdict, paragraphs, sources) and the HTML shown to the customer is produced here from a
+# fixed template, instead of asking the model to spend output tokens on markup, colours and fonts.
+#
+# AnswerRenderer works incrementally: each field is rendered as soon as its JSON value is complete,
+# so the streaming endpoint still sends the title before the paragraphs are generated. Anything
+# that isn't a JSON object (errors, an old-style HTML answer) is passed through unchanged.
+
+import html
+import json
+
+# Agents told to answer with ANSWER_FORMAT_INSTRUCTIONS, whose output goes through AnswerRenderer
+STRUCTURED_AGENTS = frozenset({"AgentCare", "RatePlansExpertAgent"})
+
+ANSWER_FORMAT_INSTRUCTIONS = (
+    "Responde únicamente con un objeto JSON, sin HTML, sin Markdown y sin ```, con esta forma: "
+    '{"title": "título breve", "verdict": "respuesta corta, por ejemplo \'Sí\' o \'No\' (vacío si no aplica)", '
+    '"paragraphs": ["párrafo", "..."], "sources": ["herramienta o URL usada", "..."]}. '
+    "Escribe párrafos breves y claros; el formato visual se aplica después."
+)
+
+# Black background and gold titles, as the support console expects
+CONTAINER_OPEN = '<div style="background:#000;color:#f2f2f2;font-family:Arial,Helvetica,sans-serif;line-height:1.5;padding:16px">'
+CONTAINER_CLOSE = "</div>"
+TITLE = '<h2 style="color:gold;margin:0 0 12px">{}</h2>'
+VERDICT = '<p style="color:gold;font-size:1.2em;font-weight:bold;margin:0 0 12px">{}</p>'
+PARAGRAPH = '<p style="margin:0 0 10px">{}</p>'
+SOURCES_OPEN = '<h3 style="color:gold;font-size:1em;margin:16px 0 6px">Fuentes</h3><ul style="margin:0;padding-left:20px">'
+SOURCE = "<li>{}</li>"
+SOURCES_CLOSE = "</ul>"
+
+_WHITESPACE = " \t\r\n"
+
+
+class AnswerRenderer:
+    """Turns the streamed JSON answer of a structured agent into HTML, field by field.
+
+    feed() returns the HTML that can be sent so far (often ""), close() the rest, including any
+    text after the closing brace as a last paragraph.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._mode = None          # None until the first character is seen, then "json" or "text"
+        self._key = None           # key whose value comes next
+        self._list_key = None      # key of the array being read, if any
+        self._list_items = 0
+        self._done = False         # the closing brace was read
+        self._failed = False       # not the JSON we expect; the rest is shown as text on close()
+
+    def feed(self, chunk: str) -> str:
+        if self._mode == "text":
+            return chunk
+        self._buffer += chunk
+        if self._mode is None:
+            start = self._content_start()
+            if start is None:
+                return ""
+            if not self._buffer.startswith("{", start):
+                self._mode = "text"
+                return self._buffer
+            self._mode = "json"
+            self._pos = start + 1
+            return CONTAINER_OPEN + self._advance()
+        return self._advance()
+
+    def close(self) -> str:
+        if self._mode == "text":
+            return ""
+        if self._mode is None:
+            return self._buffer
+        out = [self._advance()]
+        if self._list_key is not None:
+            out.append(self._close_list())
+        rest = self._buffer[self._pos:].strip(_WHITESPACE + ",}")
+        if rest.startswith("```"):
+            rest = rest[3:].strip(_WHITESPACE)
+        if rest.endswith("```"):
+            rest = rest[:-3].strip(_WHITESPACE)
+        if rest:
+            # Malformed or truncated JSON, or prose the model wrote after the object: show what's
+            # left instead of dropping it
+            out.append(PARAGRAPH.format(html.escape(rest)))
+        out.append(CONTAINER_CLOSE)
+        return "".join(out)
+
+    def _content_start(self) -> int | None:
+        """Index of the first character of the answer, skipping a ```json fence; None while unknown."""
+        text = self._buffer.lstrip(_WHITESPACE)
+        if not text:
+            return None
+        offset = len(self._buffer) - len(text)
+        if text.startswith("`"):
+            if len(text) < 3:
+                return None
+            if not text.startswith("```"):
+                return offset
+            newline = text.find("\n")
+            if newline < 0:
+                return None
+            rest = text[newline + 1:].lstrip(_WHITESPACE)
+            if not rest:
+                return None
+            return len(self._buffer) - len(rest)
+        return offset
+
+    def _skip(self, chars: str) -> None:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in chars:
+            self._pos += 1
+
+    def _decode(self):
+        """Decode the JSON value at the cursor; raise ValueError while it's incomplete."""
+        value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        if end == len(self._buffer) and not isinstance(value, (str, list, dict)):
+            # A number or literal at the very end of the buffer may still be growing
+            raise ValueError("incomplete value")
+        self._pos = end
+        return value
+
+    def _advance(self) -> str:
+        out = []
+        while not (self._done or self._failed):
+            self._skip(_WHITESPACE + ",")
+            if self._pos >= len(self._buffer):
+                break
+            char = self._buffer[self._pos]
+            if self._list_key is not None:
+                if char == "]":
+                    self._pos += 1
+                    out.append(self._close_list())
+                    continue
+                try:
+                    item = self._decode()
+                except ValueError:
+                    break
+                out.append(self._render_item(self._list_key, item))
+                continue
+            if self._key is None:
+                if char == "}":
+                    self._pos += 1
+                    self._done = True
+                    break
+                start = self._pos
+                try:
+                    key = self._decode()
+                except ValueError:
+                    break
+                self._skip(_WHITESPACE)
+                if self._pos >= len(self._buffer):
+                    self._pos = start
+                    break
+                if self._buffer[self._pos] != ":" or not isinstance(key, str):
+                    self._pos = start
+                    self._failed = True
+                    break
+                self._pos += 1
+                self._key = key
+                continue
+            if char == "[":
+                self._pos += 1
+                self._list_key, self._key, self._list_items = self._key, None, 0
+                continue
+            try:
+                value = self._decode()
+            except ValueError:
+                break
+            out.append(self._render_value(self._key, value))
+            self._key = None
+        return "".join(out)
+
+    def _render_value(self, key: str, value) -> str:
+        if not isinstance(value, str) or not value:
+            return ""
+        if key == "title":
+            return TITLE.format(html.escape(value))
+        if key == "verdict":
+            return VERDICT.format(html.escape(value))
+        if key == "paragraphs":
+            return PARAGRAPH.format(html.escape(value))
+        if key == "sources":
+            return SOURCES_OPEN + SOURCE.format(html.escape(value)) + SOURCES_CLOSE
+        return ""
+
+    def _render_item(self, key: str, item) -> str:
+        if not isinstance(item, str) or not item:
+            return ""
+        if key == "paragraphs":
+            return PARAGRAPH.format(html.escape(item))
+        if key == "sources":
+            self._list_items += 1
+            prefix = SOURCES_OPEN if self._list_items == 1 else ""
+            return prefix + SOURCE.format(html.escape(item))
+        return ""
+
+    def _close_list(self) -> str:
+        closing = SOURCES_CLOSE if self._list_key == "sources" and self._list_items else ""
+        self._list_key, self._list_items = None, 0
+        return closing
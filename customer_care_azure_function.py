@@ -1,10 +1,9 @@
 import azure.functions as func
 import logging
 import json
-import sys
-import subprocess
+from customer_care_worker_pool import WorkerError, WorkerTimeout, get_worker_pool
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+async def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('HTTP trigger function processed a request.')
     try:
         req_body = req.get_json()
@@ -12,24 +11,37 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         return func.HttpResponse(
             "Invalid JSON in request body.", status_code=400
         )
-    
+
     question = req_body.get("question")
     if not question:
         return func.HttpResponse(
             "Missing 'question' in request body.", status_code=400
         )
 
-    # Call customer_care_agent_client.py and pass the question as an argument
+    # Answer on one of the warm agent worker processes instead of starting an interpreter per request
+    pool = get_worker_pool()
     try:
-        result = subprocess.run(
-            [sys.executable, "customer_care_agent_client.py", question],
-            capture_output=True, text=True, check=True
+        answer = await pool.answer(question, req_body.get("imsi"))
+    except WorkerTimeout as e:
+        return func.HttpResponse(
+            f"Timed out waiting for the agent: {str(e)}", status_code=504
+        )
+    except WorkerError as e:
+        if e.kind == "DeploymentBusyError":
+            return func.HttpResponse(
+                "El servicio está ocupado, por favor intente nuevamente en unos segundos.",
+                status_code=503,
+                headers={"Retry-After": str(max(1, round(e.retry_after or 1)))}
+            )
+        return func.HttpResponse(
+            f"Error answering the question: {str(e)}", status_code=500
         )
-        answer = result.stdout.strip()
     except Exception as e:
         return func.HttpResponse(
-            f"Error calling customer_care_agent_client.py: {str(e)}", status_code=500
+            f"Error calling the agent worker pool: {str(e)}", status_code=500
         )
+    finally:
+        logging.info('Agent worker pool metrics: %s', pool.metrics.snapshot())
 
     return func.HttpResponse(
         json.dumps({"answer": answer}),
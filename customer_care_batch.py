@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# Offline batch processing of customer questions from a JSONL file.
+# All questions run on one event loop and share the agent registry, MCP sessions and caches.
+#
+# Usage: python customer_care_batch.py questions.jsonl answers.jsonl [--concurrency 8]
+#        [--id-field id] [--question-field question] [--imsi-field imsi]
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from customer_care_agent_mgr import get_registry, process_question
+from customer_care_rate_limit import Priority, request_priority
+
+
+@dataclass
+class BatchItem:
+    id: str
+    question: str
+    imsi: str | None = None
+
+
+@dataclass
+class BatchReport:
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 3) if latencies else 0.0
+
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_s": round(self.elapsed, 3),
+            "questions_per_s": round(self.processed / self.elapsed, 3) if self.elapsed else 0.0,
+            "latency_p50_s": percentile(0.50),
+            "latency_p95_s": percentile(0.95),
+            "latency_p99_s": percentile(0.99),
+            "latency_mean_s": round(statistics.mean(latencies), 3) if latencies else 0.0,
+        }
+
+
+def read_batch_items(path: str, id_field: str = "id", question_field: str = "question",
+                     imsi_field: str = "imsi") -> Iterator[BatchItem]:
+    """Read one question per JSONL line; lines without an id are identified by their line number."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            question = record.get(question_field)
+            if not question:
+                continue
+            imsi = record.get(imsi_field)
+            yield BatchItem(
+                id=str(record.get(id_field) or f"line-{line_number}"),
+                question=str(question),
+                imsi=str(imsi) if imsi else None,
+            )
+
+
+def drop_incomplete_line(output_path: str) -> int:
+    """Truncate a last line that has no newline (a write cut short by an interruption), so the next
+    run appends after whole records only; returns the number of bytes dropped."""
+    if not os.path.exists(output_path):
+        return 0
+    with open(output_path, "rb+") as f:
+        end = pos = f.seek(0, os.SEEK_END)
+        keep = 0
+        while pos > 0:
+            size = min(4096, pos)
+            f.seek(pos - size)
+            newline = f.read(size).rfind(b"\n")
+            if newline >= 0:
+                keep = pos - size + newline + 1
+                break
+            pos -= size
+        if keep < end:
+            f.truncate(keep)
+        return end - keep
+
+
+def completed_ids(output_path: str) -> set[str]:
+    """Ids already answered in a previous (possibly interrupted) run of the same output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line damaged outside of this script; its question is asked again
+                continue
+            if "answer" in record:
+                done.add(record["id"])
+    return done
+
+
+async def process_batch(items: Iterable[BatchItem], output_path: str, concurrency: int = 8,
+                        resume: bool = True, priority: Priority = Priority.BATCH) -> BatchReport:
+    """Answer every item with at most `concurrency` questions in flight, appending results to output_path.
+
+    Model calls run at `priority`, so interactive requests of the same worker go first.
+    """
+    report = BatchReport()
+    if resume and drop_incomplete_line(output_path):
+        print(f"Dropped the incomplete last line of {output_path}", file=sys.stderr)
+    done = completed_ids(output_path) if resume else set()
+    pending = iter(items)
+    # Build the shared services and MCP sessions before the workers start
+    await get_registry().ensure_started()
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        async def worker():
+            # Workers pull from one shared iterator, so items are read lazily
+            for item in pending:
+                if item.id in done:
+                    report.skipped += 1
+                    continue
+                start = time.perf_counter()
+                record = {"id": item.id, "question": item.question, "imsi": item.imsi}
+                try:
+                    record["answer"] = await process_question(item.question, item.imsi)
+                    report.processed += 1
+                except Exception as e:
+                    record["error"] = str(e)
+                    report.failed += 1
+                latency = time.perf_counter() - start
+                record["latency_s"] = round(latency, 3)
+                report.latencies.append(latency)
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+        start = time.perf_counter()
+        with request_priority(priority):
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        report.elapsed = time.perf_counter() - start
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of customer questions")
+    parser.add_argument("input", help="JSONL file, one question per line")
+    parser.add_argument("output", help="JSONL file the answers are appended to")
+    parser.add_argument("--concurrency", type=int, default=8, help="questions processed at the same time")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--question-field", default="question")
+    parser.add_argument("--imsi-field", default="imsi")
+    parser.add_argument("--no-resume", action="store_true", help="overwrite the output instead of skipping answered ids")
+    args = parser.parse_args()
+
+    items = read_batch_items(args.input, args.id_field, args.question_field, args.imsi_field)
+    report = await process_batch(items, args.output, concurrency=args.concurrency, resume=not args.no_resume)
+    print(json.dumps(report.summary(), indent=2), file=sys.stderr)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,1527 @@
+#!/usr/bin/env python3
+# Offline benchmarks for the customer care pipeline. Every benchmark runs against the local
+# fake Azure OpenAI deployment in fake_azure_openai_server.py, so no Azure credentials are needed.
+#
+# Usage: python customer_care_benchmark.py <benchmark> [--iterations N] [--events N]
+#        python customer_care_benchmark.py e2e --output new.json --compare baseline.json
+
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_azure_openai_server import FakeAzureOpenAIServer, FakeChatScript
+
+QUESTION = "Este es el IMSI del cliente: 730029988243961. Su pregunta es: 'puede mi celular usar el eSIM'"
+
+
+def use_fake_endpoint(fake: FakeAzureOpenAIServer) -> None:
+    # The fake deployment is plain http, which AzureChatCompletion only accepts as a base URL
+    os.environ.pop("AZURE_OPENAI_ENDPOINT", None)
+    os.environ["AZURE_OPENAI_BASE_URL"] = f"{fake.endpoint}/openai/deployments/fake-deployment"
+    os.environ["AZURE_OPENAI_DEPLOYMENT"] = "fake-deployment"
+    os.environ["AZURE_OPENAI_KEY"] = "fake-key"
+
+
+def percentile(latencies: list[float], p: float) -> float:
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+
+def report(name: str, latencies: list[float]) -> None:
+    print(f"{name:<28} n={len(latencies):<4} "
+          f"mean={statistics.mean(latencies) * 1000:8.1f} ms  "
+          f"p50={statistics.median(latencies) * 1000:8.1f} ms  "
+          f"p95={percentile(latencies, 0.95) * 1000:8.1f} ms  "
+          f"p99={percentile(latencies, 0.99) * 1000:8.1f} ms")
+
+
+async def _cold_spawn_agent_care(question: str) -> str:
+    """The pre-pool agent_care(): two fresh MCP server subprocesses for every question."""
+    from semantic_kernel import Kernel
+    from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+    from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
+    from semantic_kernel.connectors.mcp import MCPStdioPlugin
+    from semantic_kernel.contents import ChatHistory
+    from semantic_kernel.functions import KernelArguments
+    from customer_care_agent_mgr import CHAT_HISTORY_PROMPT, create_chat_service
+    from customer_care_mcp_pool import CURRENT_DIR, DEFAULT_SERVERS
+
+    kernel = Kernel()
+    kernel.add_service(create_chat_service())
+    settings = AzureChatPromptExecutionSettings()
+    settings.function_choice_behavior = FunctionChoiceBehavior.Auto()
+    internet, kb = DEFAULT_SERVERS
+    async with MCPStdioPlugin(
+        name=internet.name, command=sys.executable, args=[str(CURRENT_DIR / internet.script)]
+    ) as internet_plugin, MCPStdioPlugin(
+        name=kb.name, command=sys.executable, args=[str(CURRENT_DIR / kb.script)]
+    ) as kb_plugin:
+        kernel.add_plugin(internet_plugin, plugin_name=internet.plugin_name)
+        kernel.add_plugin(kb_plugin, plugin_name=kb.plugin_name)
+        history = ChatHistory()
+        history.add_user_message(question)
+        chat_function = kernel.add_function(plugin_name="chat", function_name="respond",
+                                              prompt_template_config=CHAT_HISTORY_PROMPT)
+        chunks = []
+        async for message in kernel.invoke_stream(chat_function, arguments=KernelArguments(chat_history=history, settings=settings)):
+            chunks.append(str(message[0]))
+        return "".join(chunks)
+
+
+async def bench_mcp_pool(args: argparse.Namespace) -> None:
+    """Cold-spawn MCP servers per question vs. the process-lifetime session pool."""
+    iterations = args.iterations
+    from customer_care_agent_mgr import agent_care
+    from customer_care_mcp_pool import get_mcp_pool
+
+    script = FakeChatScript(tool_calls=[("knowledge_base-get_customer_by_imsi", {"imsi": "730029988243961"})])
+    with FakeAzureOpenAIServer(script) as fake:
+        use_fake_endpoint(fake)
+
+        cold = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await _cold_spawn_agent_care(QUESTION)
+            cold.append(time.perf_counter() - start)
+
+        pool = get_mcp_pool()
+        start = time.perf_counter()
+        await pool.start()
+        pool_start = time.perf_counter() - start
+        pooled = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await agent_care(QUESTION)
+            pooled.append(time.perf_counter() - start)
+        await pool.close()
+
+    print(f"pool start (one-off): {pool_start * 1000:.1f} ms")
+    report("cold spawn per question", cold)
+    report("pooled sessions", pooled)
+
+
+def _per_request_setup_before_registry():
+    """Objects the pre-registry process_question()/agent_care() built for every request."""
+    from semantic_kernel import Kernel
+    from customer_care_agent_mgr import ManagerAgent, create_chat_service, get_agents
+
+    service = create_chat_service()
+    agents = {agent.name: agent for agent in get_agents()}
+    manager = ManagerAgent(service=service)
+    kernel = Kernel()
+    kernel.add_service(create_chat_service())
+    return service, agents, manager, kernel
+
+
+def _per_request_setup_with_registry():
+    from semantic_kernel.contents import ChatHistory
+    from customer_care_agent_mgr import get_registry
+
+    registry = get_registry()
+    history = ChatHistory()
+    history.add_system_message(registry.agent_care_instructions)
+    return registry, history
+
+
+def _allocated_bytes(setup) -> int:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = setup()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del keep
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+async def bench_registry(args: argparse.Namespace) -> None:
+    """Worker startup time and per-request allocations with the long-lived AgentRegistry."""
+    iterations = args.iterations
+    from customer_care_agent_mgr import get_registry, process_question
+    from customer_care_mcp_pool import get_mcp_pool
+
+    with FakeAzureOpenAIServer() as fake:
+        use_fake_endpoint(fake)
+
+        start = time.perf_counter()
+        registry = get_registry()
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        await registry.ensure_started()
+        mcp_start = time.perf_counter() - start
+        print(f"registry build: {build * 1000:.1f} ms, MCP servers: {mcp_start * 1000:.1f} ms")
+
+        before = [_allocated_bytes(_per_request_setup_before_registry) for _ in range(iterations)]
+        after = [_allocated_bytes(_per_request_setup_with_registry) for _ in range(iterations)]
+        print(f"per-request setup allocations: before={statistics.mean(before) / 1024:.1f} KiB  "
+              f"registry={statistics.mean(after) / 1024:.1f} KiB")
+
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await process_question("puede mi celular usar el eSIM", "730029988243961")
+            latencies.append(time.perf_counter() - start)
+        report("process_question (warm)", latencies)
+        await get_mcp_pool().close()
+
+
+ROUTER_SAMPLE_QUESTIONS = (
+    "puede mi celular usar el eSIM",
+    "¿Mi iPhone 13 Pro Max es compatible con eSIM?",
+    "tengo problemas de señal y llamadas caídas",
+    "¿Cuánto cuesta el plan de 50 gigas?",
+    "¿Qué promociones y descuentos tienen en planes postpago?",
+    "Analiza la llamada y dime el sentimiento del cliente",
+    "precio de un iPhone con eSIM",
+    "Hola, necesito ayuda",
+)
+
+
+async def bench_router(args: argparse.Namespace) -> None:
+    """Routing latency and fast-path hit rate of the local intent router."""
+    from customer_care_router import IntentRouter
+
+    router = IntentRouter()
+    latencies = []
+    for _ in range(args.iterations):
+        for question in ROUTER_SAMPLE_QUESTIONS:
+            latencies.append(router.route(question).latency)
+    report("intent router", latencies)
+    print(router.metrics.snapshot())
+
+
+def synthetic_signal_events(count: int, subscribers: int = 10_000, seed: int = 7):
+    """Yield detailSignalPlane entries shaped like customers.txt, spread over one day."""
+    rng = random.Random(seed)
+    models = [("APPLE", "IPHONE 13 PRO MAX(A2484)", "iOS"), ("APPLE", "IPHONE 15(A3090)", "iOS"),
+              ("SAMSUNG", "GALAXY S23 ULTRA(SM-S918B)", "Android"), ("MOTOROLA", "MOTO G84", "Android")]
+    transactions = ["UE Triggered Service Request(4G)", "Attach(4G)", "Tracking Area Update(4G)",
+                    "PDU Session Establishment(5G)", "Handover(4G)"]
+    causes = ["--", "Network failure", "UE not responding", "Congestion"]
+    cells = [f"ASRRFL{i:02d}_{j}" for i in range(200) for j in range(1, 4)]
+    for i in range(count):
+        subscriber = rng.randrange(subscribers)
+        brand, model, os_name = models[subscriber % len(models)]
+        failed = rng.random() < 0.08
+        seconds = rng.randrange(86400)
+        timestamp = f"2025-06-06T{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        yield {
+            "timePeriod": {"startDateTime": timestamp, "endDateTime": timestamp},
+            "imsi": 730020000000000 + subscriber,
+            "imei": 353510600000000 + subscriber,
+            "brand": brand, "model": model, "os": os_name, "softwareVersion": 32,
+            "roaming": {"status": "No Roaming", "direction": "Local", "country": "--", "operator": "--"},
+            "peerNumber": "", "callDuration": "", "SMCAddress": "", "apn": "WAP.TMOVIL.CL",
+            "accessType": "5G" if "5G" in transactions[i % 5] else "4G",
+            "transaction": transactions[i % 5],
+            "status": "Failure" if failed else "Success",
+            "causeDescription": rng.choice(causes[1:]) if failed else "--",
+            "cellname": rng.choice(cells), "cell": 7.3002015e+128, "MCC": 730, "MNC": "02",
+            "LAC": "0523", "CI": "015E121", "failsceneid": "1003,0,0,255,999", "SAI": "730-02-5601-33",
+        }
+
+
+def max_rss_mib() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def bench_kb_store(args: argparse.Namespace) -> None:
+    """Load and query the indexed signal event store on synthetic data."""
+    from customer_care_signal_store import SignalEventStore
+
+    rss_before = max_rss_mib()
+    start = time.perf_counter()
+    store = SignalEventStore()
+    for entry in synthetic_signal_events(args.events):
+        store.add(entry)
+    store.finalize()
+    load = time.perf_counter() - start
+    print(f"loaded {len(store)} events for {len(store.imsis())} IMSIs in {load:.2f} s "
+          f"(peak RSS +{max_rss_mib() - rss_before:.0f} MiB)")
+
+    rng = random.Random(1)
+    imsis = store.imsis()
+    queries = {
+        "imsi, full history": lambda: store.page(store.events_for_imsi(rng.choice(imsis))),
+        "imsi, 2h window": lambda: store.page(store.events_for_imsi(rng.choice(imsis), "2025-06-06T10:00", "2025-06-06T12:00")),
+        "cellname, 1h window": lambda: store.page(store.find("cellname", "ASRRFL17_2", "2025-06-06T08:00", "2025-06-06T09:00")),
+        "status=Failure, page 10": lambda: store.page(store.find("status", "Failure"), offset=500, limit=50),
+    }
+    for name, query in queries.items():
+        latencies = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            query()
+            latencies.append(time.perf_counter() - start)
+        report(name, latencies)
+
+
+def write_synthetic_export(path: str, count: int) -> None:
+    """Write a signalQualityIssuesDetail export with `count` synthetic events (gzip if path ends in .gz)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write('{"estado": {"codigoEstado": "200", "glosaEstado": "OK"}, "datos": {"signalQualityIssuesDetail": {"detailSignalPlane": [\n')
+        for i, entry in enumerate(synthetic_signal_events(count)):
+            if i:
+                f.write(",\n")
+            json.dump(entry, f)
+        f.write("\n]}}}")
+
+
+def _parse_export(mode: str, path: str, results) -> None:
+    """Child process: parse an export and report (seconds, events, peak RSS)."""
+    from customer_care_signal_ingest import iter_signal_events, open_export
+
+    start = time.perf_counter()
+    if mode == "json.load":
+        with open_export(path) as f:
+            events = len(json.load(f)["datos"]["signalQualityIssuesDetail"]["detailSignalPlane"])
+    else:
+        events = sum(1 for _ in iter_signal_events(path))
+    results.put((time.perf_counter() - start, events, max_rss_mib()))
+
+
+async def bench_kb_ingest(args: argparse.Namespace) -> None:
+    """Peak memory and parse time of json.load vs. the streaming reader at growing export sizes."""
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (args.events // 10, args.events):
+            for suffix in (".json", ".json.gz"):
+                path = os.path.join(tmp, f"export_{count}{suffix}")
+                write_synthetic_export(path, count)
+                size = os.path.getsize(path) / 1e6
+                for mode in ("json.load", "streaming"):
+                    results = context.Queue()
+                    worker = context.Process(target=_parse_export, args=(mode, path, results))
+                    worker.start()
+                    seconds, events, rss = results.get()
+                    worker.join()
+                    print(f"{mode:<10} {suffix:<8} {size:8.1f} MB  events={events:<9} "
+                          f"time={seconds:6.2f} s  peak RSS={rss:7.0f} MiB")
+
+
+def _append_delta(path: str, events: list[dict]) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(event) + "\n" for event in events)
+
+
+async def bench_kb_reload(args: argparse.Namespace) -> None:
+    """Hot reload of the knowledge base data under concurrent reads: reader threads query a few IMSIs
+    while --iterations JSONL deltas and then a full export reload are applied. Every read must see
+    exactly the events of the version it got (no partial update); exits with status 1 otherwise."""
+    from customer_care_signal_reload import SignalDataReloader
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export = os.path.join(tmp, "customers.json")
+        delta = os.path.join(tmp, "customers.delta.jsonl")
+        write_synthetic_export(export, args.events // 10)
+        reloader = SignalDataReloader(export, delta)
+        store = reloader.store
+        probes = store.imsis()[:20]
+        counts = {imsi: len(store.events_for_imsi(imsi)) for imsi in probes}
+        latest = {imsi: store.latest_event(imsi)["timePeriod"]["startDateTime"] for imsi in probes}
+        expected = {reloader.current.version: (dict(counts), dict(latest))}
+
+        stop = threading.Event()
+        reading = []   # (seconds, during a refresh)
+        errors = []
+        refreshing = threading.Event()
+
+        def reader(seed: int) -> None:
+            rng = random.Random(seed)
+            while not stop.is_set():
+                busy = refreshing.is_set()
+                start = time.perf_counter()
+                snapshot = reloader.current
+                imsi = rng.choice(probes)
+                n = len(snapshot.store.events_for_imsi(imsi))
+                last = snapshot.store.latest_event(imsi)["timePeriod"]["startDateTime"]
+                reading.append((time.perf_counter() - start, busy))
+                want_n, want_last = expected[snapshot.version][0][imsi], expected[snapshot.version][1][imsi]
+                if (n, last) != (want_n, want_last):
+                    errors.append(f"version {snapshot.version} {imsi}: {n} events, latest {last}; "
+                                  f"expected {want_n}, {want_last}")
+
+        readers = [threading.Thread(target=reader, args=(i,)) for i in range(4)]
+        for thread in readers:
+            thread.start()
+        time.sleep(0.5)
+
+        refreshes = {"delta": [], "full": []}
+        rounds = min(args.iterations, 24)
+        for r in range(rounds):
+            events = []
+            for i, event in enumerate(synthetic_signal_events(1000, seed=100 + r)):
+                imsi = probes[i % len(probes)]
+                timestamp = f"2025-06-07T{r:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+                event.update(imsi=int(imsi), timePeriod={"startDateTime": timestamp, "endDateTime": timestamp})
+                events.append(event)
+                counts[imsi] += 1
+                latest[imsi] = max(latest[imsi], timestamp)
+            expected[reloader.current.version + 1] = (dict(counts), dict(latest))
+            _append_delta(delta, events)
+            refreshing.set()
+            reloader.refresh()
+            refreshing.clear()
+            refreshes[reloader.current.refresh["kind"]].append(reloader.current.refresh["duration_ms"] / 1000)
+            time.sleep(0.05)
+
+        # A new export: same events, so the expected data is unchanged, but everything is reloaded
+        expected[reloader.current.version + 1] = (dict(counts), dict(latest))
+        os.utime(export, ns=(time.time_ns(), time.time_ns()))
+        refreshing.set()
+        reloader.refresh()
+        refreshing.clear()
+        refreshes[reloader.current.refresh["kind"]].append(reloader.current.refresh["duration_ms"] / 1000)
+        time.sleep(0.2)
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+    print(f"{len(reloader.store)} events, data version {reloader.current.version}")
+    for kind, durations in refreshes.items():
+        if durations:
+            report(f"{kind} refresh", durations)
+    for label, busy in (("read, idle", False), ("read, during refresh", True)):
+        latencies = [seconds for seconds, during in reading if during == busy]
+        if latencies:
+            report(label, latencies)
+    print(f"{len(reading)} reads, {len(errors)} inconsistent")
+    if errors:
+        print("\n".join(errors[:10]))
+        raise SystemExit(1)
+
+
+def _traced_mib(build) -> tuple[float, object]:
+    """Memory still allocated by build() once it returns (its result is kept alive)."""
+    import gc
+
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / (1024 * 1024), result
+
+
+def _load_event_dicts(path: str) -> dict[str, list[dict]]:
+    """Every event kept as the parsed dict, grouped by IMSI (the CUSTOMERS_DICT layout, without overwrites)."""
+    from customer_care_signal_ingest import iter_signal_events
+
+    customers: dict[str, list[dict]] = {}
+    for entry in iter_signal_events(path):
+        customers.setdefault(str(entry["imsi"]), []).append(entry)
+    return customers
+
+
+async def bench_kb_memory(args: argparse.Namespace) -> None:
+    """Memory of per-event dicts vs. the columnar SignalEventStore, and filter speed."""
+    from customer_care_signal_store import load_signal_store, np
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.json")
+        write_synthetic_export(path, args.events)
+        dict_mib, customers = _traced_mib(lambda: _load_event_dicts(path))
+        del customers
+        store_mib, store = _traced_mib(lambda: load_signal_store(path))
+    print(f"{args.events} events: dicts={dict_mib:.1f} MiB  columnar={store_mib:.1f} MiB  "
+          f"({dict_mib / store_mib:.1f}x smaller)")
+
+    row_ids = store.find("accessType", "4G")
+    latencies = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        store.filter(row_ids, "status", "Failure")
+        latencies.append(time.perf_counter() - start)
+    report(f"filter status ({'numpy' if np else 'python'})", latencies)
+
+
+# The stream only helps if the first chunk comes well before the end: over this share of the
+# time to the last chunk, chunks are being buffered somewhere on the way
+STREAM_FIRST_CHUNK_SHARE = 0.5
+
+
+async def bench_stream(args: argparse.Namespace) -> None:
+    """Time to first chunk of process_question_stream() vs. waiting for the whole answer. Exits with
+    status 1 when the median first chunk takes over STREAM_FIRST_CHUNK_SHARE of the median full
+    stream, or when the streamed chunks don't add up to the blocking answer."""
+    from customer_care_agent_mgr import get_registry, process_question, process_question_stream
+    from customer_care_mcp_pool import get_mcp_pool
+
+    sentence = "Sí, su iPhone 13 Pro Max es compatible con eSIM. "
+    script = FakeChatScript(answer="<p>" + sentence * 20 + "</p>",
+                            structured_answer=json.dumps({"title": "Compatibilidad eSIM", "paragraphs": [sentence] * 20}),
+                            first_token_latency=0.2, chunk_latency=0.01)
+    with FakeAzureOpenAIServer(script) as fake:
+        use_fake_endpoint(fake)
+        registry = get_registry()
+        registry.response_cache.max_entries = 0
+        await registry.ensure_started()
+        first_chunk, full_stream, blocking = [], [], []
+        mismatches = 0
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            chunks = []
+            async for chunk in process_question_stream("puede mi celular usar el eSIM", "730029988243961"):
+                if len(first_chunk) < len(full_stream) + 1:
+                    first_chunk.append(time.perf_counter() - start)
+                chunks.append(chunk)
+            full_stream.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            answer = await process_question("puede mi celular usar el eSIM", "730029988243961")
+            blocking.append(time.perf_counter() - start)
+            mismatches += "".join(chunks) != answer
+        await get_mcp_pool().close()
+    report("stream: first chunk", first_chunk)
+    report("stream: last chunk", full_stream)
+    report("blocking answer", blocking)
+    share = statistics.median(first_chunk) / statistics.median(full_stream)
+    print(f"first chunk at {share:.0%} of the stream (limit {STREAM_FIRST_CHUNK_SHARE:.0%}), "
+          f"{mismatches} streamed answer(s) different from the blocking one")
+    if share > STREAM_FIRST_CHUNK_SHARE or mismatches:
+        raise SystemExit(1)
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class _SlowFixtureHandler(SimpleHTTPRequestHandler):
+    """Serves fixtures/ after a fixed delay, like a distant vendor site."""
+    delay = 0.1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=FIXTURES_DIR, **kwargs)
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FixtureServer(ThreadingHTTPServer):
+    # The default listen backlog (5) drops concurrent connects and adds 1 s SYN retries
+    request_queue_size = 64
+
+
+def _fetch_sequential_baseline(urls: list[str]) -> list[list[str]]:
+    # Previous extract_dataFrom_URL: one blocking requests.get per page, html.parser extraction
+    import requests
+    from bs4 import BeautifulSoup
+
+    pages = []
+    for url in urls:
+        text = BeautifulSoup(requests.get(url).text, "html.parser").get_text(separator="\n")
+        pages.append([line.strip() for line in text.split("\n") if line.strip()])
+    return pages
+
+
+async def bench_fetch(args: argparse.Namespace) -> None:
+    """Fetch + extract the saved eSIM pages from a slow local HTTP stub: sequential requests/html.parser
+    vs. the pooled async WebFetcher with the fastest available extraction backend."""
+    from web_page_fetcher import BS4_PARSER, HTMLParser, WebFetcher, extract_text_lines
+
+    server = _FixtureServer(("127.0.0.1", 0), _SlowFixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    # Both pages several times over, as when the LLM asks for a handful of URLs in one turn
+    urls = [f"{base}/esim_{brand}.html?copy={i}" for i in range(4) for brand in ("apple", "samsung")]
+    fetcher = WebFetcher()
+    try:
+        baseline, pooled = [], []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            await asyncio.to_thread(_fetch_sequential_baseline, urls)
+            baseline.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            results = await fetcher.fetch_many(urls)
+            [extract_text_lines(result.text) for result in results]
+            pooled.append(time.perf_counter() - start)
+    finally:
+        await fetcher.aclose()
+        server.shutdown()
+
+    from bs4 import BeautifulSoup
+
+    with open(os.path.join(FIXTURES_DIR, "esim_apple.html"), "r", encoding="utf-8") as f:
+        html = f.read()
+    html_parser, fast = [], []
+    for _ in range(args.iterations * 10):
+        start = time.perf_counter()
+        BeautifulSoup(html, "html.parser").get_text(separator="\n")
+        html_parser.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        extract_text_lines(html, "main")
+        fast.append(time.perf_counter() - start)
+
+    backend = "selectolax" if HTMLParser is not None else f"bs4/{BS4_PARSER}"
+    report(f"sequential {len(urls)} pages", baseline)
+    report(f"pooled async {len(urls)} pages", pooled)
+    report("extract html.parser", html_parser)
+    report(f"extract {backend} (main)", fast)
+
+
+async def _tool_call_turn(kernel_class, max_concurrency: int, calls: list[tuple[str, dict]]) -> tuple[float, list[str]]:
+    """One agent turn whose first model reply requests every call at once; returns the wall time
+    and the order of the tool results in the follow-up request."""
+    from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+    from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
+    from semantic_kernel.contents import ChatHistory
+    from semantic_kernel.functions import KernelArguments
+    from customer_care_agent_mgr import CHAT_HISTORY_PROMPT, create_chat_service
+    from customer_care_mcp_pool import PooledMCPStdioPlugin
+
+    with FakeAzureOpenAIServer(FakeChatScript(tool_calls=calls, first_token_latency=0.0)) as fake:
+        use_fake_endpoint(fake)
+        kernel = kernel_class()
+        kernel.add_service(create_chat_service())
+        settings = AzureChatPromptExecutionSettings()
+        settings.function_choice_behavior = FunctionChoiceBehavior.Auto()
+        plugins = [
+            PooledMCPStdioPlugin(name=name, command=sys.executable, max_concurrency=max_concurrency,
+                                 args=[os.path.join(FIXTURES_DIR, "delayed_mcp_server.py")])
+            for name in ("internet_stub", "kb_stub")
+        ]
+        for plugin in plugins:
+            await plugin.connect()
+            kernel.add_plugin(plugin, plugin_name=plugin.name)
+        try:
+            chat_function = kernel.add_function(plugin_name="chat", function_name="respond",
+                                              prompt_template_config=CHAT_HISTORY_PROMPT)
+            history = ChatHistory()
+            history.add_user_message(QUESTION)
+            start = time.perf_counter()
+            await kernel.invoke(chat_function, arguments=KernelArguments(chat_history=history, settings=settings))
+            elapsed = time.perf_counter() - start
+        finally:
+            for plugin in plugins:
+                await plugin.close()
+        order = [re.search(r'"key": "(\w+)"', m["content"]).group(1)
+             for m in fake.last_messages if m.get("role") == "tool"]
+    return elapsed, order
+
+
+# Concurrent tool calls may take the slowest call plus this share of the other calls' time
+# (model round trips, MCP framing); anything near the sum means they ran one after another
+TOOL_CALL_OVERLAP_SLACK = 0.25
+
+
+async def bench_tool_calls(args: argparse.Namespace) -> None:
+    """Three tool calls requested in one turn against delayed stub MCP servers: wall time should be
+    close to the slowest call, not the sum, and results must come back in request order. Exits with
+    status 1 when the ordered concurrent kernel misses either."""
+    calls = [
+        ("internet_stub-lookup", {"key": "apple_page", "delay": 0.6}),
+        ("internet_stub-lookup", {"key": "samsung_page", "delay": 0.4}),
+        ("kb_stub-lookup", {"key": "customer", "delay": 0.2}),
+    ]
+    delays = [call[1]["delay"] for call in calls]
+    print(f"slowest call {max(delays) * 1000:.0f} ms, sum of calls {sum(delays) * 1000:.0f} ms")
+    from semantic_kernel import Kernel
+    from customer_care_tool_calls import OrderedToolCallKernel
+
+    requested = [call[1]["key"] for call in calls]
+    limit = max(delays) + TOOL_CALL_OVERLAP_SLACK * (sum(delays) - max(delays))
+    failures = []
+    for name, kernel_class, max_concurrency in (
+        ("1 call/server", OrderedToolCallKernel, 1),
+        ("4 calls/server, Kernel", Kernel, 4),
+        ("4 calls/server, ordered", OrderedToolCallKernel, 4),
+    ):
+        latencies, orders = [], []
+        for _ in range(args.iterations):
+            elapsed, order = await _tool_call_turn(kernel_class, max_concurrency, calls)
+            latencies.append(elapsed)
+            orders.append(order)
+        report(name, latencies)
+        print(f"{'':<28} result order: {', '.join(order)}")
+        if kernel_class is OrderedToolCallKernel:
+            failures += [f"{name}: results in order {', '.join(o)}" for o in orders if o != requested]
+        if kernel_class is OrderedToolCallKernel and max_concurrency > 1 and statistics.median(latencies) > limit:
+            failures.append(f"{name}: median {statistics.median(latencies) * 1000:.0f} ms, limit {limit * 1000:.0f} ms")
+    if failures:
+        print("\n".join(failures))
+        raise SystemExit(1)
+
+
+async def bench_prefetch(args: argparse.Namespace) -> None:
+    """AgentCare questions with and without the speculative customer lookup: latency and model
+    round trips per question (the fake model skips get_customer_by_imsi when the record is known)."""
+    from customer_care_agent_mgr import get_registry, process_question
+    from customer_care_mcp_pool import get_mcp_pool
+    from customer_care_prefetch import DEFAULT_PREFETCH_AGENTS
+
+    lookup = "knowledge_base-get_customer_by_imsi"
+    script = FakeChatScript(tool_calls=[(lookup, {"imsi": "730029988243961"})],
+                            skip_tool_calls_if_known={lookup: "Datos del cliente con IMSI"})
+    with FakeAzureOpenAIServer(script) as fake:
+        use_fake_endpoint(fake)
+        registry = get_registry()
+        registry.response_cache.max_entries = 0
+        await registry.ensure_started()
+        for name, agents in (("without prefetch", ()), ("with prefetch", DEFAULT_PREFETCH_AGENTS)):
+            registry.prefetch.agents = frozenset(agents)
+            latencies = []
+            requests_before = fake.requests
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                await process_question("puede mi celular usar el eSIM", "730029988243961")
+                latencies.append(time.perf_counter() - start)
+            report(name, latencies)
+            print(f"{'':<28} model calls/question: {(fake.requests - requests_before) / args.iterations:.1f}")
+        await get_mcp_pool().close()
+    print(f"prefetch metrics: {registry.prefetch.metrics.snapshot()}")
+
+
+def _print_span_tree(spans, parent_id=None, depth=0) -> None:
+    for span in sorted((s for s in spans if s.parent_id == parent_id), key=lambda s: s.start_ns):
+        attributes = ", ".join(f"{k}={v}" for k, v in span.attributes.items())
+        print(f"{'  ' * depth}{span.name:<{36 - 2 * depth}} {span.duration_ms:9.1f} ms  {attributes}")
+        _print_span_tree(spans, span.span_id, depth + 1)
+
+
+async def bench_tracing(args: argparse.Namespace) -> None:
+    """Cost of a span with tracing disabled and enabled, then the span tree of one traced question."""
+    from customer_care_tracing import InMemoryExporter, Tracer, get_tracer
+
+    count = args.iterations * 100_000
+    start = time.perf_counter()
+    for _ in range(count):
+        pass
+    print(f"{'empty loop':<27} {(time.perf_counter() - start) / count * 1e9:8.0f} ns/iteration")
+    for name, tracer in (("disabled", Tracer()), ("in-memory exporter", Tracer([InMemoryExporter()]))):
+        start = time.perf_counter()
+        for _ in range(count):
+            with tracer.span("stage", agent="AgentCare") as span:
+                span.add("chunks")
+        print(f"span {name:<22} {(time.perf_counter() - start) / count * 1e9:8.0f} ns/span")
+
+    from customer_care_agent_mgr import get_registry, process_question
+    from customer_care_mcp_pool import get_mcp_pool
+
+    collector = InMemoryExporter()
+    get_tracer().exporters = [collector]
+    script = FakeChatScript(tool_calls=[("internet_extract-check_esim_compatibility",
+                                         {"brand": "apple", "model": "IPHONE 13 PRO MAX(A2484)"})])
+    with FakeAzureOpenAIServer(script) as fake:
+        use_fake_endpoint(fake)
+        registry = get_registry()
+        registry.response_cache.max_entries = 0
+        await process_question("puede mi celular usar el eSIM", "730029988243961")
+        await get_mcp_pool().close()
+    get_tracer().exporters = []
+    print()
+    _print_span_tree(collector.spans)
+
+
+E2E_QUESTIONS = (
+    "puede mi celular usar el eSIM",
+    "que planes tienen disponibles y cuanto cuestan",
+    "mi celular es compatible con esim?",
+)
+
+
+def e2e_script(args: argparse.Namespace) -> FakeChatScript:
+    """The fake model checks eSIM compatibility and looks the customer up unless it's already known."""
+    lookup = "knowledge_base-get_customer_by_imsi"
+    return FakeChatScript(
+        tool_calls=[
+            ("internet_extract-check_esim_compatibility", {"brand": "apple", "model": "IPHONE 13 PRO MAX(A2484)"}),
+            (lookup, {"imsi": "730029988243961"}),
+        ],
+        skip_tool_calls_if_known={lookup: "Datos del cliente con IMSI"},
+        first_token_latency=args.llm_latency,
+    )
+
+
+def _cold_start_child(question: str, imsi: str, results) -> None:
+    """Child process: import the agent module and answer one question, as a fresh worker would."""
+    start = time.perf_counter()
+    import customer_care_agent_mgr
+    imported = time.perf_counter() - start
+    asyncio.run(customer_care_agent_mgr.process_question(question, imsi))
+    results.put({"import_s": imported, "first_answer_s": time.perf_counter() - start, "max_rss_mib": max_rss_mib()})
+
+
+def process_rss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmRSS:")) / 1024
+
+
+def mcp_servers_rss_mib() -> float | None:
+    """Resident memory of this process's children (the MCP servers); None where /proc isn't available."""
+    total = 0.0
+    try:
+        for task in os.listdir(f"/proc/{os.getpid()}/task"):
+            with open(f"/proc/{os.getpid()}/task/{task}/children") as f:
+                total += sum(process_rss_mib(int(pid)) for pid in f.read().split())
+    except OSError:
+        return None
+    return total
+
+
+def _signal_imsis() -> list[str]:
+    from customer_care_signal_ingest import iter_signal_events
+    from customer_care_mcp_pool import CURRENT_DIR
+
+    path = os.getenv("CUSTOMERS_FILE", str(CURRENT_DIR / "customers.txt"))
+    return sorted({str(event["imsi"]) for event in iter_signal_events(path) if "imsi" in event})
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _latency_summary(latencies: list[float]) -> dict:
+    return {
+        "n": len(latencies),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def compare_results(baseline: dict, current: dict, prefix: str = "") -> None:
+    """Print every numeric metric of two e2e result files side by side."""
+    for key, value in current.items():
+        old = baseline.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            compare_results(old, value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and not isinstance(value, bool):
+            change = f"{(value - old) / old * 100:+7.1f}%" if old else "    n/a"
+            print(f"{prefix + key:<36} {old:>12.2f} {value:>12.2f} {change}")
+
+
+def _serve_stub_esim_pages(args: argparse.Namespace) -> tuple[ThreadingHTTPServer, tempfile.TemporaryDirectory]:
+    """Serve the fixtures/ eSIM pages with --page-latency and point the internet server (and its index cache) at them."""
+    handler = type("StubPageHandler", (_SlowFixtureHandler,), {"delay": args.page_latency})
+    pages = _FixtureServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=pages.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{pages.server_address[1]}"
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["ESIM_SOURCE_APPLE"] = f"{base}/esim_apple.html"
+    os.environ["ESIM_SOURCE_SAMSUNG"] = f"{base}/esim_samsung.html"
+    os.environ["ESIM_INDEX_CACHE"] = os.path.join(tmp.name, "esim_index_cache.json")
+    return pages, tmp
+
+
+async def bench_e2e(args: argparse.Namespace) -> None:
+    """End-to-end process_question() (and customer_care_func when Azure Functions is installed) with the
+    fake model, stub eSIM pages, the real MCP servers and customers.txt: cold start, warm latency
+    percentiles, throughput under concurrency and memory. --output saves the results, --compare diffs them."""
+    from customer_care_mcp_pool import get_mcp_pool
+
+    pages, tmp = _serve_stub_esim_pages(args)
+    if not args.cache:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+
+    imsis = _signal_imsis()
+    questions = [(E2E_QUESTIONS[i % len(E2E_QUESTIONS)], imsis[i % len(imsis)]) for i in range(len(E2E_QUESTIONS) * len(imsis))]
+    results = {"commit": _git_commit(), "concurrency": args.concurrency, "llm_latency_s": args.llm_latency}
+
+    with FakeAzureOpenAIServer(e2e_script(args)) as fake:
+        use_fake_endpoint(fake)
+
+        # Cold start: a new process imports everything, spawns the MCP servers and answers once
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        start = time.perf_counter()
+        worker = context.Process(target=_cold_start_child, args=(*questions[0], queue))
+        worker.start()
+        cold = queue.get()
+        worker.join()
+        cold["process_s"] = time.perf_counter() - start
+        results["cold_start"] = {key: round(value, 3) for key, value in cold.items()}
+        os.remove(os.environ["ESIM_INDEX_CACHE"])
+
+        from customer_care_agent_mgr import get_registry, process_question
+
+        await process_question(*questions[0])
+        warm = []
+        for i in range(args.iterations):
+            start = time.perf_counter()
+            await process_question(*questions[i % len(questions)])
+            warm.append(time.perf_counter() - start)
+        results["warm"] = _latency_summary(warm)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        loaded = []
+
+        async def timed(question: str, imsi: str) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                await process_question(question, imsi)
+                loaded.append(time.perf_counter() - start)
+
+        total = args.iterations * args.concurrency
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(*questions[i % len(questions)]) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        results["throughput"] = {"questions": total, "questions_per_s": round(total / elapsed, 2),
+                                 **_latency_summary(loaded)}
+
+        try:
+            import function_app
+            from azurefunctions.extensions.http.fastapi import Request
+        except ImportError:
+            print("azure-functions or azurefunctions-extensions-http-fastapi not installed: skipping customer_care_func")
+        else:
+            http_handler = function_app.customer_care_func._function.get_user_function()
+            http = []
+            for i in range(args.iterations):
+                question, imsi = questions[i % len(questions)]
+                request = Request({"type": "http", "method": "GET", "path": f"/api/customer-care/{imsi}/{question}",
+                                   "query_string": b"", "headers": [], "path_params": {"imsi": imsi, "pregunta": question}})
+                start = time.perf_counter()
+                await http_handler(request)
+                http.append(time.perf_counter() - start)
+            results["customer_care_func"] = _latency_summary(http)
+
+        results["memory"] = {"max_rss_mib": round(max_rss_mib(), 1)}
+        servers_rss = mcp_servers_rss_mib()
+        if servers_rss is not None:
+            results["memory"]["mcp_servers_rss_mib"] = round(servers_rss, 1)
+        # cold start + warm-up + warm + throughput (+ customer_care_func) questions
+        answered = 2 + args.iterations + total + (args.iterations if "customer_care_func" in results else 0)
+        results["model_calls_per_question"] = round(fake.requests / answered, 2)
+        results["prefetch"] = get_registry().prefetch.metrics.snapshot()
+        await get_mcp_pool().close()
+    pages.shutdown()
+    tmp.cleanup()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n{'metric':<36} {baseline.get('commit') or 'baseline':>12} {results.get('commit') or 'current':>12}  change")
+        compare_results(baseline, results)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"MCP server exited with code {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"MCP server did not listen on port {port} within {timeout:.0f} s")
+
+
+async def bench_mcp_shared(args: argparse.Namespace) -> None:
+    """--workers pools (one per simulated Functions worker) each sending iterations x concurrency
+    knowledge base calls at once: a stdio server per worker vs. one shared SSE / streamable-HTTP server."""
+    from customer_care_mcp_pool import DEFAULT_SERVERS, MCPSessionPool
+
+    spec = next(spec for spec in DEFAULT_SERVERS if spec.plugin_name == "knowledge_base")
+    imsis = _signal_imsis()
+    calls = [("get_customer_by_imsi", {"imsi": imsi}) for imsi in imsis]
+    calls += [("get_signal_quality_summary", {"imsi": imsi}) for imsi in imsis]
+
+    async def worker(pool: MCPSessionPool, latencies: list[float]) -> None:
+        plugin = (await pool.start())[spec.plugin_name]
+
+        async def one(i: int) -> None:
+            tool, arguments = calls[i % len(calls)]
+            start = time.perf_counter()
+            await plugin.call_tool(tool, **arguments)
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(args.iterations * args.concurrency)))
+
+    async def run(label: str, server_rss) -> None:
+        pools = [MCPSessionPool(servers=(spec,)) for _ in range(args.workers)]
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.start() for pool in pools))
+        connect = time.perf_counter() - start
+        latencies: list[float] = []
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(pool, latencies) for pool in pools))
+        elapsed = time.perf_counter() - start
+        rss = server_rss()
+        for pool in pools:
+            await pool.close()
+        report(label, latencies)
+        print(f"{'':<28} connect={connect * 1000:8.1f} ms  {len(latencies) / elapsed:8.1f} calls/s  "
+              f"server RSS={rss:7.1f} MiB" if rss is not None else "")
+
+    os.environ.pop(spec.url_env, None)
+    await run(f"stdio x{args.workers}", mcp_servers_rss_mib)
+
+    for transport, path in (("sse", "/sse"), ("streamable-http", "/mcp")):
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), spec.script),
+             "--transport", transport, "--port", str(port)],
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_for_port(port, server)
+            os.environ[spec.url_env] = f"http://127.0.0.1:{port}{path}"
+            await run(f"shared {transport}", lambda: process_rss_mib(server.pid))
+        finally:
+            os.environ.pop(spec.url_env, None)
+            server.terminate()
+            server.wait()
+
+
+# The same answer as the model used to write it (styled HTML) and as structured JSON
+LEGACY_HTML_ANSWER = (
+    '<div style="background-color: black; color: white; font-family: Arial, sans-serif; padding: 20px;">'
+    '<h1 style="color: gold; font-size: 24px; margin-bottom: 10px;">Compatibilidad con eSIM</h1>'
+    '<p style="color: white; font-size: 16px;"><strong style="color: gold;">Sí</strong>, su dispositivo '
+    '<strong>iPhone 13 Pro Max (A2484)</strong> es compatible con eSIM.</p>'
+    '<p style="color: white; font-size: 16px;">Verifiqué el modelo exacto de su equipo en la lista oficial '
+    'de dispositivos Apple compatibles con eSIM.</p>'
+    '<h2 style="color: gold; font-size: 18px; margin-top: 20px;">Fuente de la información</h2>'
+    '<ul style="color: white; font-size: 16px; padding-left: 20px;">'
+    '<li style="margin-bottom: 5px;">Herramienta check_esim_compatibility</li>'
+    '<li style="margin-bottom: 5px;">https://esimblow.com/es/dispositivos/dispositivos-apple-esim/</li>'
+    '</ul></div>'
+)
+STRUCTURED_ANSWER = json.dumps({
+    "title": "Compatibilidad con eSIM",
+    "verdict": "Sí",
+    "paragraphs": [
+        "Su dispositivo iPhone 13 Pro Max (A2484) es compatible con eSIM.",
+        "Verifiqué el modelo exacto de su equipo en la lista oficial de dispositivos Apple compatibles con eSIM.",
+    ],
+    "sources": ["Herramienta check_esim_compatibility",
+                "https://esimblow.com/es/dispositivos/dispositivos-apple-esim/"],
+}, ensure_ascii=False, separators=(",", ":"))
+
+
+async def bench_answer_format(args: argparse.Namespace) -> None:
+    """Output tokens and latency of model-made HTML (STRUCTURED_ANSWERS=0) vs. JSON rendered locally.
+    The fake model streams ~4 characters per token every 10 ms, so generation time follows length."""
+    import customer_care_agent_mgr
+    from customer_care_answer import AnswerRenderer
+    from customer_care_mcp_pool import get_mcp_pool
+
+    script = FakeChatScript(answer=LEGACY_HTML_ANSWER, structured_answer=STRUCTURED_ANSWER,
+                            first_token_latency=args.llm_latency, chunk_size=4, chunk_latency=0.01)
+    renderer = AnswerRenderer()
+    start = time.perf_counter()
+    for _ in range(1000):
+        renderer = AnswerRenderer()
+        renderer.feed(STRUCTURED_ANSWER)
+        renderer.close()
+    render_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    with FakeAzureOpenAIServer(script) as fake:
+        use_fake_endpoint(fake)
+        for label, structured in (("model HTML", "0"), ("JSON + local render", "1")):
+            os.environ["STRUCTURED_ANSWERS"] = structured
+            customer_care_agent_mgr._REGISTRY = None
+            await customer_care_agent_mgr.get_registry().ensure_started()
+            tokens_before = fake.completion_tokens
+            latencies, first_chunk = [], []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                first = None
+                async for chunk in customer_care_agent_mgr.process_question_stream("puede mi celular usar el eSIM",
+                                                                                   "730029988243961"):
+                    if chunk and first is None:
+                        first = time.perf_counter() - start
+                latencies.append(time.perf_counter() - start)
+                first_chunk.append(first)
+            tokens = (fake.completion_tokens - tokens_before) / args.iterations
+            report(f"{label}: first chunk", first_chunk)
+            report(f"{label}: full answer", latencies)
+            print(f"{'':<28} completion tokens/question={tokens:.0f}")
+        await get_mcp_pool().close()
+    print(f"local render: {render_us:.1f} us per answer")
+
+
+async def bench_rate_limit(args: argparse.Namespace) -> None:
+    """Scripted 429s, then interactive and batch questions against a fake deployment limited to
+    --rps requests/s: the bare OpenAI client (AZURE_OPENAI_SCHEDULER=0, its own 2 retries) vs. the
+    shared scheduler (RPM budget just under the limit, Retry-After, priorities). Exits with status 1
+    when the scheduler lets a question fail (the scripted 429s included) or doesn't answer interactive
+    questions faster than batch ones."""
+    import customer_care_agent_mgr
+    import customer_care_rate_limit
+    from customer_care_mcp_pool import get_mcp_pool
+    from customer_care_rate_limit import Priority, request_priority
+
+    question, imsi = "puede mi celular usar el eSIM", "730029988243961"
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    # Every question has to reach the deployment; coalesced duplicates would hide the load
+    os.environ["QUESTION_COALESCING"] = "0"
+
+    def fresh_registry(scheduler: bool, rpm: float = 0):
+        os.environ["AZURE_OPENAI_SCHEDULER"] = "1" if scheduler else "0"
+        os.environ["AZURE_OPENAI_RPM"] = str(rpm)
+        customer_care_rate_limit._SCHEDULERS.clear()
+        customer_care_agent_mgr._REGISTRY = None
+        return customer_care_agent_mgr.get_registry()
+
+    # Scripted 429s: the first two model calls are refused with Retry-After 0.2 s
+    script = FakeChatScript(tool_calls=[("internet_extract-check_esim_compatibility",
+                                         {"brand": "apple", "model": "IPHONE 13 PRO MAX(A2484)"})],
+                            throttle_first=2, retry_after=0.2, first_token_latency=args.llm_latency)
+    with FakeAzureOpenAIServer(script) as fake:
+        use_fake_endpoint(fake)
+        registry = fresh_registry(scheduler=True)
+        await registry.ensure_started()
+        start = time.perf_counter()
+        answer = await customer_care_agent_mgr.process_question(question, imsi)
+        problems = ["scripted 429s: the question wasn't answered"] if answer.startswith("Error") else []
+        print(f"scripted 429s: answered={not answer.startswith('Error')} in {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"429s={fake.throttled}, scheduler={registry.scheduler.metrics.snapshot()}")
+
+    script.throttle_first = 0
+    script.requests_per_second = args.rps
+    interactive_n, batch_n = args.concurrency, args.concurrency * 3
+    for label, scheduler in (("bare client", False), ("scheduler", True)):
+        with FakeAzureOpenAIServer(script) as fake:
+            use_fake_endpoint(fake)
+            registry = fresh_registry(scheduler, rpm=args.rps * 60 * 0.9)
+            await registry.ensure_started()
+            latencies = {Priority.INTERACTIVE: [], Priority.BATCH: []}
+            failures = {Priority.INTERACTIVE: 0, Priority.BATCH: 0}
+
+            async def ask(priority: Priority, delay: float) -> None:
+                await asyncio.sleep(delay)
+                with request_priority(priority):
+                    start = time.perf_counter()
+                    try:
+                        await customer_care_agent_mgr.process_question(question, imsi)
+                        latencies[priority].append(time.perf_counter() - start)
+                    except Exception:
+                        failures[priority] += 1
+
+            # The batch job starts first; interactive questions keep arriving while it runs
+            start = time.perf_counter()
+            await asyncio.gather(*(ask(Priority.BATCH, 0) for _ in range(batch_n)),
+                                 *(ask(Priority.INTERACTIVE, 0.2 + i * 0.1) for i in range(interactive_n)))
+            elapsed = time.perf_counter() - start
+            for priority in Priority:
+                if latencies[priority]:
+                    report(f"{label}: {priority.name.lower()}", latencies[priority])
+            print(f"{'':<28} failed interactive={failures[Priority.INTERACTIVE]}/{interactive_n} "
+                  f"batch={failures[Priority.BATCH]}/{batch_n}  429s={fake.throttled}  total={elapsed:.1f} s")
+            if scheduler:
+                print(f"{'':<28} {registry.scheduler.metrics.snapshot()}")
+                problems += [f"scheduler: {n} {priority.name.lower()} question(s) failed"
+                             for priority, n in failures.items() if n]
+                if latencies[Priority.INTERACTIVE] and latencies[Priority.BATCH] and (
+                        statistics.median(latencies[Priority.INTERACTIVE]) >= statistics.median(latencies[Priority.BATCH])):
+                    problems.append("scheduler: interactive questions were not answered before batch ones")
+        await get_mcp_pool().close()
+    if problems:
+        print("\n".join(problems))
+        raise SystemExit(1)
+
+
+async def bench_coalesce(args: argparse.Namespace) -> None:
+    """--concurrency identical requests at once, with and without single-flight coalescing:
+    model calls for one question asked by several customers with the same device, and server
+    calls for one MCP tool call with the same arguments. Exits with status 1 when, with coalescing
+    on, the duplicates cost more model calls than one question alone, get different answers, or
+    reach the MCP server more than once."""
+    import customer_care_agent_mgr
+    from customer_care_mcp_pool import MCPSessionPool, MCPServerSpec
+    from customer_care_mcp_pool import get_mcp_pool
+
+    n = args.concurrency
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    imsis = _signal_imsis()
+    script = e2e_script(args)
+    problems = []
+    for label, enabled in (("no coalescing", "0"), ("coalescing", "1")):
+        os.environ["QUESTION_COALESCING"] = enabled
+        os.environ["MCP_TOOL_COALESCING"] = enabled
+        with FakeAzureOpenAIServer(script) as fake:
+            use_fake_endpoint(fake)
+            customer_care_agent_mgr._REGISTRY = None
+            registry = customer_care_agent_mgr.get_registry()
+            await registry.ensure_started()
+            before = fake.requests
+            await customer_care_agent_mgr.process_question("puede mi celular usar el eSIM", imsis[0])
+            solo = fake.requests - before
+            before = fake.requests
+            start = time.perf_counter()
+            # Same question and device (every sample customer has the same iPhone), different IMSIs
+            answers = await asyncio.gather(*(
+                customer_care_agent_mgr.process_question("puede mi celular usar el eSIM", imsis[i % len(imsis)])
+                for i in range(n)
+            ))
+            elapsed = time.perf_counter() - start
+            model_calls = fake.requests - before
+            print(f"{label:<16} {n} duplicate questions: {model_calls} model calls ({solo} for one question), "
+                  f"{len(set(answers))} distinct answer(s), {elapsed * 1000:.0f} ms  "
+                  f"{registry.question_flights.metrics.snapshot()}")
+            if enabled == "1" and (model_calls > solo or len(set(answers)) != 1):
+                problems.append(f"{n} duplicate questions: {model_calls} model calls for {solo} per question, "
+                                f"{len(set(answers))} distinct answer(s)")
+        await get_mcp_pool().close()
+
+        stub = MCPServerSpec(name="DelayedStub", plugin_name="stub", script="fixtures/delayed_mcp_server.py",
+                             max_concurrency=4)
+        pool = MCPSessionPool(servers=(stub,))
+        plugin = (await pool.start())["stub"]
+        start = time.perf_counter()
+        await asyncio.gather(*(plugin.call_tool("lookup", key="apple", delay=0.5) for _ in range(n)))
+        elapsed = time.perf_counter() - start
+        calls = re.search(r'"lookup":\s*(\d+)', str((await plugin.call_tool("call_count"))[0])).group(1)
+        print(f"{label:<16} {n} duplicate tool calls: {calls} server call(s), {elapsed * 1000:.0f} ms  "
+              f"{pool.tool_flights.metrics.snapshot()}")
+        if enabled == "1" and calls != "1":
+            problems.append(f"{n} duplicate tool calls: {calls} server calls")
+        await pool.close()
+    if problems:
+        print("\n".join(problems))
+        raise SystemExit(1)
+
+
+# Import-time budgets in ms (cumulative, as reported by python -X importtime) for what a cold worker
+# loads before it can serve: the Functions module, imported with COLD_START_WARMUP=lazy so only the
+# module itself is measured, and the stdio MCP servers the pool spawns. They leave room for a slow
+# 1-CPU instance; importing the agent stack at module load (3-4 s) is the regression they catch.
+IMPORT_BUDGETS_MS = {
+    "function_app": 1500,
+    "customer_care_knowledge_base_server": 1500,
+    "mcp_internet_extarct_server": 1500,
+}
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (.*)$")
+
+
+def import_times_us(module: str) -> list[tuple[str, int, int, int]]:
+    """(name, self us, cumulative us, depth) of every module loaded by `import module` in a fresh
+    interpreter, in python -X importtime order: each module's imports come before it."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env={**os.environ, "COLD_START_WARMUP": "lazy"})
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            name = match.group(3)
+            depth = (len(name) - len(name.lstrip())) // 2
+            times.append((name.strip(), int(match.group(1)), int(match.group(2)), depth))
+    return times
+
+
+def direct_imports(times: list[tuple[str, int, int, int]], module: str) -> list[tuple[int, str]]:
+    """(cumulative us, name) of the modules imported directly by module, slowest first."""
+    end = next(i for i, (name, _, _, depth) in enumerate(times) if name == module and depth == 0)
+    start = end
+    while start > 0 and times[start - 1][3] > 0:
+        start -= 1
+    return sorted(((cumulative, name) for name, _, cumulative, depth in times[start:end] if depth == 1), reverse=True)
+
+
+def _ready_ms(mode: str) -> tuple[float, float]:
+    """Time to import function_app and time until its warm-up is done, with COLD_START_WARMUP=mode."""
+    script = ("import time; start = time.perf_counter(); import function_app; imported = time.perf_counter() - start\n"
+              "if function_app.warmup_thread: function_app.warmup_thread.join()\n"
+              "print(imported * 1000, (time.perf_counter() - start) * 1000)")
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env={**os.environ, "COLD_START_WARMUP": mode})
+    imported, ready = result.stdout.split()[-2:]
+    return float(imported), float(ready)
+
+
+async def bench_import_time(args: argparse.Namespace) -> None:
+    """Import-time regression check: median cumulative import time of function_app and the MCP servers
+    over --iterations fresh interpreters, against IMPORT_BUDGETS_MS (or --budget-ms). Prints what each
+    module imports directly, slowest first, and exits with status 1 when a module is over budget."""
+    over = []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        budget = args.budget_ms or budget
+        runs = [import_times_us(module) for _ in range(args.iterations)]
+        total_ms = statistics.median(next(c for name, _, c, depth in run if name == module and depth == 0)
+                                     for run in runs) / 1000
+        status = "ok" if total_ms <= budget else "OVER BUDGET"
+        print(f"{module:<38} {total_ms:8.1f} ms  (budget {budget:.0f} ms)  {status}")
+        for cumulative, name in direct_imports(runs[-1], module)[:5]:
+            print(f"    {name:<34} {cumulative / 1000:8.1f} ms")
+        if total_ms > budget:
+            over.append(module)
+
+    print()
+    try:
+        for mode in ("eager", "background"):
+            imported, ready = _ready_ms(mode)
+            print(f"function_app COLD_START_WARMUP={mode:<11} import {imported:8.1f} ms  agents ready {ready:8.1f} ms")
+    except (subprocess.CalledProcessError, ValueError) as e:
+        print(f"could not time the warm-up modes: {e}")
+
+    if over:
+        print(f"\nimport time over budget: {', '.join(over)}")
+        raise SystemExit(1)
+
+
+# What each request of the legacy handler cost: a new interpreter that imports the agent stack,
+# starts the MCP servers and answers one question
+SUBPROCESS_CLIENT = ("import asyncio, sys, customer_care_agent_mgr\n"
+                     "print(asyncio.run(customer_care_agent_mgr.process_question(sys.argv[1], sys.argv[2])))")
+
+
+def _subprocess_answer(question: str, imsi: str) -> str:
+    return subprocess.run([sys.executable, "-c", SUBPROCESS_CLIENT, question, imsi], capture_output=True, text=True,
+                          check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+
+
+def _timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+async def bench_worker_pool(args: argparse.Namespace) -> None:
+    """Requests/s of customer_care_azure_function.main() on --workers warm worker processes vs. the
+    interpreter-per-request approach it replaced, with --concurrency requests in flight (the
+    subprocess run answers --concurrency questions, the pool iterations x concurrency)."""
+    import azure.functions as func
+    import customer_care_azure_function
+    import customer_care_worker_pool
+
+    pages, tmp = _serve_stub_esim_pages(args)
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    os.environ["AGENT_WORKERS"] = str(args.workers)
+    os.environ["AGENT_WORKER_CONCURRENCY"] = str(args.concurrency)
+    imsis = _signal_imsis()
+    questions = [(E2E_QUESTIONS[i % len(E2E_QUESTIONS)], imsis[i % len(imsis)]) for i in range(len(E2E_QUESTIONS) * len(imsis))]
+
+    with FakeAzureOpenAIServer(e2e_script(args)) as fake:
+        use_fake_endpoint(fake)
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(asyncio.to_thread(_timed, _subprocess_answer, *questions[i % len(questions)])
+                                           for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        print(f"{'subprocess per request':<28} {args.concurrency / elapsed:7.2f} req/s")
+        report("subprocess per request", latencies)
+
+        start = time.perf_counter()
+        pool = customer_care_worker_pool.get_worker_pool()
+        pool.wait_ready()
+        print(f"\n{args.workers} warm workers ready in {time.perf_counter() - start:.1f} s")
+
+        async def request(question: str, imsi: str) -> float:
+            body = json.dumps({"question": question, "imsi": imsi}).encode()
+            start = time.perf_counter()
+            response = await customer_care_azure_function.main(
+                func.HttpRequest(method="POST", url="http://localhost/api/customer_care", body=body))
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.get_body().decode()}")
+            return time.perf_counter() - start
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def limited(question: str, imsi: str) -> float:
+            async with semaphore:
+                return await request(question, imsi)
+
+        total = args.iterations * args.concurrency
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(limited(*questions[i % len(questions)]) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        print(f"{'worker pool':<28} {total / elapsed:7.2f} req/s")
+        report("worker pool", latencies)
+        print(pool.metrics.snapshot())
+        pool.close()
+        customer_care_worker_pool._POOL = None
+    pages.shutdown()
+    tmp.cleanup()
+
+
+SESSION_REPORT_TURNS = (1, 10, 25, 50)
+
+
+def _session_turns(turns: int) -> list[tuple[str, list[tuple[str, str]], str]]:
+    """(question, tool outputs, answer) of a synthetic conversation: the customer record on every turn
+    and, every third turn, the same eSIM page dump (the text of fixtures/esim_apple.html, repeated to
+    about the size of the real vendor page)."""
+    from customer_care_sessions import answer_text
+
+    with open(os.path.join("fixtures", "esim_apple.html"), encoding="utf-8") as f:
+        page = " ".join([answer_text(f.read())] * 10)
+    record = ("Datos del cliente con IMSI 730029988243961: dispositivo APPLE IPHONE 13 PRO MAX(A2484), "
+              "plan postpago 50 GB, 12 eventos de señal en las últimas 24 horas.")
+    conversation = []
+    for i in range(turns):
+        outputs = [("get_customer_by_imsi", record)]
+        if i % 3 == 0:
+            outputs.append(("check_esim_compatibility", page))
+        question = f"{E2E_QUESTIONS[i % len(E2E_QUESTIONS)]} (pregunta {i + 1})"
+        answer = (f"<div><h3>Respuesta {i + 1}</h3><p>Su iPhone 13 Pro Max es compatible con eSIM. "
+                  f"Puede activarla desde Ajustes &gt; Datos móviles.</p>"
+                  f"<ul><li>Plan actual: 50 GB</li><li>Señal: estable</li></ul></div>")
+        conversation.append((question, outputs, answer))
+    return conversation
+
+
+async def bench_sessions(args: argparse.Namespace) -> None:
+    """Prompt size over 50-turn sessions: every turn appended to one history forever (as
+    sk_agent_with_mcp_sse.py does) vs. the token-budgeted session store with the in-memory and the
+    LRU backend; then LRU eviction with many sessions, and 50 real turns through process_question()
+    against the fake deployment, with and without a session."""
+    from customer_care_sessions import (
+        InMemorySessionBackend, LRUSessionBackend, SessionStore, count_tokens,
+    )
+
+    conversation = _session_turns(max(SESSION_REPORT_TURNS))
+    header = "  ".join(f"turn {turn:>2}" for turn in SESSION_REPORT_TURNS)
+    print(f"{'history tokens before':<28} {header}")
+
+    unbounded, sizes = [], []
+    for question, outputs, answer in conversation:
+        sizes.append(sum(count_tokens(content) for content in unbounded))
+        unbounded.append(question)
+        unbounded.extend(output for _, output in outputs)
+        unbounded.append(answer)
+    print(f"{'unbounded history':<28} " + "  ".join(f"{sizes[turn - 1]:>7}" for turn in SESSION_REPORT_TURNS))
+
+    for label, backend in (("session store (memory)", InMemorySessionBackend()),
+                           ("session store (lru)", LRUSessionBackend(1000))):
+        store = SessionStore(backend)
+        session = store.session_for("bench")
+        sizes, latencies = [], []
+        for question, outputs, answer in conversation:
+            turn = session.begin_turn()
+            sizes.append(sum(count_tokens(content) for _, content in turn.history))
+            turn.tool_outputs.extend(outputs)
+            start = time.perf_counter()
+            await session.end_turn(turn, question, answer)
+            latencies.append(time.perf_counter() - start)
+        print(f"{label:<28} " + "  ".join(f"{sizes[turn - 1]:>7}" for turn in SESSION_REPORT_TURNS)
+              + f"   end_turn p50={statistics.median(latencies) * 1e6:.0f} us  {store.metrics.snapshot()}")
+
+    sessions = 20 * args.iterations * 100
+    for label, backend in (("memory", InMemorySessionBackend()), ("lru (1000)", LRUSessionBackend(1000))):
+        store = SessionStore(backend)
+        tracemalloc.start()
+        start = time.perf_counter()
+        for i in range(sessions):
+            session = store.session_for(f"customer-{i}")
+            for question, outputs, answer in conversation[:3]:
+                turn = session.begin_turn()
+                turn.tool_outputs.extend(outputs)
+                await session.end_turn(turn, question, answer)
+        elapsed = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{sessions} sessions, {label:<12} {len(store):>6} kept, {store.metrics.evicted:>6} evicted, "
+              f"{memory / 2**20:6.1f} MiB, {elapsed / sessions * 1e6:.0f} us per 3-turn session")
+
+    import customer_care_agent_mgr
+    from customer_care_mcp_pool import get_mcp_pool
+
+    pages, tmp = _serve_stub_esim_pages(args)
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+    script = e2e_script(args)
+    # Answers about as long as the real ones, so the history reaches the budget within the run
+    paragraphs = ["Su iPhone 13 Pro Max es compatible con eSIM y puede activarla desde Ajustes > Datos móviles "
+                  "> Añadir eSIM, escaneando el código QR que le enviamos por correo electrónico."] * 5
+    script.structured_answer = json.dumps({"title": "Compatibilidad eSIM", "verdict": "Sí", "paragraphs": paragraphs,
+                                           "sources": ["check_esim_compatibility"]}, ensure_ascii=False)
+    script.answer = "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+    with FakeAzureOpenAIServer(script) as fake:
+        use_fake_endpoint(fake)
+        customer_care_agent_mgr._REGISTRY = None
+        await customer_care_agent_mgr.get_registry().ensure_started()
+        sessions = customer_care_agent_mgr.get_registry().sessions
+        token_budget = sessions.token_budget
+        print(f"\n{'model prompt tokens per turn':<28} {header}")
+        for label, session_id, budget in (("no session", None, token_budget),
+                                          ("session, no token budget", "bench-unbounded", 10**9),
+                                          ("session", "bench-e2e", token_budget)):
+            sessions.token_budget = budget
+            tokens, latencies = [], []
+            for question, _, _ in conversation:
+                before = fake.prompt_tokens
+                start = time.perf_counter()
+                await customer_care_agent_mgr.process_question(question, "730029988243961", session_id)
+                latencies.append(time.perf_counter() - start)
+                tokens.append(fake.prompt_tokens - before)
+            print(f"{label:<28} " + "  ".join(f"{tokens[turn - 1]:>7}" for turn in SESSION_REPORT_TURNS))
+            report(label, latencies)
+        print(sessions.metrics.snapshot())
+    await get_mcp_pool().close()
+    pages.shutdown()
+    tmp.cleanup()
+
+
+BENCHMARKS = {
+    "mcp-pool": bench_mcp_pool,
+    "registry": bench_registry,
+    "router": bench_router,
+    "kb-store": bench_kb_store,
+    "kb-ingest": bench_kb_ingest,
+    "kb-memory": bench_kb_memory,
+    "kb-reload": bench_kb_reload,
+    "stream": bench_stream,
+    "fetch": bench_fetch,
+    "tool-calls": bench_tool_calls,
+    "prefetch": bench_prefetch,
+    "tracing": bench_tracing,
+    "e2e": bench_e2e,
+    "mcp-shared": bench_mcp_shared,
+    "answer-format": bench_answer_format,
+    "rate-limit": bench_rate_limit,
+    "coalesce": bench_coalesce,
+    "import-time": bench_import_time,
+    "worker-pool": bench_worker_pool,
+    "sessions": bench_sessions,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline customer care benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--events", type=int, default=1_000_000, help="synthetic signal events for the data benchmarks")
+    parser.add_argument("--concurrency", type=int, default=8, help="questions in flight for the e2e throughput run")
+    parser.add_argument("--workers", type=int, default=4, help="simulated Functions workers for mcp-shared, agent worker processes for worker-pool")
+    parser.add_argument("--rps", type=float, default=8, help="requests/s the fake deployment accepts in rate-limit")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake model time to first token, seconds")
+    parser.add_argument("--page-latency", type=float, default=0.1, help="stub eSIM page response delay, seconds")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on in the e2e run")
+    parser.add_argument("--budget-ms", type=float, help="import-time budget for every module, instead of IMPORT_BUDGETS_MS")
+    parser.add_argument("--output", help="write the e2e results to this JSON file")
+    parser.add_argument("--compare", help="e2e results JSON from another commit to compare against")
+    args = parser.parse_args()
+    asyncio.run(BENCHMARKS[args.benchmark](args))
+
+
+if __name__ == "__main__":
+    main()
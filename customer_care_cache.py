@@ -0,0 +1,183 @@
+# Response cache for process_question(): answers are reused across subscribers that ask the same
+# (normalized) question to the same agent and share the relevant customer facts (e.g. device model).
+# Answers that depend on the subscriber's own data (signal, roaming, account state) are only
+# reused for that subscriber: their key includes the IMSI.
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from customer_care_router import normalize_text
+
+# Customer attributes that can change an agent's answer. None = never cache that agent's answers;
+# "imsi" makes the answer the subscriber's own.
+CACHE_KEY_FACTS = {
+    "AgentCare": ("imsi",),
+    "RatePlansExpertAgent": (),
+    "SentimentAnalysisAgent": None,
+}
+
+# Intents an agent answers from the device alone (eSIM compatibility): customers with the same
+# device share these answers, unless the question also asks about their line or account
+DEVICE_SCOPED_FACTS = ("brand", "model")
+DEVICE_SCOPED_INTENTS = {
+    "AgentCare": re.compile(r"\b(e ?sim|compatible|compatibilidad)\b"),
+}
+CUSTOMER_DATA_QUESTION = re.compile(
+    r"\b(senal|cobertura|roaming|llamadas?|servicio|linea|numero|cuenta|saldo|factura|consumo|"
+    r"imei|apn|estado|bloque\w*|activ\w*|suspend\w*)\b"
+)
+
+
+def normalize_question(question: str) -> str:
+    """'¿Puede mi celular usar eSIM?' and 'puede mi celular usar esim' give the same text."""
+    text = normalize_text(question)
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+class CacheMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SqliteCacheBackend:
+    """Optional on-disk second level, shared by worker processes on the same machine."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM responses WHERE key = ?", (key,)).fetchone()
+        return row
+
+    def put(self, key: str, value: str, expires: float) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, value, expires))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+
+class ResponseCache:
+    """In-memory LRU with TTL, optionally backed by a SqliteCacheBackend."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, backend: SqliteCacheBackend | None = None,
+                 key_facts: dict = CACHE_KEY_FACTS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self.key_facts = key_facts
+        self.metrics = CacheMetrics()
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """RESPONSE_CACHE_SIZE (0 disables), RESPONSE_CACHE_TTL seconds, RESPONSE_CACHE_PATH for the disk backend."""
+        path = os.getenv("RESPONSE_CACHE_PATH")
+        return cls(
+            max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+            backend=SqliteCacheBackend(path) if path else None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key_facts_for(self, agent: str, question: str) -> tuple | None:
+        """Facts the answer of agent to question depends on; None if it must not be reused."""
+        facts = self.key_facts.get(agent)
+        intent = DEVICE_SCOPED_INTENTS.get(agent)
+        if facts and "imsi" in facts and intent:
+            text = normalize_question(question)
+            if intent.search(text) and not CUSTOMER_DATA_QUESTION.search(text):
+                return DEVICE_SCOPED_FACTS
+        return facts
+
+    def answer_key(self, agent: str, question: str, customer: dict | None = None, imsi: str | None = None,
+                   personal: bool = False) -> str | None:
+        """Identity of an answer (agent, normalized question, relevant facts), even with the cache off;
+        None for agents whose answers depend on more than that.
+
+        personal: the customer's own record was given to the agent, so only that IMSI shares the answer.
+        """
+        names = self.key_facts_for(agent, question)
+        if names is None:
+            return None
+        if personal:
+            names = ("imsi",)
+        customer = dict(customer or {}, imsi=imsi or "")
+        facts = [str(customer.get(name, "")).strip().upper() for name in names]
+        raw = json.dumps([agent, normalize_question(question), names, facts], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str | None) -> str | None:
+        if key is None:
+            return None
+        now = time.time()
+        expired = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] <= now:
+                del self._entries[key]
+                entry, expired = None, True
+            if entry:
+                self._entries.move_to_end(key)
+        if entry is None and self.backend:
+            row = self.backend.get(key)
+            if row and row[1] > now:
+                entry = row
+                self._store(key, entry)
+            elif row:
+                self.backend.delete(key)
+                expired = True
+        if expired:
+            self.metrics.count("expirations")
+        self.metrics.count("hits" if entry else "misses")
+        return entry[0] if entry else None
+
+    def put(self, key: str | None, answer: str) -> None:
+        if key is None or not answer:
+            return
+        entry = (answer, time.time() + self.ttl)
+        self._store(key, entry)
+        if self.backend:
+            self.backend.put(key, *entry)
+
+    def _store(self, key: str, entry: tuple[str, float]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics.count("evictions")
@@ -3,38 +3,94 @@
 # import sys; print('Debug info', file=sys.stderr)
 
 from mcp.server.fastmcp import FastMCP
-import json
+import asyncio
+import functools
+import os
+import pathlib
+import sys
+from customer_care_signal_reload import SignalDataReloader
+from customer_care_signal_store import INDEXED_FIELDS
+from customer_care_signal_summary import summarize_signal_events
+from mcp_server_cli import run_server
 
 # Instantiate an MCP server instance with a name
 mcp = FastMCP("KnwoledgeBaseServer")
 
-# Load customers from a .txt file (JSON with signal quality details)
-def load_customers_dict(file_path: str) -> dict:
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        customers_dict = {}
-        if "datos" in data and "signalQualityIssuesDetail" in data["datos"]:
-            for entry in data["datos"]["signalQualityIssuesDetail"].get("detailSignalPlane", []):
-                if "imsi" in entry:
-                    customers_dict[str(entry["imsi"])] = entry
-    return customers_dict
-
-# Load the customers dictionary at startup
-CUSTOMERS_FILE = "customers.txt"
-CUSTOMERS_DICT = load_customers_dict(CUSTOMERS_FILE)
+# Load every signal event from the customers file (JSON with signal quality details) at startup,
+# plus the detailSignalPlane records appended to the delta file (one JSON object per line), and
+# pick up changes to either every CUSTOMERS_RELOAD_INTERVAL seconds without restarting
+CUSTOMERS_FILE = os.getenv("CUSTOMERS_FILE", str(pathlib.Path(__file__).parent / "customers.txt"))
+CUSTOMERS_DELTA_FILE = os.getenv("CUSTOMERS_DELTA_FILE", str(pathlib.Path(CUSTOMERS_FILE).with_suffix(".delta.jsonl")))
+CUSTOMERS_RELOAD_INTERVAL = float(os.getenv("CUSTOMERS_RELOAD_INTERVAL", "5"))
+
+def report_load_progress(records: int, chars_read: int) -> None:
+    print(f"Loaded {records} signal events ({chars_read / 1e6:.1f} MB read)", file=sys.stderr)
+
+CUSTOMER_DATA = SignalDataReloader(CUSTOMERS_FILE, CUSTOMERS_DELTA_FILE, progress=report_load_progress)
+if CUSTOMERS_RELOAD_INTERVAL > 0:
+    CUSTOMER_DATA.watch(CUSTOMERS_RELOAD_INTERVAL)
+
+def off_event_loop(tool):
+    """Run a blocking tool in a worker thread, so concurrent calls from one agent turn
+    don't queue behind each other (and pings still get answered) while it works."""
+    @functools.wraps(tool)
+    async def run_in_thread(*args, **kwargs):
+        return await asyncio.to_thread(tool, *args, **kwargs)
+    return run_in_thread
  
 @mcp.tool()
+@off_event_loop
 def get_customer_by_imsi(imsi: str) -> dict:
-    """Retrieve customer information by IMSI."""
-    customer = CUSTOMERS_DICT.get(str(imsi))
+    """Retrieve customer information by IMSI (the most recent signal event: device, roaming, access type...)."""
+    customer = CUSTOMER_DATA.store.latest_event(str(imsi))
     if customer:
         return customer
     else:
         return {"error": f"Customer with IMSI {imsi} not found."}
+
+@mcp.tool()
+@off_event_loop
+def get_signal_events(imsi: str, start: str = "", end: str = "", offset: int = 0, limit: int = 50) -> dict:
+    """List the signal events of an IMSI, oldest first, optionally between start and end
+    (ISO dates such as '2025-06-06' or '2025-06-06T09:30:00'), paginated with offset/limit."""
+    store = CUSTOMER_DATA.store  # one version of the data for the whole call
+    row_ids = store.events_for_imsi(str(imsi), start or None, end or None)
+    if not row_ids and not store.events_for_imsi(str(imsi)):
+        return {"error": f"Customer with IMSI {imsi} not found."}
+    return {"imsi": str(imsi), **store.page(row_ids, offset, limit)}
+
+@mcp.tool()
+@off_event_loop
+def find_signal_events(field: str, value: str, start: str = "", end: str = "", offset: int = 0, limit: int = 50) -> dict:
+    """Find signal events by imei, cellname, status (e.g. 'Success') or accessType (e.g. '4G'),
+    oldest first, optionally between start and end ISO dates, paginated with offset/limit."""
+    store = CUSTOMER_DATA.store
+    try:
+        row_ids = store.find(field, value, start or None, end or None)
+    except KeyError:
+        return {"error": f"Field '{field}' can't be searched. Use one of: {', '.join(INDEXED_FIELDS)}."}
+    return {"field": field, "value": value, **store.page(row_ids, offset, limit)}
+
+@mcp.tool()
+@off_event_loop
+def get_signal_quality_summary(imsi: str, start: str = "", end: str = "", top: int = 5) -> dict:
+    """Summarize an IMSI's signal quality between start and end ISO dates (whole history if empty):
+    failure rate per transaction, top failing cells, failure causes, 4G/5G share and roaming periods.
+    Prefer this over listing raw events."""
+    store = CUSTOMER_DATA.store
+    if not store.events_for_imsi(str(imsi)):
+        return {"error": f"Customer with IMSI {imsi} not found."}
+    row_ids = store.events_for_imsi(str(imsi), start or None, end or None)
+    return {"imsi": str(imsi), "start": start or None, "end": end or None,
+            **summarize_signal_events(store, row_ids, top=max(1, min(top, 20)))}
+
+@mcp.tool()
+def get_data_status() -> dict:
+    """Version of the customer signal data being served, when it was loaded and how long the last refresh took."""
+    return CUSTOMER_DATA.status()
     
 
 if __name__ == "__main__":
-    # This server will be launched automatically by the MCP stdio agent
-    # You don't need to run this file directly - it will be spawned as a subprocess
-    mcp.run(transport="stdio")
- 
\ No newline at end of file
+    # By default this server is launched automatically by the MCP stdio agent as a subprocess;
+    # run it with --transport streamable-http (or sse) to share one instance between workers
+    run_server(mcp, default_port=8001)
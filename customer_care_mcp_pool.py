@@ -0,0 +1,208 @@
+# Process-lifetime pool of MCP server sessions shared by every agent_care() call.
+# Servers are spawned once, health-checked in the background and restarted if they crash.
+#
+# MCP_<PLUGIN>_URL (MCP_KNOWLEDGE_BASE_URL, MCP_INTERNET_EXTRACT_URL) connects to a shared server
+# started with --transport sse or streamable-http instead of spawning a stdio copy per worker:
+# a URL ending in /sse uses SSE, any other (e.g. http://kb:8001/mcp) streamable HTTP.
+#
+# Concurrent calls of the same tool with the same arguments are coalesced into one server call
+# (every tool is read-only); MCP_TOOL_COALESCING=0 turns that off.
+
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import sys
+from dataclasses import dataclass
+
+from semantic_kernel.connectors.mcp import MCPSsePlugin, MCPStdioPlugin, MCPStreamableHttpPlugin
+
+from customer_care_singleflight import SingleFlight
+from customer_care_tracing import get_tracer
+
+logger = logging.getLogger("customer_care_mcp_pool")
+
+CURRENT_DIR = pathlib.Path(__file__).parent
+
+
+@dataclass(frozen=True)
+class MCPServerSpec:
+    """Description of one MCP server managed by the pool."""
+    name: str
+    plugin_name: str
+    script: str
+    max_concurrency: int = 4
+
+    @property
+    def url_env(self) -> str:
+        """Environment variable holding the URL of a shared network instance of this server."""
+        return f"MCP_{self.plugin_name.upper()}_URL"
+
+
+DEFAULT_SERVERS = (
+    MCPServerSpec(name="InternetServer", plugin_name="internet_extract", script="mcp_internet_extarct_server.py"),
+    MCPServerSpec(name="KnowledgeBaseServer", plugin_name="knowledge_base", script="customer_care_knowledge_base_server.py"),
+)
+
+
+class PooledMCPPlugin:
+    """Mixin for MCP plugins that bounds in-flight tool calls and reconnects after the server dies."""
+
+    def __init__(self, *, max_concurrency: int = 4, health_check_timeout: float = 5.0,
+                 flights: SingleFlight | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._flights = flights
+        self._restart_lock = asyncio.Lock()
+        self._health_check_timeout = health_check_timeout
+        self.restarts = 0
+
+    async def call_tool(self, tool_name: str, **kwargs):
+        with get_tracer().span("mcp.call_tool", server=self.name, tool=tool_name) as span:
+            if self._flights is None:
+                return await self._call_tool(span, tool_name, **kwargs)
+            key = (self.name, tool_name, json.dumps(kwargs, sort_keys=True, default=str))
+            return await self._flights.run(key, lambda: self._call_tool(span, tool_name, **kwargs))
+
+    async def _call_tool(self, span, tool_name: str, **kwargs):
+        async with self._semaphore:
+            span.mark("queued_ms")
+            try:
+                return await super().call_tool(tool_name, **kwargs)
+            except Exception:
+                if await self.is_healthy():
+                    raise
+                # The server crashed or the connection dropped: reconnect and retry once (all our tools are read-only)
+                span.set("restarted", True)
+                await self.restart()
+                return await super().call_tool(tool_name, **kwargs)
+
+    async def is_healthy(self) -> bool:
+        """Ping the server; False if there is no session or it doesn't answer in time."""
+        if not self.session:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=self._health_check_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def restart(self) -> None:
+        async with self._restart_lock:
+            # Another caller may have restarted the server while we waited for the lock
+            if await self.is_healthy():
+                return
+            logger.warning("Reconnecting MCP server %s", self.name)
+            try:
+                await self.close()
+            except Exception as e:
+                logger.debug("Ignoring error while closing MCP server %s: %s", self.name, e)
+            await self.connect()
+            self.restarts += 1
+
+
+class PooledMCPStdioPlugin(PooledMCPPlugin, MCPStdioPlugin):
+    """Server spawned by this worker over stdio; a restart respawns the process."""
+
+
+class PooledMCPSsePlugin(PooledMCPPlugin, MCPSsePlugin):
+    """Shared server reached over SSE; a restart opens a new connection."""
+
+
+class PooledMCPStreamableHttpPlugin(PooledMCPPlugin, MCPStreamableHttpPlugin):
+    """Shared server reached over streamable HTTP; a restart opens a new connection."""
+
+
+def create_plugin(spec: MCPServerSpec, **kwargs) -> PooledMCPPlugin:
+    """Network plugin when the spec's URL variable is set, otherwise a stdio plugin spawning the script."""
+    url = os.getenv(spec.url_env)
+    if url:
+        plugin_class = PooledMCPSsePlugin if url.rstrip("/").endswith("/sse") else PooledMCPStreamableHttpPlugin
+        return plugin_class(name=spec.name, url=url, **kwargs)
+    script_path = CURRENT_DIR / spec.script
+    if not script_path.exists():
+        raise FileNotFoundError(f"MCP server script not found at {script_path}")
+    return PooledMCPStdioPlugin(
+        name=spec.name,
+        command=sys.executable,
+        args=[str(script_path), "--transport", "stdio"],
+        # Without env the MCP client only passes a few whitelisted variables, and the
+        # servers' settings (CUSTOMERS_FILE, ESIM_INDEX_*, WEB_FETCH_*...) would be lost
+        env=dict(os.environ),
+        **kwargs,
+    )
+
+
+class MCPSessionPool:
+    """Starts each MCP server once and hands out the connected plugins to every request."""
+
+    def __init__(self, servers: tuple[MCPServerSpec, ...] = DEFAULT_SERVERS, health_check_interval: float = 30.0):
+        self._servers = servers
+        self._health_check_interval = health_check_interval
+        self._plugins: dict[str, PooledMCPPlugin] = {}
+        self.tool_flights = SingleFlight(enabled=os.getenv("MCP_TOOL_COALESCING", "1") != "0")
+        self._start_lock = asyncio.Lock()
+        self._health_task: asyncio.Task | None = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._plugins)
+
+    async def start(self) -> dict[str, PooledMCPPlugin]:
+        """Connect every server (only the first call does any work) and return plugins by plugin name."""
+        if self._plugins:
+            return self._plugins
+        async with self._start_lock:
+            if self._plugins:
+                return self._plugins
+            plugins = {}
+            tracer = get_tracer()
+            try:
+                for spec in self._servers:
+                    plugin = create_plugin(
+                        spec,
+                        flights=self.tool_flights,
+                        # MCP_MAX_CONCURRENCY overrides every server's limit of in-flight tool calls
+                        max_concurrency=int(os.getenv("MCP_MAX_CONCURRENCY", spec.max_concurrency)),
+                    )
+                    # stdio: subprocess spawn, imports and data loading of the server, up to the tool listing
+                    with tracer.span("mcp.connect", server=spec.name, transport=type(plugin).__name__):
+                        await plugin.connect()
+                    plugins[spec.plugin_name] = plugin
+            except Exception:
+                for plugin in plugins.values():
+                    await plugin.close()
+                raise
+            self._plugins = plugins
+            self._health_task = asyncio.create_task(self._health_check_loop())
+        return self._plugins
+
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._health_check_interval)
+            for plugin in list(self._plugins.values()):
+                if not await plugin.is_healthy():
+                    try:
+                        await plugin.restart()
+                    except Exception as e:
+                        logger.error("Could not restart MCP server %s: %s", plugin.name, e)
+
+    async def close(self) -> None:
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        plugins, self._plugins = self._plugins, {}
+        for plugin in plugins.values():
+            try:
+                await plugin.close()
+            except Exception as e:
+                logger.debug("Ignoring error while closing MCP server %s: %s", plugin.name, e)
+
+
+_POOL = MCPSessionPool()
+
+
+def get_mcp_pool() -> MCPSessionPool:
+    """Return the process-wide MCP session pool."""
+    return _POOL
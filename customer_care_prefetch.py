@@ -0,0 +1,97 @@
+# Speculative customer lookup for process_question(): the IMSI is known before routing, so the
+# customer record is fetched while the question is routed and handed to the selected agent as a
+# compact summary, instead of waiting for the model to call get_customer_by_imsi (one LLM round
+# trip plus one tool round trip).
+
+import json
+import os
+import threading
+from contextvars import ContextVar
+
+# Agents that get the customer summary; the others never look customers up
+DEFAULT_PREFETCH_AGENTS = ("AgentCare",)
+CUSTOMER_LOOKUP_TOOL = "get_customer_by_imsi"
+
+# Fields of the most recent signal event worth giving the model up front
+SUMMARY_FIELDS = ("brand", "model", "os", "softwareVersion", "imei", "accessType", "apn", "status", "roaming")
+
+_TURN_TOOL_CALLS: ContextVar[list[str] | None] = ContextVar("turn_tool_calls", default=None)
+
+
+def customer_summary(imsi: str, customer: dict, fields: tuple = SUMMARY_FIELDS) -> str:
+    """One system message with the customer's device, access and roaming facts; with fields, only
+    those (the brand and model for a device-scoped question, whose answer is shared across IMSIs)."""
+    facts = {name: customer[name] for name in fields if customer.get(name) not in (None, "", {})}
+    last_event = (customer.get("timePeriod") or {}).get("startDateTime")
+    if last_event and fields == SUMMARY_FIELDS:
+        facts["lastEvent"] = last_event
+    return (
+        f"Datos del cliente con IMSI {imsi} (evento más reciente, ya obtenido con {CUSTOMER_LOOKUP_TOOL}; "
+        f"no es necesario volver a consultarlo): {json.dumps(facts, ensure_ascii=False, separators=(',', ':'))}"
+    )
+
+
+class PrefetchMetrics:
+    """How often the speculative lookup was used, and how many model/tool round trips it saved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.injected = 0
+        self.discarded = 0
+        self.not_found = 0
+        self.round_trips_saved = 0
+        self.redundant_lookups = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "started": self.started,
+                "injected": self.injected,
+                "discarded": self.discarded,
+                "not_found": self.not_found,
+                "round_trips_saved": self.round_trips_saved,
+                "redundant_lookups": self.redundant_lookups,
+            }
+
+
+class CustomerPrefetch:
+    """Per-agent switch for the speculative customer lookup."""
+
+    def __init__(self, agents=DEFAULT_PREFETCH_AGENTS):
+        self.agents = frozenset(agents)
+        self.metrics = PrefetchMetrics()
+
+    @classmethod
+    def from_env(cls) -> "CustomerPrefetch":
+        """CUSTOMER_PREFETCH_AGENTS: comma-separated agent names ('' disables the prefetch)."""
+        names = os.getenv("CUSTOMER_PREFETCH_AGENTS")
+        if names is None:
+            return cls()
+        return cls(name.strip() for name in names.split(",") if name.strip())
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.agents)
+
+    def applies_to(self, agent_name: str) -> bool:
+        return agent_name in self.agents
+
+
+def start_turn_tool_log() -> list[str]:
+    """Collect the names of the tools the model calls from here on in the current task."""
+    calls: list[str] = []
+    _TURN_TOOL_CALLS.set(calls)
+    return calls
+
+
+async def record_tool_call(context, next):
+    """Auto function invocation filter feeding start_turn_tool_log()."""
+    calls = _TURN_TOOL_CALLS.get()
+    if calls is not None:
+        calls.append(context.function.name)
+    await next(context)
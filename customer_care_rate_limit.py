@@ -0,0 +1,375 @@
+# Client-side scheduling of Azure OpenAI calls. The ManagerAgent, the specialist agents and the
+# agent_care kernel share one deployment (and one AsyncAzureOpenAI client), so every request goes
+# through one DeploymentScheduler, plugged in as the client's HTTP transport:
+#
+# - token buckets for requests/min and tokens/min, sized to the deployment's quota
+# - a priority queue: interactive HTTP requests are admitted before batch jobs
+# - adaptive concurrency: halved on every 429, grown back by one slot per window of successes
+# - retries of 429/5xx honouring Retry-After (or retry-after-ms), with jitter, and a pause of
+#   the whole deployment while Azure asks us to back off
+#
+# AZURE_OPENAI_RPM / AZURE_OPENAI_TPM (0 = no budget), AZURE_OPENAI_MAX_CONCURRENCY and
+# AZURE_OPENAI_MAX_RETRIES configure it; AZURE_OPENAI_SCHEDULER=0 leaves the client untouched.
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+try:
+    import httpx2 as httpx  # what recent openai releases are built on
+except ImportError:
+    import httpx
+
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# Completion tokens counted against the TPM budget when the request doesn't set max_tokens
+COMPLETION_TOKENS_ESTIMATE = 256
+_MAX_TOKENS = re.compile(rb'"max(?:_completion)?_tokens"\s*:\s*(\d+)')
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first."""
+    INTERACTIVE = 0
+    BATCH = 10
+
+
+_PRIORITY: ContextVar[Priority] = ContextVar("openai_request_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """Run the model calls made inside the block (and the tasks it starts) at this priority."""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class DeploymentBusyError(Exception):
+    """Azure OpenAI kept throttling the request after every retry."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limited(exc: BaseException | None) -> bool:
+    """True if exc, or an exception it was raised from, is a 429 from the model service."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, DeploymentBusyError) or getattr(exc, "status_code", None) == 429:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def rate_limit_retry_after(exc: BaseException | None) -> float | None:
+    """Retry-After of the 429 response behind exc, if the service sent one."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, DeploymentBusyError):
+            return exc.retry_after
+        response = getattr(exc, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return retry_after_seconds(response.headers)
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def retry_after_seconds(headers) -> float | None:
+    """Delay requested by the service: retry-after-ms (Azure) or Retry-After in seconds."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass  # HTTP dates aren't used by Azure OpenAI
+    return None
+
+
+class TokenBucket:
+    """Continuously refilled budget of `per_minute` units, holding at most `burst_seconds` worth."""
+
+    def __init__(self, per_minute: float, burst_seconds: float = 1.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (a request larger than the bucket waits for a full one)."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+
+class SchedulerMetrics:
+    """Requests sent, throttling seen and time spent waiting for admission."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.exhausted = 0
+        self.queue_seconds = {priority.name.lower(): 0.0 for priority in Priority}
+        self.admitted = {priority.name.lower(): 0 for priority in Priority}
+        self.concurrency_limit = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_admission(self, priority: Priority, waited: float) -> None:
+        name = priority.name.lower()
+        with self._lock:
+            self.admitted[name] += 1
+            self.queue_seconds[name] += waited
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "exhausted": self.exhausted,
+                "concurrency_limit": self.concurrency_limit,
+                "mean_queue_ms": {
+                    name: round(self.queue_seconds[name] / count * 1000, 2) if count else 0.0
+                    for name, count in self.admitted.items()
+                },
+            }
+
+
+class DeploymentScheduler:
+    """Admits model requests by priority within the deployment's rate budgets and concurrency limit."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_concurrency: int = 32, max_retries: int = 4,
+                 backoff: float = 0.5, max_backoff: float = 30.0, jitter: float = 0.2):
+        self.rpm = TokenBucket(rpm) if rpm > 0 else None
+        self.tpm = TokenBucket(tpm) if tpm > 0 else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.metrics = SchedulerMetrics()
+        self._limit = float(self.max_concurrency)
+        self._active = 0
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self.metrics.concurrency_limit = self.max_concurrency
+
+    @classmethod
+    def from_env(cls) -> "DeploymentScheduler":
+        return cls(
+            rpm=float(os.getenv("AZURE_OPENAI_RPM", "0")),
+            tpm=float(os.getenv("AZURE_OPENAI_TPM", "0")),
+            max_concurrency=int(os.getenv("AZURE_OPENAI_MAX_CONCURRENCY", "32")),
+            max_retries=int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "4")),
+        )
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(1, int(self._limit))
+
+    async def acquire(self, priority: Priority, tokens: float) -> None:
+        """Wait until this request may be sent; release() must follow."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = (int(priority), next(self._sequence), tokens, future)
+        heapq.heappush(self._waiters, entry)
+        start = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # admitted just as we were cancelled
+            self._dispatch()
+            raise
+        self.metrics.record_admission(priority, time.monotonic() - start)
+
+    def release(self) -> None:
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order while a slot and the rate budgets allow it."""
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._active >= self.concurrency_limit:
+                return
+            wait = self._paused_until - time.monotonic()
+            if self.rpm:
+                wait = max(wait, self.rpm.wait_time(1))
+            if self.tpm:
+                wait = max(wait, self.tpm.wait_time(tokens))
+            if wait > 0:
+                # The head of the queue waits for the budget, and everything behind it with it
+                self._wake_in(wait)
+                return
+            heapq.heappop(self._waiters)
+            if self.rpm:
+                self.rpm.take(1)
+            if self.tpm:
+                self.tpm.take(tokens)
+            self._active += 1
+            future.set_result(None)
+
+    def _wake_in(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None and not self._timer.cancelled() and self._timer.when() <= when:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(when, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def on_success(self) -> None:
+        # Additive increase: about one more slot per `limit` successful requests
+        self._limit = min(float(self.max_concurrency), self._limit + 1.0 / self._limit)
+        self.metrics.concurrency_limit = self.concurrency_limit
+
+    def on_throttled(self, retry_after: float | None) -> None:
+        # Multiplicative decrease (once per second: the requests already in flight throttle together),
+        # and no new requests until the service's Retry-After has passed
+        now = time.monotonic()
+        if now - self._last_decrease >= 1.0:
+            self._last_decrease = now
+            self._limit = max(1.0, self._limit / 2)
+            self.metrics.concurrency_limit = self.concurrency_limit
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    def retry_delay(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return retry_after * (1 + random.uniform(0, self.jitter))
+        # Full jitter exponential backoff
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def estimate_tokens(body: bytes) -> float:
+        """Prompt tokens (~4 bytes each, tools included) plus the completion allowance."""
+        match = _MAX_TOKENS.search(body)
+        return len(body) / 4 + (int(match.group(1)) if match else COMPLETION_TOKENS_ESTIMATE)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that gives the concurrency slot back once it has been read or closed."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release:
+                release, self._release = self._release, None
+                release()
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """httpx transport sending every request through a DeploymentScheduler, retrying throttled ones."""
+
+    def __init__(self, scheduler: DeploymentScheduler, transport=None):
+        self.scheduler = scheduler
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        scheduler = self.scheduler
+        priority = _PRIORITY.get()
+        body = request.content
+        tokens = scheduler.estimate_tokens(body)
+        attempt = 0
+        while True:
+            await scheduler.acquire(priority, tokens)
+            scheduler.metrics.count("requests")
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError:
+                scheduler.release()
+                if attempt == scheduler.max_retries:
+                    raise
+                scheduler.metrics.count("retries")
+                await asyncio.sleep(scheduler.retry_delay(attempt, None))
+                attempt += 1
+                continue
+            except BaseException:
+                scheduler.release()
+                raise
+
+            if response.status_code not in RETRY_STATUSES:
+                scheduler.on_success()
+                response.stream = _ReleasingStream(response.stream, scheduler.release)
+                return response
+
+            retry_after = retry_after_seconds(response.headers)
+            if response.status_code == 429:
+                scheduler.metrics.count("throttled")
+                scheduler.on_throttled(retry_after)
+            if attempt == scheduler.max_retries:
+                scheduler.metrics.count("exhausted")
+                response.stream = _ReleasingStream(response.stream, scheduler.release)
+                return response
+            await response.aread()
+            await response.aclose()
+            scheduler.release()
+            scheduler.metrics.count("retries")
+            await asyncio.sleep(scheduler.retry_delay(attempt, retry_after))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_SCHEDULERS: dict[str, DeploymentScheduler] = {}
+
+
+def get_scheduler(deployment: str) -> DeploymentScheduler:
+    """Return the process-wide scheduler of a deployment."""
+    scheduler = _SCHEDULERS.get(deployment)
+    if scheduler is None:
+        scheduler = _SCHEDULERS[deployment] = DeploymentScheduler.from_env()
+    return scheduler
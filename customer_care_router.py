@@ -0,0 +1,104 @@
+# Deterministic fast-path router: picks the agent for obvious questions without calling ManagerAgent.
+
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+
+# (agent, pattern, weight) - patterns run on lower-cased text without accents.
+# Weights are combined per agent as a noisy-OR, so several weak hints add up to a strong one.
+INTENT_RULES = (
+    ("AgentCare", r"\be-?sim\b", 0.9),
+    ("AgentCare", r"\b(iphone|galaxy|samsung|apple|motorola|xiaomi|huawei)\b", 0.5),
+    ("AgentCare", r"\b(celular|telefono|dispositivo|equipo|movil)\b", 0.4),
+    ("AgentCare", r"\b(compatible|compatibilidad)\b", 0.5),
+    ("AgentCare", r"\b(sim|chip|imei|apn)\b", 0.6),
+    ("AgentCare", r"\b(senal|cobertura|roaming|4g|5g|llamadas? (caidas?|cortadas?)|sin servicio)\b", 0.7),
+    ("RatePlansExpertAgent", r"\bplan(es)?\b", 0.6),
+    ("RatePlansExpertAgent", r"\b(tarifa|tarifas|tarifarios?)\b", 0.8),
+    ("RatePlansExpertAgent", r"\b(precio|precios|costo|costos|cuanto (cuesta|sale|vale)|valor mensual)\b", 0.7),
+    ("RatePlansExpertAgent", r"\b(promocion|promociones|oferta|ofertas|descuento)\b", 0.6),
+    ("RatePlansExpertAgent", r"\b(gigas|gb|minutos ilimitados|prepago|postpago)\b", 0.4),
+    ("SentimentAnalysisAgent", r"\b(sentimiento|emocion|emociones|satisfaccion|frustracion)\b", 0.8),
+    ("SentimentAnalysisAgent", r"\b(transcripcion|grabacion)\b", 0.7),
+    ("SentimentAnalysisAgent", r"\banaliza(r)? (la|esta) llamada\b", 0.8),
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case and strip accents so 'Señal' and 'senal' match the same rule."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    agent: str | None
+    confidence: float
+    latency: float
+
+
+class RouterMetrics:
+    """Counters for the fast path: how many questions skipped ManagerAgent and how fast routing was."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.fallbacks = 0
+        self.total_latency = 0.0
+
+    def record(self, decision: RoutingDecision) -> None:
+        with self._lock:
+            if decision.agent:
+                self.routed += 1
+            else:
+                self.fallbacks += 1
+            self.total_latency += decision.latency
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.routed + self.fallbacks
+            return {
+                "routed": self.routed,
+                "fallbacks": self.fallbacks,
+                "hit_rate": self.routed / total if total else 0.0,
+                "mean_latency_us": self.total_latency / total * 1e6 if total else 0.0,
+            }
+
+
+class IntentRouter:
+    """Keyword/regex intent classifier over Spanish text.
+
+    route() returns the agent only when the confidence reaches the threshold; otherwise
+    agent is None and the caller falls back to ManagerAgent.
+    """
+
+    def __init__(self, rules=INTENT_RULES, threshold: float = 0.7):
+        self.threshold = threshold
+        self.metrics = RouterMetrics()
+        self._rules = [(agent, re.compile(pattern), weight) for agent, pattern, weight in rules]
+
+    def classify(self, question: str) -> tuple[str | None, float]:
+        """Return the best agent and its confidence, regardless of the threshold."""
+        text = normalize_text(question)
+        misses: dict[str, float] = {}
+        for agent, pattern, weight in self._rules:
+            if pattern.search(text):
+                misses[agent] = misses.get(agent, 1.0) * (1.0 - weight)
+        if not misses:
+            return None, 0.0
+        scores = sorted(((1.0 - miss, agent) for agent, miss in misses.items()), reverse=True)
+        best_score, best_agent = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        # Competing intents (e.g. the price of an eSIM phone) lower the confidence
+        return best_agent, best_score * (1.0 - runner_up)
+
+    def route(self, question: str) -> RoutingDecision:
+        start = time.perf_counter()
+        agent, confidence = self.classify(question)
+        if confidence < self.threshold:
+            agent = None
+        decision = RoutingDecision(agent=agent, confidence=confidence, latency=time.perf_counter() - start)
+        self.metrics.record(decision)
+        return decision
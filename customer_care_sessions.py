@@ -0,0 +1,369 @@
+# Multi-turn conversations for process_question(), keyed by a session ID (or, with SESSION_KEY=imsi,
+# by the customer's IMSI). Each session keeps its most recent turns word for word within a token
+# budget. Turns that fall out of that window are folded into a running summary, and a tool output
+# identical to one already in the window (the same eSIM page dump, the same customer record) is
+# kept once. The prompt therefore stops growing after a few turns instead of carrying the whole
+# conversation.
+#
+# A session belongs to the customer who started it: the same session ID sent with another IMSI is
+# rejected instead of reaching that history. Sessions live in the worker process, like the in-memory
+# level of the response cache.
+
+import asyncio
+import hashlib
+import html
+import inspect
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; tokens are then estimated from the text length
+    tiktoken = None
+
+SUMMARY_PREFIX = "Resumen de la conversación anterior con el cliente:\n"
+TOOL_OUTPUT_PREFIX = "Resultado de {name} en un turno anterior: "
+REPEATED_OUTPUT = "(mismo resultado de {name} que en un turno anterior)"
+# The latest question and answer are never dropped from the window
+MIN_RECENT_TURNS = 2
+
+_TURN_TOOL_OUTPUTS: ContextVar[list[tuple[str, str]] | None] = ContextVar("turn_tool_outputs", default=None)
+_ENCODING = None
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of text with tiktoken when it is installed, otherwise ~4 characters per token."""
+    global _ENCODING, tiktoken
+    if tiktoken is not None:
+        try:
+            if _ENCODING is None:
+                _ENCODING = tiktoken.get_encoding("o200k_base")
+            return len(_ENCODING.encode(text))
+        except Exception:
+            tiktoken = None  # encoding files not available offline: estimate from now on
+    return (len(text) + 3) // 4
+
+
+def answer_text(answer: str) -> str:
+    """Plain text of an HTML answer; the markup would only take room in later prompts."""
+    return " ".join(html.unescape(_TAGS.sub(" ", answer)).split())
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def start_turn_tool_outputs() -> list[tuple[str, str]]:
+    """Collect (tool, output) of the tools the model calls from here on in the current task."""
+    outputs: list[tuple[str, str]] = []
+    _TURN_TOOL_OUTPUTS.set(outputs)
+    return outputs
+
+
+async def record_tool_output(context, next):
+    """Auto function invocation filter feeding start_turn_tool_outputs()."""
+    await next(context)
+    outputs = _TURN_TOOL_OUTPUTS.get()
+    if outputs is not None and context.function_result is not None:
+        outputs.append((context.function.name, str(context.function_result)))
+
+
+@dataclass
+class Turn:
+    role: str                 # "user", "assistant" or "tool"
+    content: str
+    tokens: int
+    name: str = ""            # tool name
+    digest: str = ""          # of a tool output kept in full
+    repeat_of: str = ""       # digest of the output this one repeats
+    full: str = ""            # the repeated output, in case the original leaves the window
+
+
+def extractive_summary(previous: str, turns: list[Turn], max_tokens: int) -> str:
+    """Add one short line per dropped turn to the summary, forgetting its oldest lines past max_tokens.
+
+    Runs locally, so summarizing costs no model call; see SESSION_SUMMARIZER=model in customer_care_agent_mgr.py.
+    """
+    lines = previous.split("\n") if previous else []
+    for turn in turns:
+        if turn.role == "user":
+            lines.append(f"- Cliente: {_clip(turn.content, 160)}")
+        elif turn.role == "assistant":
+            lines.append(f"- Respuesta: {_clip(turn.content, 200)}")
+        elif turn.role == "tool" and not turn.repeat_of and f"- Se consultó {turn.name}." not in lines:
+            lines.append(f"- Se consultó {turn.name}.")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+Summarizer = Callable[[str, list[Turn], int], "str | Awaitable[str]"]
+
+
+class SessionMismatchError(PermissionError):
+    """The session belongs to another customer."""
+
+
+class SessionMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+        self.turns_summarized = 0
+        self.summaries = 0
+        self.tool_outputs_deduplicated = 0
+        self.tool_outputs_truncated = 0
+        self.rejected = 0
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "created": self.created,
+                "evicted": self.evicted,
+                "turns_summarized": self.turns_summarized,
+                "summaries": self.summaries,
+                "tool_outputs_deduplicated": self.tool_outputs_deduplicated,
+                "tool_outputs_truncated": self.tool_outputs_truncated,
+                "rejected": self.rejected,
+            }
+
+
+@dataclass
+class SessionTurn:
+    """What one question sees of its session (history) and what it adds to it."""
+    history: list[tuple[str, str]]
+    previous_agent: str | None
+    known_outputs: set[str]
+    agent: str | None = None
+    tool_outputs: list[tuple[str, str]] = field(default_factory=list)
+
+    def knows(self, output: str) -> bool:
+        """True if this exact output is already in the history given to the agent."""
+        return _digest(output) in self.known_outputs
+
+
+class ConversationSession:
+    """Summary of the older turns plus the recent ones, kept under token_budget tokens."""
+
+    def __init__(self, session_id: str, metrics: SessionMetrics, summarizer: Summarizer = extractive_summary,
+                 token_budget: int = 3000, summary_tokens: int = 400, tool_output_tokens: int = 800,
+                 imsi: str | None = None):
+        self.session_id = session_id
+        self.imsi = imsi
+        self.metrics = metrics
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.summary_tokens = min(summary_tokens, token_budget // 2)
+        self.tool_output_tokens = tool_output_tokens
+        self.summary = ""
+        self.turns: list[Turn] = []
+        self.last_agent: str | None = None
+        # One question at a time per session, so turns are recorded in order
+        self.lock = asyncio.Lock()
+
+    def prompt_tokens(self) -> int:
+        return (count_tokens(SUMMARY_PREFIX + self.summary) if self.summary else 0) + sum(t.tokens for t in self.turns)
+
+    def prompt_messages(self) -> list[tuple[str, str]]:
+        """(role, content) messages to put before the new question: the summary, then the recent turns."""
+        messages = [("system", SUMMARY_PREFIX + self.summary)] if self.summary else []
+        for turn in self.turns:
+            if turn.role == "tool":
+                messages.append(("system", TOOL_OUTPUT_PREFIX.format(name=turn.name) + turn.content))
+            else:
+                messages.append((turn.role, turn.content))
+        return messages
+
+    def begin_turn(self) -> SessionTurn:
+        return SessionTurn(self.prompt_messages(), self.last_agent, {t.digest for t in self.turns if t.digest})
+
+    async def end_turn(self, turn: SessionTurn, question: str, answer: str) -> None:
+        """Record the question, the tool outputs and the answer, then bring the session back under budget."""
+        self._append("user", question)
+        for name, output in turn.tool_outputs:
+            self._append_tool_output(name, output)
+        self._append("assistant", answer_text(answer))
+        if turn.agent:
+            self.last_agent = turn.agent
+        await self._enforce_budget()
+
+    def _append(self, role: str, content: str) -> None:
+        self.turns.append(Turn(role, content, count_tokens(content)))
+
+    def _append_tool_output(self, name: str, output: str) -> None:
+        digest = _digest(output)
+        if any(t.digest == digest for t in self.turns):
+            self.metrics.count("tool_outputs_deduplicated")
+            reference = REPEATED_OUTPUT.format(name=name)
+            tokens = count_tokens(TOOL_OUTPUT_PREFIX.format(name=name) + reference)
+            self.turns.append(Turn("tool", reference, tokens, name, repeat_of=digest, full=output))
+            return
+        content = self._truncated(output)
+        self.turns.append(Turn("tool", content, count_tokens(TOOL_OUTPUT_PREFIX.format(name=name) + content), name, digest))
+
+    def _truncated(self, output: str) -> str:
+        if count_tokens(output) <= self.tool_output_tokens:
+            return output
+        self.metrics.count("tool_outputs_truncated")
+        # Characters per token of this output, so the cut lands close to the limit
+        chars = max(1, len(output) * self.tool_output_tokens // count_tokens(output))
+        return output[:chars].rstrip() + " …"
+
+    async def _enforce_budget(self) -> None:
+        window_budget = self.token_budget - self.summary_tokens
+        dropped: list[Turn] = []
+        while True:
+            while len(self.turns) > MIN_RECENT_TURNS and sum(t.tokens for t in self.turns) > window_budget:
+                dropped.append(self.turns.pop(0))
+            if not self._restore_orphaned_repeats():
+                break
+        if not dropped:
+            return
+        summary = self.summarizer(self.summary, dropped, self.summary_tokens - count_tokens(SUMMARY_PREFIX))
+        self.summary = await summary if inspect.isawaitable(summary) else summary
+        self.metrics.count("summaries")
+        self.metrics.count("turns_summarized", len(dropped))
+
+    def _restore_orphaned_repeats(self) -> bool:
+        """Put the full output back in repeats whose original left the window; True if any was."""
+        kept = {t.digest for t in self.turns if t.digest}
+        restored = False
+        for turn in self.turns:
+            if turn.repeat_of and turn.repeat_of not in kept:
+                turn.content = self._truncated(turn.full)
+                turn.tokens = count_tokens(TOOL_OUTPUT_PREFIX.format(name=turn.name) + turn.content)
+                turn.digest, turn.repeat_of, turn.full = turn.repeat_of, "", ""
+                kept.add(turn.digest)
+                restored = True
+        return restored
+
+
+class InMemorySessionBackend:
+    """Every session until it is dropped."""
+
+    def __init__(self):
+        self._sessions: dict[str, ConversationSession] = {}
+
+    def get(self, key: str) -> ConversationSession | None:
+        return self._sessions.get(key)
+
+    def put(self, key: str, session: ConversationSession) -> int:
+        """Store a session; returns how many were evicted to make room."""
+        self._sessions[key] = session
+        return 0
+
+    def delete(self, key: str) -> None:
+        self._sessions.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class LRUSessionBackend(InMemorySessionBackend):
+    """At most max_sessions sessions; the least recently used one is forgotten first."""
+
+    def __init__(self, max_sessions: int = 1000):
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: OrderedDict[str, ConversationSession] = OrderedDict()
+
+    def get(self, key: str) -> ConversationSession | None:
+        session = self._sessions.get(key)
+        if session is not None:
+            self._sessions.move_to_end(key)
+        return session
+
+    def put(self, key: str, session: ConversationSession) -> int:
+        self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        evicted = 0
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            evicted += 1
+        return evicted
+
+
+class SessionStore:
+    """Sessions by key, created on first use, in an in-memory or LRU backend."""
+
+    def __init__(self, backend: InMemorySessionBackend | None = None, key_mode: str = "session",
+                 summarizer: Summarizer = extractive_summary, token_budget: int = 3000,
+                 summary_tokens: int = 400, tool_output_tokens: int = 800):
+        self.backend = backend if backend is not None else LRUSessionBackend()
+        self.key_mode = key_mode
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.tool_output_tokens = tool_output_tokens
+        self.metrics = SessionMetrics()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, summarizer: Summarizer = extractive_summary) -> "SessionStore":
+        if os.getenv("SESSION_STORE", "lru") == "memory":
+            backend = InMemorySessionBackend()
+        else:
+            backend = LRUSessionBackend(int(os.getenv("SESSION_MAX", "1000")))
+        return cls(
+            backend=backend,
+            key_mode=os.getenv("SESSION_KEY", "session"),
+            summarizer=summarizer,
+            token_budget=int(os.getenv("SESSION_TOKEN_BUDGET", "3000")),
+            summary_tokens=int(os.getenv("SESSION_SUMMARY_TOKENS", "400")),
+            tool_output_tokens=int(os.getenv("SESSION_TOOL_OUTPUT_TOKENS", "800")),
+        )
+
+    def key_for(self, session_id: str | None, imsi: str | None = None) -> str | None:
+        """The session of a request: its session ID, or its IMSI with SESSION_KEY=imsi; None when off."""
+        if self.key_mode == "off":
+            return None
+        if session_id:
+            return f"session:{session_id}"
+        if self.key_mode == "imsi" and imsi:
+            return f"imsi:{imsi}"
+        return None
+
+    def session_for(self, session_id: str | None, imsi: str | None = None) -> ConversationSession | None:
+        """The request's session, created on first use.
+
+        Raises:
+            SessionMismatchError: If the stored session belongs to another IMSI
+        """
+        key = self.key_for(session_id, imsi)
+        if key is None:
+            return None
+        with self._lock:
+            session = self.backend.get(key)
+            if session is None:
+                session = ConversationSession(key, self.metrics, self.summarizer, self.token_budget,
+                                              self.summary_tokens, self.tool_output_tokens, imsi or None)
+                self.metrics.count("created")
+                evicted = self.backend.put(key, session)
+                if evicted:
+                    self.metrics.count("evicted", evicted)
+            elif session.imsi != (imsi or None):
+                self.metrics.count("rejected")
+                raise SessionMismatchError(f"Session {session_id} belongs to another customer")
+            return session
+
+    def drop(self, session_id: str | None, imsi: str | None = None) -> None:
+        key = self.key_for(session_id, imsi)
+        if key is not None:
+            with self._lock:
+                self.backend.delete(key)
+
+    def __len__(self) -> int:
+        return len(self.backend)
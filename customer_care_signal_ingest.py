@@ -0,0 +1,133 @@
+# Streaming reader for signalQualityIssuesDetail exports.
+# Emits datos.signalQualityIssuesDetail.detailSignalPlane entries one by one without ever
+# holding the whole parsed document, so memory stays flat regardless of the file size.
+
+import gzip
+import io
+import json
+import re
+from typing import Callable, Iterator
+
+DETAIL_SIGNAL_PLANE_PATH = ("datos", "signalQualityIssuesDetail", "detailSignalPlane")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+_SCALAR = re.compile(r"[^,\]}\s]+")
+_DECODER = json.JSONDecoder()
+
+
+def open_export(file_path: str, chunk_size: int = 1 << 20) -> io.TextIOBase:
+    """Open a plain or gzip-compressed export as text."""
+    with open(file_path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    if compressed:
+        return io.TextIOWrapper(gzip.open(file_path, "rb"), encoding="utf-8")
+    return open(file_path, "r", encoding="utf-8", buffering=chunk_size)
+
+
+class _Buffer:
+    """Sliding text window over a file; more() appends the next chunk, dropping consumed text."""
+
+    def __init__(self, stream: io.TextIOBase, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self.chars_read = 0
+
+    def more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.chars_read += len(chunk)
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self) -> str | None:
+        """Advance past whitespace and return the next character (None at EOF)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.more():
+                return None
+
+    def match(self, pattern: re.Pattern) -> str:
+        """Consume a token that must end before the end of the buffer (reads more if it might not)."""
+        while True:
+            m = pattern.match(self.text, self.pos)
+            if m and (m.end() < len(self.text) or self.eof):
+                self.pos = m.end()
+                return m.group()
+            if not self.more():
+                if m:
+                    self.pos = m.end()
+                    return m.group()
+                raise ValueError(f"Malformed JSON near character {self.chars_read - len(self.text) + self.pos}")
+
+    def decode_value(self):
+        """Decode one complete JSON value at the current position."""
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                self.pos = end
+                return value
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+
+
+def iter_signal_events(file_path: str, chunk_size: int = 1 << 20,
+                       progress: Callable[[int, int], None] | None = None,
+                       progress_every: int = 100_000,
+                       path: tuple[str, ...] = DETAIL_SIGNAL_PLANE_PATH) -> Iterator[dict]:
+    """Yield every element of the array at `path` (by default the detailSignalPlane events).
+
+    progress(records, chars_read) is called every `progress_every` records and once at the end.
+    """
+    records = 0
+    with open_export(file_path, chunk_size) as stream:
+        buf = _Buffer(stream, chunk_size)
+        # One frame per open container: [is_object, current_key, expecting_key]
+        stack: list[list] = []
+        while (char := buf.skip_whitespace()) is not None:
+            if char == '"':
+                token = json.loads(buf.match(_STRING))
+                if stack and stack[-1][0] and stack[-1][2]:
+                    stack[-1][1] = token
+                continue
+            if char in "{[":
+                keys = tuple(frame[1] for frame in stack if frame[0])
+                buf.pos += 1
+                if char == "[" and keys == path and len(keys) == len(stack):
+                    # Target array: decode its elements one at a time
+                    while (char := buf.skip_whitespace()) not in ("]", None):
+                        if char == ",":
+                            buf.pos += 1
+                            continue
+                        yield buf.decode_value()
+                        records += 1
+                        if progress and records % progress_every == 0:
+                            progress(records, buf.chars_read)
+                    buf.pos += 1
+                    continue
+                stack.append([char == "{", None, char == "{"])
+                continue
+            buf.pos += 1
+            if char in "}]":
+                stack.pop()
+            elif char == ":":
+                stack[-1][2] = False
+            elif char == ",":
+                if stack and stack[-1][0]:
+                    stack[-1][2] = True
+            else:
+                buf.pos -= 1
+                buf.match(_SCALAR)
+        if progress:
+            progress(records, buf.chars_read)
@@ -0,0 +1,169 @@
+# Hot reload of the knowledge base's signal events. The server keeps serving the current
+# SignalEventStore while a newer one is built on the side, then switches to it with a single
+# assignment, so a tool call in flight never sees a half-applied update:
+#
+# - a changed export (CUSTOMERS_FILE) is reloaded in full;
+# - detailSignalPlane records appended, one JSON object per line, to the delta file
+#   (CUSTOMERS_DELTA_FILE) are added to a copy of the current store, without re-reading the export.
+#
+# The files are polled every CUSTOMERS_RELOAD_INTERVAL seconds (0 turns watching off).
+
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from customer_care_signal_store import SignalEventStore, load_signal_store
+
+
+def _file_signature(path: str | None) -> tuple | None:
+    """(inode, size, mtime) of a file, None if it doesn't exist."""
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def read_delta_events(path: str, offset: int) -> tuple[list[dict], int]:
+    """Events on the complete lines of a JSONL delta file after byte offset, and the offset to read from next.
+
+    A line still being written (no trailing newline yet) is left for the next call; a line that
+    isn't a JSON object is reported on stderr and skipped.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    events = []
+    for number, line in enumerate(data[:end].splitlines()):
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError as e:
+            print(f"Skipping delta line {number + 1} after byte {offset} of {path}: {e}", file=sys.stderr)
+            continue
+        if isinstance(event, dict):
+            events.append(event)
+        else:
+            print(f"Skipping delta line {number + 1} after byte {offset} of {path}: not a JSON object", file=sys.stderr)
+    return events, offset + end
+
+
+@dataclass(frozen=True)
+class SignalDataSnapshot:
+    """One published version of the data; a tool call reads everything from the same snapshot."""
+    store: SignalEventStore
+    version: int
+    loaded_at: float
+    refresh: dict = field(default_factory=dict)
+
+
+class SignalDataReloader:
+    """Owns the knowledge base's current SignalDataSnapshot and replaces it when the sources change."""
+
+    def __init__(self, customers_file: str, delta_file: str | None = None,
+                 progress: Callable[[int, int], None] | None = None):
+        self.customers_file = customers_file
+        self.delta_file = delta_file
+        self.progress = progress
+        self._lock = threading.Lock()  # one refresh at a time
+        self._customers_signature = None
+        self._delta_signature = None
+        self._delta_offset = 0
+        self._watcher = None
+        self._stop = threading.Event()
+        self.current: SignalDataSnapshot | None = None
+        self.refresh()
+
+    @property
+    def store(self) -> SignalEventStore:
+        return self.current.store
+
+    def refresh(self) -> bool:
+        """Apply whatever changed since the last refresh; True if a new version was published."""
+        with self._lock:
+            customers_signature = _file_signature(self.customers_file)
+            delta_signature = _file_signature(self.delta_file)
+            if self.current is None or customers_signature != self._customers_signature:
+                self._reload(customers_signature, delta_signature)
+                return True
+            if delta_signature == self._delta_signature:
+                return False
+            if delta_signature is None or delta_signature[1] < self._delta_offset or (
+                    self._delta_signature is not None and delta_signature[0] != self._delta_signature[0]):
+                # The delta file was removed, truncated or replaced: its old events can't be taken back
+                # one by one, so rebuild from the export and whatever the delta file holds now
+                self._reload(customers_signature, delta_signature)
+                return True
+            return self._apply_delta(delta_signature)
+
+    def _reload(self, customers_signature: tuple | None, delta_signature: tuple | None) -> None:
+        start = time.perf_counter()
+        store = load_signal_store(self.customers_file, progress=self.progress)
+        loaded = len(store)
+        self._delta_offset = 0
+        if delta_signature is not None:
+            events, self._delta_offset = read_delta_events(self.delta_file, 0)
+            for event in events:
+                store.add(event)
+        store.finalize()
+        self._customers_signature, self._delta_signature = customers_signature, delta_signature
+        self._publish(store, {"kind": "full", "events_added": len(store) - loaded}, start)
+
+    def _apply_delta(self, delta_signature: tuple) -> bool:
+        start = time.perf_counter()
+        events, offset = read_delta_events(self.delta_file, self._delta_offset)
+        self._delta_signature = delta_signature
+        if offset == self._delta_offset:
+            return False
+        self._delta_offset = offset
+        # Readers keep using the current store while the copy is extended and sorted; the copy shares
+        # its columns and only copies the posting lists of the IMSIs and values the delta touches
+        store = self.current.store.copy()
+        for event in events:
+            store.add(event)
+        self._publish(store.finalize(), {"kind": "delta", "events_added": len(events)}, start)
+        return True
+
+    def _publish(self, store: SignalEventStore, refresh: dict, start: float) -> None:
+        refresh["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        version = self.current.version + 1 if self.current else 1
+        self.current = SignalDataSnapshot(store, version, time.time(), refresh)
+        print(f"Signal data version {version}: {refresh['kind']} refresh, {refresh['events_added']} events added, "
+              f"{len(store)} events in {refresh['duration_ms']:.0f} ms", file=sys.stderr)
+
+    def watch(self, interval: float) -> threading.Thread:
+        """Poll the sources every interval seconds in a daemon thread."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    # Keep serving the last good version; the next poll tries again
+                    print(f"Signal data refresh failed: {e}", file=sys.stderr)
+
+        self._watcher = threading.Thread(target=run, name="signal-data-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def status(self) -> dict:
+        snapshot = self.current
+        return {
+            "version": snapshot.version,
+            "events": len(snapshot.store),
+            "imsis": len(snapshot.store.imsis()),
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(snapshot.loaded_at)),
+            "last_refresh": snapshot.refresh,
+            "customers_file": self.customers_file,
+            "delta_file": self.delta_file,
+        }
@@ -0,0 +1,412 @@
+# Indexed store of detailSignalPlane events for the knowledge base MCP server.
+# Keeps every event per IMSI (sorted by timePeriod.startDateTime) plus secondary indexes.
+#
+# Events are stored column by column: repeated values (brand, model, apn, cellname, status...)
+# are dictionary-encoded into uint32 code arrays, IMSI/IMEI live in int64 arrays and start times
+# in an epoch-seconds array. Rows are only rebuilt as dicts when a tool returns them. Fields outside
+# EVENT_FIELDS are kept per row as they came, so a rebuilt event equals the original one.
+
+import bisect
+import threading
+from array import array
+from datetime import datetime
+from typing import Callable
+
+from customer_care_signal_ingest import iter_signal_events
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; filters fall back to plain Python
+    np = None
+
+# Flattened layout of one detailSignalPlane entry; nested objects use "parent.child"
+EVENT_FIELDS = (
+    "timePeriod.startDateTime", "timePeriod.endDateTime",
+    "imsi", "imei", "brand", "model", "os", "softwareVersion",
+    "roaming.status", "roaming.direction", "roaming.country", "roaming.operator",
+    "peerNumber", "callDuration", "SMCAddress", "apn", "accessType", "transaction",
+    "status", "causeDescription", "cellname", "cell", "MCC", "MNC", "LAC", "CI",
+    "failsceneid", "SAI",
+)
+INTEGER_FIELDS = ("imsi", "imei")
+START_FIELD = "timePeriod.startDateTime"
+
+# Secondary indexes
+INDEXED_FIELDS = ("imei", "cellname", "status", "accessType")
+# Top-level fields, and the known children of the nested objects ("roaming" -> {"status", ...})
+_TOP_LEVEL_FIELDS = frozenset(name for name in EVENT_FIELDS if "." not in name)
+_CHILDREN = {
+    parent: frozenset(name.partition(".")[2] for name in EVENT_FIELDS if name.startswith(parent + "."))
+    for parent in {name.partition(".")[0] for name in EVENT_FIELDS if "." in name}
+}
+
+_MISSING = object()
+_EPOCH = datetime(1970, 1, 1)
+
+
+def flatten_event(entry: dict) -> list:
+    """Values of a nested event dict in EVENT_FIELDS order (_MISSING where absent)."""
+    values = []
+    for name in EVENT_FIELDS:
+        parent, _, child = name.partition(".")
+        value = entry.get(parent, _MISSING)
+        if child:
+            value = value.get(child, _MISSING) if isinstance(value, dict) else _MISSING
+        values.append(value)
+    return values
+
+
+def extra_fields(entry: dict) -> dict | None:
+    """The parts of an event flatten_event() doesn't keep: unknown fields, unknown children of the
+    nested objects, and nested objects that aren't dicts or have none of the known children."""
+    extra = None
+    for name, value in entry.items():
+        children = _CHILDREN.get(name)
+        if children is None:
+            if name in _TOP_LEVEL_FIELDS:
+                continue
+        elif isinstance(value, dict) and children & value.keys():
+            unknown = {child: child_value for child, child_value in value.items() if child not in children}
+            if not unknown:
+                continue
+            value = unknown
+        if extra is None:
+            extra = {}
+        extra[name] = value
+    return extra
+
+
+def materialize_event(values, extra: dict | None = None) -> dict:
+    """Rebuild the original nested event dict from values in EVENT_FIELDS order and its extra_fields()."""
+    event: dict = {}
+    for name, value in zip(EVENT_FIELDS, values):
+        if value is _MISSING:
+            continue
+        parent, _, child = name.partition(".")
+        if child:
+            event.setdefault(parent, {})[child] = value
+        else:
+            event[parent] = value
+    for name, value in (extra or {}).items():
+        if isinstance(value, dict) and isinstance(event.get(name), dict):
+            event[name].update(value)
+        else:
+            event[name] = value
+    return event
+
+
+def to_epoch(timestamp) -> int:
+    """Seconds since 1970 for an ISO timestamp (timezone-naive, as in the exports); 0 if unparseable."""
+    try:
+        dt = datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return 0
+    if dt.tzinfo is not None:
+        return int(dt.timestamp())
+    return int((dt - _EPOCH).total_seconds())
+
+
+def _end_bound(end: str) -> str:
+    # A bare date ("2025-06-06") as the end of a range means the whole day
+    return end + "T23:59:59" if len(end) == 10 else end
+
+
+def _index_key(value) -> str:
+    return str(value)
+
+
+class DictionaryColumn:
+    """Column of repeated values stored as uint32 codes into a table of distinct values;
+    the rare unhashable value (a list or an object) is kept aside, coded as missing."""
+
+    def __init__(self):
+        self.values: list = []
+        self.codes_by_value: dict = {}
+        self.codes = array("I")
+        self.exceptions: dict[int, object] = {}
+
+    def append(self, value) -> int:
+        try:
+            code = self.codes_by_value.get(value)
+        except TypeError:
+            self.exceptions[len(self.codes)] = value
+            value, code = _MISSING, self.codes_by_value.get(_MISSING)
+        if code is None:
+            code = self.codes_by_value[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+        return code
+
+    def __getitem__(self, row_id: int):
+        if self.exceptions and row_id in self.exceptions:
+            return self.exceptions[row_id]
+        return self.values[self.codes[row_id]]
+
+    def code_of(self, value) -> int | None:
+        try:
+            return self.codes_by_value.get(value)
+        except TypeError:
+            return None
+
+    def copy(self, rows: int) -> "DictionaryColumn":
+        """Independent copy of the first rows values."""
+        column = DictionaryColumn()
+        column.values = list(self.values)
+        column.codes_by_value = dict(self.codes_by_value)
+        column.codes = self.codes[:rows]
+        column.exceptions = {row_id: value for row_id, value in self.exceptions.items() if row_id < rows}
+        return column
+
+
+class IntegerColumn:
+    """int64 column; the rare non-integer value (missing, string IMSI...) is kept aside."""
+
+    def __init__(self):
+        self.ints = array("q")
+        self.exceptions: dict[int, object] = {}
+
+    def append(self, value) -> None:
+        if type(value) is int and -(1 << 63) <= value < (1 << 63):
+            self.ints.append(value)
+        else:
+            self.exceptions[len(self.ints)] = value
+            self.ints.append(0)
+
+    def __getitem__(self, row_id: int):
+        if row_id in self.exceptions:
+            return self.exceptions[row_id]
+        return self.ints[row_id]
+
+    def copy(self, rows: int) -> "IntegerColumn":
+        """Independent copy of the first rows values."""
+        column = IntegerColumn()
+        column.ints = self.ints[:rows]
+        column.exceptions = {row_id: value for row_id, value in self.exceptions.items() if row_id < rows}
+        return column
+
+
+class SignalEventStore:
+    """All signal events, grouped by IMSI and sorted by start time, with secondary indexes.
+
+    Call add() for every event, then finalize() (queries finalize lazily if you forget).
+    A finalized store is only read; to add events while it is being queried, add them to a
+    copy() and switch readers over to the copy once it is finalized.
+
+    Rows are only ever appended, so a copy shares the columns with the store it was made from:
+    the copy appends its new rows after the ones the original can see (its own row count), and
+    only the posting lists it touches are copied. The columns belong to the newest copy; adding
+    events to an older store, or copying it again, is not supported.
+    """
+
+    def __init__(self):
+        self._columns = {
+            name: IntegerColumn() if name in INTEGER_FIELDS else DictionaryColumn()
+            for name in EVENT_FIELDS
+        }
+        self._start = self._columns[START_FIELD]
+        self._start_epochs_by_code = array("q")
+        self._start_epoch = array("q")
+        # row id -> extra_fields() of the events that have any
+        self._extra: dict[int, dict] = {}
+        self._by_imsi: dict[str, array] = {}
+        self._indexes: dict[str, dict[str, array]] = {field: {} for field in INDEXED_FIELDS}
+        # (index field, or None for the IMSI index, key) of the posting lists out of start-time order
+        self._unsorted: set[tuple[str | None, str]] = set()
+        self._rows = 0
+        # Posting lists this store may append to; None: all of them (nothing is shared)
+        self._owned: set[tuple[str | None, str]] | None = None
+        self._owns_columns = True
+        # Held while rows are appended to columns shared with older stores, and while numpy reads
+        # a column (an array exporting its buffer can't grow)
+        self._columns_lock = threading.Lock()
+        self._shares_columns = False
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def add(self, entry: dict) -> None:
+        if "imsi" not in entry:
+            return
+        if not self._owns_columns:
+            raise RuntimeError("This store was copied; add events to the copy")
+        if self._shares_columns:
+            with self._columns_lock:
+                self._add(entry)
+        else:
+            self._add(entry)
+
+    def _add(self, entry: dict) -> None:
+        row_id = self._rows
+        for name, value in zip(EVENT_FIELDS, flatten_event(entry)):
+            self._columns[name].append(value)
+        extra = extra_fields(entry)
+        if extra:
+            self._extra[row_id] = extra
+        # Parse each distinct start time only once
+        code = self._start.codes[row_id]
+        if code == len(self._start_epochs_by_code):
+            self._start_epochs_by_code.append(to_epoch(self._start.values[code]))
+        self._start_epoch.append(self._start_epochs_by_code[code])
+        self._rows += 1
+
+        self._post(None, _index_key(entry["imsi"]), row_id)
+        for field in self._indexes:
+            value = self._columns[field][row_id]
+            if value is not _MISSING:
+                self._post(field, _index_key(value), row_id)
+
+    def _post(self, field: str | None, key: str, row_id: int) -> None:
+        postings_by_key = self._by_imsi if field is None else self._indexes[field]
+        postings = postings_by_key.get(key)
+        if postings is None:
+            postings = postings_by_key[key] = array("I")
+            if self._owned is not None:
+                self._owned.add((field, key))
+        else:
+            if self._owned is not None and (field, key) not in self._owned:
+                # Still the list older stores read: copy it before the first append
+                postings = postings_by_key[key] = postings[:]
+                self._owned.add((field, key))
+            if self._start_epoch[postings[-1]] > self._start_epoch[row_id]:
+                self._unsorted.add((field, key))
+        postings.append(row_id)
+
+    def finalize(self) -> "SignalEventStore":
+        """Sort the IMSI and index posting lists by event start time (only those that need it,
+        so appending newer events to a loaded store doesn't re-sort everything)."""
+        start_of = self._start_epoch.__getitem__
+        for field, key in self._unsorted:
+            postings_by_key = self._by_imsi if field is None else self._indexes[field]
+            postings_by_key[key] = array("I", sorted(postings_by_key[key], key=start_of))
+        self._unsorted = set()
+        return self
+
+    def _ensure_sorted(self) -> None:
+        if self._unsorted:
+            self.finalize()
+
+    def copy(self) -> "SignalEventStore":
+        """Copy to add events to: this store keeps returning exactly what it returned before.
+
+        Shares the columns and posting lists (see the class docstring), so it costs one pointer per
+        IMSI and indexed value instead of a copy of every event; a store whose columns already
+        went to another copy is copied in full.
+        """
+        self._ensure_sorted()
+        store = SignalEventStore.__new__(SignalEventStore)
+        store._unsorted = set()
+        store._rows = self._rows
+        store._by_imsi = dict(self._by_imsi)
+        store._indexes = {field: dict(index) for field, index in self._indexes.items()}
+        store._owned = set()
+        store._owns_columns = True
+        if self._owns_columns:
+            store._columns = self._columns
+            store._start_epochs_by_code = self._start_epochs_by_code
+            store._start_epoch = self._start_epoch
+            store._extra = self._extra
+            store._columns_lock = self._columns_lock
+            store._shares_columns = True
+            self._owns_columns = False
+        else:
+            store._columns = {name: column.copy(self._rows) for name, column in self._columns.items()}
+            store._start_epochs_by_code = self._start_epochs_by_code[:]
+            store._start_epoch = self._start_epoch[:self._rows]
+            store._extra = {row_id: extra for row_id, extra in self._extra.items() if row_id < self._rows}
+            store._columns_lock = threading.Lock()
+            store._shares_columns = False
+        store._start = store._columns[START_FIELD]
+        return store
+
+    def imsis(self) -> list[str]:
+        return list(self._by_imsi)
+
+    def _range(self, postings: array, start: str | None, end: str | None) -> array:
+        self._ensure_sorted()
+        if not start and not end:
+            return postings
+        start_of = self._start_epoch.__getitem__
+        lo = bisect.bisect_left(postings, to_epoch(start), key=start_of) if start else 0
+        hi = bisect.bisect_right(postings, to_epoch(_end_bound(end)), key=start_of) if end else len(postings)
+        return postings[lo:hi]
+
+    def events_for_imsi(self, imsi: str, start: str | None = None, end: str | None = None) -> array:
+        """Row ids of an IMSI's events within [start, end], oldest first."""
+        return self._range(self._by_imsi.get(_index_key(imsi), array("I")), start, end)
+
+    def find(self, field: str, value, start: str | None = None, end: str | None = None) -> array:
+        """Row ids of events whose indexed field equals value, within [start, end], oldest first."""
+        if field not in self._indexes:
+            raise KeyError(f"Field '{field}' is not indexed. Indexed fields: {', '.join(INDEXED_FIELDS)}")
+        return self._range(self._indexes[field].get(_index_key(value), array("I")), start, end)
+
+    def filter(self, row_ids: array, field: str, value, exclude: bool = False) -> array:
+        """Keep the row ids whose field equals value (or differs from it with exclude=True);
+        vectorized with numpy when it is installed."""
+        column = self._columns[field]
+        code = column.code_of(value) if isinstance(column, DictionaryColumn) else None
+        if code is None and (not isinstance(column, DictionaryColumn) or column.exceptions):
+            return array("I", (row_id for row_id in row_ids if (column[row_id] == value) != exclude))
+        if code is None or not row_ids:
+            return array("I", row_ids) if exclude else array("I")
+        if np is not None:
+            ids = np.frombuffer(row_ids, dtype=np.uint32)
+            with self._columns_lock:
+                codes = np.frombuffer(column.codes, dtype=np.uint32)[ids]
+            mask = codes != code if exclude else codes == code
+            return array("I", ids[mask].tobytes())
+        codes = column.codes
+        return array("I", (row_id for row_id in row_ids if (codes[row_id] == code) != exclude))
+
+    def value_counts(self, row_ids: array, field: str) -> dict:
+        """Count the values of a dictionary-encoded field over row_ids (numpy bincount when available);
+        events without the field, or with a list or object in it, are not counted."""
+        column = self._columns[field]
+        if not row_ids:
+            return {}
+        if np is not None:
+            ids = np.frombuffer(row_ids, dtype=np.uint32)
+            with self._columns_lock:
+                codes = np.frombuffer(column.codes, dtype=np.uint32)[ids]
+            counts = np.bincount(codes)
+            return {column.values[code]: int(count) for code, count in enumerate(counts)
+                    if count and column.values[code] is not _MISSING}
+        counts: dict[int, int] = {}
+        codes = column.codes
+        for row_id in row_ids:
+            code = codes[row_id]
+            counts[code] = counts.get(code, 0) + 1
+        return {column.values[code]: count for code, count in counts.items() if column.values[code] is not _MISSING}
+
+    def value(self, row_id: int, field: str):
+        """Value of one field of one event; None if the event doesn't have it."""
+        value = self._columns[field][row_id]
+        return None if value is _MISSING else value
+
+    def materialize(self, row_id: int) -> dict:
+        return materialize_event((self._columns[name][row_id] for name in EVENT_FIELDS), self._extra.get(row_id))
+
+    def latest_event(self, imsi: str) -> dict | None:
+        self._ensure_sorted()
+        postings = self._by_imsi.get(_index_key(imsi))
+        return self.materialize(postings[-1]) if postings else None
+
+    def page(self, row_ids: array, offset: int = 0, limit: int = 50) -> dict:
+        """Materialize one page of results."""
+        offset = max(0, offset)
+        limit = max(1, min(limit, 500))
+        return {
+            "total": len(row_ids),
+            "offset": offset,
+            "limit": limit,
+            "events": [self.materialize(row_id) for row_id in row_ids[offset:offset + limit]],
+        }
+
+
+def load_signal_store(file_path: str, progress: Callable[[int, int], None] | None = None) -> SignalEventStore:
+    """Load a signalQualityIssuesDetail export (JSON with datos.signalQualityIssuesDetail.detailSignalPlane,
+    optionally gzip-compressed), streaming the events into the store one by one."""
+    store = SignalEventStore()
+    for entry in iter_signal_events(file_path, progress=progress):
+        store.add(entry)
+    return store.finalize()
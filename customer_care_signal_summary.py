@@ -0,0 +1,86 @@
+# Signal-quality summaries computed server-side from the SignalEventStore, so the knowledge base
+# returns a few hundred bytes of JSON instead of raw event dumps to the LLM.
+
+from array import array
+
+from customer_care_signal_store import SignalEventStore
+
+SUCCESS_STATUS = "Success"
+NO_ROAMING = "No Roaming"
+NO_CAUSE = "--"
+
+
+def _rate(part: int, total: int) -> float:
+    return round(part / total, 4) if total else 0.0
+
+
+def failure_rate_by_transaction(store: SignalEventStore, row_ids: array, failed: array) -> dict:
+    totals = store.value_counts(row_ids, "transaction")
+    failures = store.value_counts(failed, "transaction")
+    return {
+        transaction: {"events": total, "failures": failures.get(transaction, 0),
+                      "failure_rate": _rate(failures.get(transaction, 0), total)}
+        for transaction, total in sorted(totals.items(), key=lambda item: -item[1])
+    }
+
+
+def top_failing_cells(store: SignalEventStore, failed: array, top: int = 5) -> list[dict]:
+    counts = store.value_counts(failed, "cellname")
+    ranked = sorted(counts.items(), key=lambda item: -item[1])[:top]
+    return [{"cellname": cell, "failures": count} for cell, count in ranked]
+
+
+def cause_histogram(store: SignalEventStore, failed: array) -> dict:
+    counts = store.value_counts(failed, "causeDescription")
+    counts.pop(NO_CAUSE, None)
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+def access_type_share(store: SignalEventStore, row_ids: array) -> dict:
+    counts = store.value_counts(row_ids, "accessType")
+    # Sorted as text: an export may mix value types in one field
+    return {access: _rate(count, len(row_ids)) for access, count in sorted(counts.items(), key=lambda item: str(item[0]))}
+
+
+def roaming_periods(store: SignalEventStore, row_ids: array) -> list[dict]:
+    """Consecutive runs of roaming events (row_ids must be in time order)."""
+    periods = []
+    current = None
+    for row_id in row_ids:
+        status = store.value(row_id, "roaming.status")
+        if status == NO_ROAMING or not isinstance(status, str):
+            current = None
+            continue
+        country = store.value(row_id, "roaming.country")
+        operator = store.value(row_id, "roaming.operator")
+        start = store.value(row_id, "timePeriod.startDateTime")
+        if current and current["country"] == country and current["operator"] == operator:
+            current["end"] = store.value(row_id, "timePeriod.endDateTime")
+            current["events"] += 1
+        else:
+            current = {"start": start, "end": store.value(row_id, "timePeriod.endDateTime"),
+                       "status": status, "direction": store.value(row_id, "roaming.direction"),
+                       "country": country, "operator": operator, "events": 1}
+            periods.append(current)
+    return periods
+
+
+def summarize_signal_events(store: SignalEventStore, row_ids: array, top: int = 5) -> dict:
+    """Compact signal-quality summary of a set of events (normally one IMSI over a time window)."""
+    failed = store.filter(row_ids, "status", SUCCESS_STATUS, exclude=True)
+    summary = {
+        "events": len(row_ids),
+        "failures": len(failed),
+        "failure_rate": _rate(len(failed), len(row_ids)),
+    }
+    if row_ids:
+        summary["first_event"] = store.value(row_ids[0], "timePeriod.startDateTime")
+        summary["last_event"] = store.value(row_ids[-1], "timePeriod.startDateTime")
+    summary.update({
+        "by_transaction": failure_rate_by_transaction(store, row_ids, failed),
+        "top_failing_cells": top_failing_cells(store, failed, top),
+        "failure_causes": cause_histogram(store, failed),
+        "access_type_share": access_type_share(store, row_ids),
+        "roaming_periods": roaming_periods(store, row_ids),
+    })
+    return summary
@@ -0,0 +1,114 @@
+# Single-flight coalescing: concurrent identical work (the same normalized question for the same
+# customer facts, the same MCP tool with the same arguments) runs once, and every duplicate that
+# arrives while it is in flight waits for that result instead of starting its own LLM or HTTP work.
+# A question whose answer reads the customer's data is only identical for the same IMSI.
+# Nothing is kept after the flight lands; reusing finished answers is the response cache's job.
+
+import asyncio
+import threading
+
+
+class FlightAbandoned(Exception):
+    """The leader stopped (cancelled, client disconnected) before producing a result."""
+
+
+class CoalescingMetrics:
+    """Flights started (leaders), duplicates that waited on one (coalesced), leaders that gave up."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            calls = self.leaders + self.coalesced
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "abandoned": self.abandoned,
+                "coalesced_rate": self.coalesced / calls if calls else 0.0,
+            }
+
+
+class Flight:
+    """One caller's membership in a flight: the leader does the work, followers wait()."""
+
+    def __init__(self, group: "SingleFlight", key, future: asyncio.Future, leader: bool):
+        self._group = group
+        self.key = key
+        self.future = future
+        self.leader = leader
+
+    async def wait(self):
+        """The leader's result (or its exception); shielded so a cancelled follower doesn't cancel the others."""
+        return await asyncio.shield(self.future)
+
+    def resolve(self, result) -> None:
+        if not self.future.done():
+            self.future.set_result(result)
+        self._group._land(self)
+
+    def fail(self, exc: BaseException) -> None:
+        if not self.future.done():
+            self.future.set_exception(exc)
+            self.future.exception()  # retrieved: no "never retrieved" warning when nobody followed
+        self._group._land(self)
+
+    def abandon(self) -> None:
+        """Called by a leader that stops early; its followers then do the work themselves."""
+        if not self.future.done():
+            self._group.metrics.count("abandoned")
+            self.fail(FlightAbandoned(f"flight {self.key!r} abandoned by its leader"))
+
+
+class SingleFlight:
+    """Table of in-flight work by key, for one event loop."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.metrics = CoalescingMetrics()
+        self._flights: dict = {}
+
+    def join(self, key) -> Flight | None:
+        """Lead a new flight for key, or follow the one in progress; None when coalescing is off."""
+        if not self.enabled or key is None:
+            return None
+        future = self._flights.get(key)
+        if future is not None and not future.done():
+            self.metrics.count("coalesced")
+            return Flight(self, key, future, leader=False)
+        future = asyncio.get_running_loop().create_future()
+        self._flights[key] = future
+        self.metrics.count("leaders")
+        return Flight(self, key, future, leader=True)
+
+    async def run(self, key, work):
+        """Await work() once for every concurrent caller with the same key."""
+        flight = self.join(key)
+        if flight is None:
+            return await work()
+        if not flight.leader:
+            try:
+                return await flight.wait()
+            except FlightAbandoned:
+                return await self.run(key, work)
+        try:
+            result = await work()
+        except Exception as e:
+            flight.fail(e)
+            raise
+        except BaseException:
+            flight.abandon()
+            raise
+        flight.resolve(result)
+        return result
+
+    def _land(self, flight: Flight) -> None:
+        if self._flights.get(flight.key) is flight.future:
+            del self._flights[flight.key]
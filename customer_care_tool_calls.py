@@ -0,0 +1,69 @@
+# Parallel execution of the tool calls of one assistant message.
+# Semantic Kernel already dispatches every function call of a message with asyncio.gather, and each
+# PooledMCPStdioPlugin bounds how many of them reach its server at once. What it doesn't do is keep
+# the results in order: each tool message is appended to the chat history when its call finishes.
+
+import asyncio
+
+from pydantic import PrivateAttr
+from semantic_kernel import Kernel
+from semantic_kernel.contents import ChatHistory
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+
+class _OrderedBatch:
+    """Lets the results of one message's calls into the history in request order."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.next_index = 0
+        self._turn = asyncio.Condition()
+
+    async def append_in_order(self, index: int, chat_history: ChatHistory, messages: list) -> None:
+        async with self._turn:
+            await self._turn.wait_for(lambda: self.next_index == index)
+            for message in messages:
+                chat_history.add_message(message)
+            self.next_index += 1
+            self._turn.notify_all()
+
+    @property
+    def done(self) -> bool:
+        return self.next_index >= self.size
+
+
+def _requested_call_ids(chat_history: ChatHistory, function_call: FunctionCallContent) -> tuple[int, list[str]]:
+    """(id of the assistant message that requested function_call, ids of all its calls in order)."""
+    for message in reversed(chat_history.messages):
+        if message.role != AuthorRole.ASSISTANT:
+            continue
+        ids = [item.id for item in message.items if isinstance(item, FunctionCallContent)]
+        if function_call.id in ids:
+            return id(message), ids
+        break
+    return 0, []
+
+
+class OrderedToolCallKernel(Kernel):
+    """Kernel that runs the tool calls of one assistant message concurrently (as Semantic Kernel does)
+    but merges their results into the chat history in the order the model asked for them."""
+
+    _batches: dict = PrivateAttr(default_factory=dict)
+
+    async def invoke_function_call(self, function_call: FunctionCallContent, chat_history: ChatHistory, **kwargs):
+        message_id, ids = _requested_call_ids(chat_history, function_call)
+        if len(ids) < 2:
+            return await super().invoke_function_call(function_call, chat_history, **kwargs)
+
+        batch = self._batches.setdefault(message_id, _OrderedBatch(len(ids)))
+        # The call writes into a copy (filters still see the whole conversation); its new messages
+        # are moved to the real history once every earlier call has been merged
+        scratch = ChatHistory(messages=list(chat_history.messages))
+        known = len(scratch.messages)
+        try:
+            return await super().invoke_function_call(function_call, scratch, **kwargs)
+        finally:
+            await batch.append_in_order(ids.index(function_call.id), chat_history, scratch.messages[known:])
+            if batch.done:
+                self._batches.pop(message_id, None)
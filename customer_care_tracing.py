@@ -0,0 +1,244 @@
+# Per-stage spans for the customer care pipeline (routing, manager call, prefetch, MCP tool calls,
+# LLM streaming...). Spans nest through a context variable and are handed to pluggable exporters.
+# With no exporter configured tracer.span() returns a shared no-op span, so instrumentation costs
+# a function call and nothing else.
+#
+# CUSTOMER_CARE_TRACING selects the exporters: comma-separated "log", "otel" and/or "memory".
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # OpenTelemetry is optional; only OpenTelemetryExporter needs it
+    otel_trace = None
+
+logger = logging.getLogger("customer_care_tracing")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict = field(default_factory=dict)
+    status: str = "ok"
+    _tracer: "Tracer | None" = field(default=None, repr=False)
+    _parent: "Span | None" = field(default=None, repr=False)
+    _token: object = field(default=None, repr=False)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: float = 1) -> None:
+        """Accumulate a counter attribute (tokens, chunks...)."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def mark(self, key: str) -> None:
+        """Record the time since the span started, in ms, the first time key is marked."""
+        self.attributes.setdefault(key, round(self.duration_ms, 3))
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.status = "error"
+            self.attributes.setdefault("error", f"{exc_type.__name__}: {exc}")
+        self._tracer._finish(self)
+
+
+class _NoopSpan:
+    """Returned by a disabled tracer; every method does nothing."""
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+    def mark(self, key):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_CURRENT_SPAN: ContextVar[Span | None] = ContextVar("customer_care_span", default=None)
+
+
+class Tracer:
+    """Creates spans and hands them to the exporters when they start and finish."""
+
+    def __init__(self, exporters: list | None = None):
+        self.exporters = list(exporters or [])
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        exporters = []
+        for name in os.getenv("CUSTOMER_CARE_TRACING", "").split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name not in EXPORTERS:
+                logger.warning("Unknown tracing exporter '%s' (use: %s)", name, ", ".join(EXPORTERS))
+                continue
+            exporters.append(EXPORTERS[name]())
+        return cls(exporters)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def span(self, name: str, **attributes):
+        """Context manager timing one stage; nested spans become its children."""
+        if not self.exporters:
+            return NOOP_SPAN
+        parent = _CURRENT_SPAN.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+            _tracer=self,
+            _parent=parent,
+        )
+        span._token = _CURRENT_SPAN.set(span)
+        for exporter in self.exporters:
+            exporter.on_start(span)
+        return span
+
+    def current_span(self):
+        """The innermost open span of this task (the no-op span when there is none)."""
+        return _CURRENT_SPAN.get() or NOOP_SPAN
+
+    def _finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        try:
+            _CURRENT_SPAN.reset(span._token)
+        except ValueError:
+            # Async generators may be closed from another context; just restore the parent there
+            _CURRENT_SPAN.set(span._parent)
+        for exporter in self.exporters:
+            try:
+                exporter.on_end(span)
+            except Exception as e:
+                logger.debug("Tracing exporter %s failed: %s", type(exporter).__name__, e)
+
+
+class LogExporter:
+    """One structured (JSON) log line per finished span."""
+
+    def __init__(self, log: logging.Logger | None = None, level: int = logging.INFO):
+        self.log = log or logger
+        self.level = level
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        self.log.log(self.level, "span %s", json.dumps(span.to_dict(), ensure_ascii=False, default=str))
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list (tests, benchmarks)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: list[Span] = []
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def by_name(self, name: str) -> list[Span]:
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+
+class OpenTelemetryExporter:
+    """Mirrors every span into OpenTelemetry (configure the SDK and its exporter as usual)."""
+
+    def __init__(self, tracer_name: str = "customer_care"):
+        if otel_trace is None:
+            raise RuntimeError("OpenTelemetryExporter requires the opentelemetry-api package")
+        self.tracer = otel_trace.get_tracer(tracer_name)
+        self._open: dict[str, object] = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._open.get(span.parent_id)
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        self._open[span.span_id] = self.tracer.start_span(span.name, context=context, start_time=span.start_ns)
+
+    def on_end(self, span: Span) -> None:
+        otel_span = self._open.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        for key, value in span.attributes.items():
+            otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+        if span.status == "error":
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+        otel_span.end(end_time=span.end_ns)
+
+
+EXPORTERS = {
+    "log": LogExporter,
+    "memory": InMemoryExporter,
+    "otel": OpenTelemetryExporter,
+}
+
+
+def record_usage(span, message) -> None:
+    """Add the token usage of a Semantic Kernel message or agent response (metadata["usage"]) to a span."""
+    metadata = getattr(getattr(message, "message", message), "metadata", None) or {}
+    usage = metadata.get("usage")
+    if usage is None:
+        return
+    span.add("llm_calls")
+    span.add("prompt_tokens", getattr(usage, "prompt_tokens", None) or 0)
+    span.add("completion_tokens", getattr(usage, "completion_tokens", None) or 0)
+
+
+_TRACER = Tracer.from_env()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    return _TRACER
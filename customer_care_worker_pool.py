@@ -0,0 +1,395 @@
+# Warm worker processes for the legacy HTTP handler (customer_care_azure_function.py).
+# Instead of starting a new interpreter per request, a few long-lived processes import the agent
+# stack once, keep their agent registry and MCP sessions, and answer the questions the pool sends
+# them over a pipe of their own; answers come back on the same pipe.
+#
+# - each worker answers up to AGENT_WORKER_CONCURRENCY questions at once on its event loop; the
+#   pool queues the questions and hands each one to the least busy worker with room. (Workers
+#   don't share a multiprocessing queue: one killed while reading it would keep the queue's lock
+#   and block the others);
+# - every request has a deadline (AGENT_REQUEST_TIMEOUT): the worker cancels the question when
+#   it passes and the caller stops waiting;
+# - after AGENT_WORKER_MAX_REQUESTS questions a worker stops taking requests, finishes the ones it
+#   has and exits, and a replacement is started (bounding leaks and fragmentation); a worker that
+#   dies is replaced too, and the questions it had taken fail at once with WorkerCrashedError
+#   instead of waiting for their timeout.
+
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import time
+from collections import deque
+
+# Workers dying before they are ready this many times in a row means they can't start at all
+MAX_STARTUP_FAILURES = 3
+
+logger = logging.getLogger("customer_care_worker_pool")
+
+
+class WorkerTimeout(TimeoutError):
+    """The question wasn't answered within the request timeout."""
+
+
+class WorkerError(RuntimeError):
+    """The worker failed to answer; kind is the exception type raised in the worker."""
+
+    def __init__(self, message: str, kind: str = "", retry_after: float | None = None):
+        super().__init__(message)
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class WorkerCrashedError(WorkerError):
+    """The worker answering the question exited before it answered."""
+
+
+class WorkerPoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.crashed = 0
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+                "crashed": self.crashed,
+            }
+
+
+def _worker_main(worker_id: int, conn, concurrency: int, max_requests: int) -> None:
+    """Worker process: answer the questions sent on conn until it is recycled or told to stop."""
+    import customer_care_agent_mgr
+    from customer_care_mcp_pool import get_mcp_pool
+
+    async def answer(request_id: int, question: str, imsi: str | None, deadline: float) -> None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            conn.send(("answer", request_id, None, {"type": "WorkerTimeout", "message": "expired in the queue"}))
+            return
+        try:
+            result = await asyncio.wait_for(customer_care_agent_mgr.process_question(question, imsi), remaining)
+        except asyncio.TimeoutError:
+            conn.send(("answer", request_id, None, {"type": "WorkerTimeout", "message": f"no answer after {remaining:.1f} s"}))
+        except Exception as e:
+            conn.send(("answer", request_id, None, {"type": type(e).__name__, "message": str(e),
+                                                    "retry_after": getattr(e, "retry_after", None)}))
+        else:
+            conn.send(("answer", request_id, result, None))
+
+    async def serve() -> int:
+        loop = asyncio.get_running_loop()
+        try:
+            await customer_care_agent_mgr.get_registry().ensure_started()
+        except RuntimeError:
+            pass  # Not configured: every question will report the error
+        conn.send(("ready", worker_id))
+        slots = asyncio.Semaphore(concurrency)
+        tasks = set()
+        served = 0
+        while max_requests <= 0 or served < max_requests:
+            await slots.acquire()
+            try:
+                item = await loop.run_in_executor(None, conn.recv)
+            except EOFError:
+                break  # the pool is gone
+            if item is None:
+                break
+            served += 1
+            task = asyncio.create_task(answer(*item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+        conn.send(("retiring", worker_id))
+        if tasks:
+            await asyncio.gather(*tasks)
+        await get_mcp_pool().close()
+        return served
+
+    served = asyncio.run(serve())
+    conn.send(("exit", worker_id, served))
+    conn.close()
+
+
+class AgentWorkerPool:
+    """Pre-started worker processes running process_question(), fed by the pool's request queue."""
+
+    def __init__(self, workers: int = 2, concurrency: int = 8, max_requests: int = 500, timeout: float = 120.0):
+        self.workers = max(1, workers)
+        self.concurrency = max(1, concurrency)
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.metrics = WorkerPoolMetrics()
+        self._context = multiprocessing.get_context("spawn")
+        # Requests no worker had room for yet, oldest first
+        self._backlog: deque[tuple] = deque()
+        self._pending: dict[int, concurrent.futures.Future] = {}
+        self._ids = itertools.count()
+        self._worker_ids = itertools.count()
+        self._processes: dict[int, multiprocessing.Process] = {}
+        self._conns: dict[int, multiprocessing.connection.Connection] = {}
+        # Per worker: the requests it has and hasn't answered yet, and how many it was sent in all
+        self._in_flight: dict[int, set[int]] = {}
+        self._sent: dict[int, int] = {}
+        self._worker_of: dict[int, int] = {}
+        self._retiring: set[int] = set()
+        self._ready_ids: set[int] = set()
+        self._startup_failures = 0
+        self._broken: str | None = None
+        self._ready = threading.Semaphore(0)
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(self.workers):
+            self._spawn()
+        self._collector = threading.Thread(target=self._collect, name="agent-worker-pool", daemon=True)
+        self._collector.start()
+
+    @classmethod
+    def from_env(cls) -> "AgentWorkerPool":
+        return cls(
+            workers=int(os.getenv("AGENT_WORKERS", min(4, os.cpu_count() or 1))),
+            concurrency=int(os.getenv("AGENT_WORKER_CONCURRENCY", "8")),
+            max_requests=int(os.getenv("AGENT_WORKER_MAX_REQUESTS", "500")),
+            timeout=float(os.getenv("AGENT_REQUEST_TIMEOUT", "120")),
+        )
+
+    def _spawn(self) -> None:
+        worker_id = next(self._worker_ids)
+        conn, worker_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, name=f"agent-worker-{worker_id}", daemon=True,
+            args=(worker_id, worker_conn, self.concurrency, self.max_requests),
+        )
+        process.start()
+        # Only the worker holds its end now, so the pipe reports EOF as soon as the process is gone
+        worker_conn.close()
+        self._processes[worker_id] = process
+        self._conns[worker_id] = conn
+        self._in_flight[worker_id] = set()
+        self._sent[worker_id] = 0
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Block until every initial worker has warmed up (imports, agents, MCP sessions)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for _ in range(self.workers):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._ready.acquire(timeout=remaining):
+                return False
+        return True
+
+    def submit(self, question: str, imsi: str | None = None, timeout: float | None = None) -> concurrent.futures.Future:
+        """Queue a question; the future gets the answer, or a WorkerError/WorkerTimeout."""
+        if self._closed:
+            raise RuntimeError("The agent worker pool is closed")
+        if self._broken:
+            raise WorkerError(self._broken)
+        request_id = next(self._ids)
+        future = concurrent.futures.Future()
+        future.request_id = request_id
+        self._pending[request_id] = future
+        self.metrics.count("submitted")
+        with self._lock:
+            self._backlog.append((request_id, question, imsi, time.time() + (timeout or self.timeout)))
+            self._dispatch()
+        return future
+
+    async def answer(self, question: str, imsi: str | None = None, timeout: float | None = None) -> str:
+        """Answer a question on a warm worker without blocking the caller's event loop."""
+        timeout = timeout or self.timeout
+        future = self.submit(question, imsi, timeout)
+        try:
+            # A little grace so the worker's own timeout report usually arrives first
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout + 1.0)
+        except asyncio.TimeoutError:
+            if self._pending.pop(future.request_id, None) is not None:
+                self.metrics.count("timeouts")
+            raise WorkerTimeout(f"No answer after {timeout:g} s") from None
+        finally:
+            # Also when the caller is cancelled: a late answer then finds nobody waiting for it
+            self._pending.pop(future.request_id, None)
+
+    def _dispatch(self) -> None:
+        """Send queued requests to the least busy workers that have room (called with the lock held)."""
+        while self._backlog:
+            candidates = [
+                worker_id for worker_id in self._conns
+                if worker_id in self._ready_ids and worker_id not in self._retiring
+                and len(self._in_flight[worker_id]) < self.concurrency
+                and (self.max_requests <= 0 or self._sent[worker_id] < self.max_requests)
+            ]
+            if not candidates:
+                return
+            item = self._backlog.popleft()
+            request_id = item[0]
+            if request_id not in self._pending:
+                continue  # the caller already gave up on it
+            worker_id = min(candidates, key=lambda candidate: len(self._in_flight[candidate]))
+            try:
+                self._conns[worker_id].send(item)
+            except OSError:
+                # Dead; the collector reads its EOF and replaces it
+                self._backlog.appendleft(item)
+                self._ready_ids.discard(worker_id)
+                continue
+            self._in_flight[worker_id].add(request_id)
+            self._worker_of[request_id] = worker_id
+            self._sent[worker_id] += 1
+
+    def _collect(self) -> None:
+        """Route responses to their futures, replace recycled and dead workers."""
+        while not self._closed or self._processes:
+            with self._lock:
+                workers = {conn: worker_id for worker_id, conn in self._conns.items()}
+            if not workers:
+                time.sleep(0.1)
+                continue
+            for conn in multiprocessing.connection.wait(list(workers), timeout=0.5):
+                worker_id = workers[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    # Everything it sent before exiting has been read: what it still has is lost
+                    self._worker_exited(worker_id)
+                    continue
+                try:
+                    self._handle(message)
+                except Exception:
+                    # One bad message must not stop every later request from resolving
+                    logger.exception("Agent worker pool collector failed on a message")
+
+    def _handle(self, message: tuple) -> None:
+        kind = message[0]
+        if kind == "answer":
+            self._resolve(*message[1:])
+        elif kind == "ready":
+            with self._lock:
+                self._ready_ids.add(message[1])
+                self._startup_failures = 0
+                self._dispatch()
+            self._ready.release()
+        elif kind == "retiring":
+            with self._lock:
+                self._retiring.add(message[1])
+                if not self._closed:
+                    self.metrics.count("recycled")
+                    self._spawn()
+        elif kind == "exit":
+            logger.info("Agent worker %s exited after %s questions", message[1], message[2])
+
+    def _resolve(self, request_id: int, result, error: dict | None) -> None:
+        with self._lock:
+            worker_id = self._worker_of.pop(request_id, None)
+            if worker_id is not None and worker_id in self._in_flight:
+                self._in_flight[worker_id].discard(request_id)
+            self._dispatch()
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            return  # the caller already gave up on it (timed out or cancelled)
+        if error is None:
+            self.metrics.count("completed")
+            future.set_result(result)
+        elif error["type"] == "WorkerTimeout":
+            self.metrics.count("timeouts")
+            future.set_exception(WorkerTimeout(error["message"]))
+        else:
+            self.metrics.count("failed")
+            future.set_exception(WorkerError(error["message"], error["type"], error.get("retry_after")))
+
+    def _worker_exited(self, worker_id: int) -> None:
+        """Forget a worker whose pipe closed, fail what it hadn't answered and, if it died, replace it."""
+        with self._lock:
+            process = self._processes.pop(worker_id)
+            self._conns.pop(worker_id).close()
+            lost = self._in_flight.pop(worker_id)
+            self._sent.pop(worker_id)
+        process.join(timeout=5)
+        with self._lock:
+            retiring, was_ready = worker_id in self._retiring, worker_id in self._ready_ids
+            self._retiring.discard(worker_id)
+            self._ready_ids.discard(worker_id)
+            # Recycled, stopped by close(), or not restarted any more: not a crash
+            crashed = not (retiring or self._closed or self._broken)
+            if crashed:
+                self.metrics.count("crashed")
+            for request_id in lost:
+                self._worker_of.pop(request_id, None)
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    self.metrics.count("failed")
+                    future.set_exception(WorkerCrashedError(
+                        f"Agent worker {worker_id} exited (exit code {process.exitcode}) before answering",
+                        "WorkerCrashedError"))
+            if not crashed:
+                return
+            if not was_ready:
+                self._startup_failures += 1
+                if self._startup_failures >= MAX_STARTUP_FAILURES:
+                    self._fail_all(f"Agent workers exited {self._startup_failures} times in a row before "
+                                   f"they were ready (exit code {process.exitcode})")
+                    return
+            self._spawn()
+
+    def _fail_all(self, message: str) -> None:
+        self._broken = message
+        self._backlog.clear()
+        for request_id in list(self._pending):
+            future = self._pending.pop(request_id, None)
+            if future is not None and not future.done():
+                self.metrics.count("failed")
+                future.set_exception(WorkerError(message))
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Stop taking requests, let the workers finish what they have, and stop them; questions
+        still waiting for a worker fail."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            processes = list(self._processes.values())
+            for request_id, *_ in self._backlog:
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(WorkerError("The agent worker pool is closed"))
+            self._backlog.clear()
+            for conn in self._conns.values():
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        self._collector.join(timeout=5)
+
+
+_POOL: AgentWorkerPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_worker_pool() -> AgentWorkerPool:
+    """Return the process-wide AgentWorkerPool, starting its workers on first use."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = AgentWorkerPool.from_env()
+    return _POOL
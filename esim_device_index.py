@@ -0,0 +1,248 @@
+# eSIM device compatibility index built from the Apple and Samsung eSIM pages.
+# Used by mcp_internet_extarct_server.py so the LLM gets a yes/no answer instead of a page dump.
+
+import asyncio
+import json
+import os
+import pathlib
+import re
+import time
+import unicodedata
+
+from web_page_fetcher import FetchError, WebFetcher, extract_text_lines
+
+# ESIM_SOURCE_APPLE / ESIM_SOURCE_SAMSUNG point a brand at another copy of its page (e.g. a local stub)
+ESIM_SOURCES = {
+    "apple": os.getenv("ESIM_SOURCE_APPLE", "https://esimblow.com/es/dispositivos/dispositivos-apple-esim/"),
+    "samsung": os.getenv("ESIM_SOURCE_SAMSUNG", "https://www.samsung.com/latin/support/mobile-devices/galaxy-esim-and-supported-network-carriers/?msockid=1803ea69355c6f270dc0ffb034346ee2"),
+}
+
+# Device families that start a device line on each page
+DEVICE_FAMILIES = {
+    "apple": ("IPHONE", "IPAD", "APPLE WATCH"),
+    "samsung": ("GALAXY",),
+}
+
+# Series cells of a model table ("Galaxy S" next to "Galaxy S24 | S24+") name a group, not a device
+SERIES_HEADINGS = {
+    "samsung": re.compile(r"^GALAXY (?:[A-Z]|NOTE|TAB|WATCH)$"),
+}
+
+# Devices are only read from list items and table cells; headings and paragraphs mention
+# "Galaxy eSIM" or "iPhone" in prose and would otherwise be indexed as models
+DEVICE_ITEM_SELECTOR = "li, td"
+
+# Network suffixes that don't tell two devices apart ("Galaxy A54" is the page's "Galaxy A54 5G")
+NETWORK_SUFFIX_PATTERN = re.compile(r"\b(?:5G|4G|LTE)\b")
+
+MODEL_CODE_PATTERN = re.compile(r"\b(A\d{4}|SM-[A-Z]\d{3,4}[A-Z0-9]*)\b")
+LIST_SEPARATORS = re.compile(r"\s*(?:,|\||/|\by\b|\band\b)\s*")
+
+DEFAULT_CACHE_PATH = pathlib.Path(__file__).parent / ".esim_index_cache.json"
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def normalize_model(text: str) -> str:
+    """Canonical form of a device name: 'iPhone 13 Pro Max' and 'IPHONE 13 PRO MAX(A2484)' agree."""
+    decomposed = unicodedata.normalize("NFKD", text.upper())
+    text = "".join(c for c in decomposed if not unicodedata.combining(c))
+    text = MODEL_CODE_PATTERN.sub(" ", text)
+    text = text.replace("+", " PLUS ")
+    text = re.sub(r"[^A-Z0-9]+", " ", text).strip()
+    # Customer records prefix the brand ("APPLE IPHONE 13", "SAMSUNG GALAXY S23")
+    return re.sub(r"^(APPLE|SAMSUNG)\s+(?=IPHONE|IPAD|GALAXY)", "", text)
+
+
+def extract_model_codes(text: str) -> list[str]:
+    return MODEL_CODE_PATTERN.findall(text.upper())
+
+
+def guess_brand(model: str) -> str | None:
+    normalized = normalize_model(model)
+    if normalized.startswith(("IPHONE", "IPAD", "APPLE")):
+        return "apple"
+    if normalized.startswith("GALAXY") or model.strip().upper().startswith("SM-"):
+        return "samsung"
+    return None
+
+
+def _expand_device_line(line: str, families: tuple[str, ...],
+                        series: re.Pattern | None = None) -> list[tuple[str, list[str]]]:
+    """Split 'iPhone 13, 13 mini y 13 Pro Max (A2484)' into (device name, model codes) per model."""
+    items = [item for item in LIST_SEPARATORS.split(line) if item]
+    if not items:
+        return []
+    family = next((f for f in families if normalize_model(items[0]).startswith(f)), None)
+    if family is None:
+        return []
+    devices = []
+    for item in items:
+        name = normalize_model(item)
+        if not name:
+            continue
+        if not name.startswith(families):
+            name = f"{family} {name}"
+        # A bare family name ("iPhone", "Galaxy") or a series ("Galaxy S") is a heading, not a device
+        if name not in families and not (series and series.match(name)):
+            devices.append((name, extract_model_codes(item)))
+    return devices
+
+
+def build_index_from_lines(brand: str, lines: list[str]) -> dict:
+    """Index the device lines of one page: normalized model name -> page line, model code -> name."""
+    families = DEVICE_FAMILIES[brand]
+    series = SERIES_HEADINGS.get(brand)
+    models: dict[str, str] = {}
+    codes: dict[str, str] = {}
+    for line in lines:
+        for name, item_codes in _expand_device_line(line, families, series):
+            models.setdefault(name, line)
+            for code in item_codes:
+                codes.setdefault(code, name)
+    return {"models": models, "codes": codes}
+
+
+def build_index_from_html(brand: str, html: str, selector: str = DEVICE_ITEM_SELECTOR) -> dict:
+    """Index a saved or freshly fetched eSIM page (only the elements matching a CSS selector)."""
+    return build_index_from_lines(brand, extract_text_lines(html, selector))
+
+
+def _comparable_name(name: str) -> str:
+    """Looser form of a normalized name: no network suffix, no spaces ('Z FOLD 5 5G' -> 'ZFOLD5')."""
+    return NETWORK_SUFFIX_PATTERN.sub("", name).replace(" ", "")
+
+
+def lookup_model(index: dict, model: str) -> str | None:
+    """Return the indexed device name matching the model, or None.
+
+    Model codes and exact names win; otherwise names are compared without network
+    suffixes and spacing, so 'Galaxy A54' finds 'GALAXY A54 5G' but 'iPhone 13' never
+    finds 'IPHONE 13 PRO MAX'.
+    """
+    for code in extract_model_codes(model):
+        if code in index["codes"]:
+            return index["codes"][code]
+    name = normalize_model(model)
+    if name in index["models"]:
+        return name
+    comparable = _comparable_name(name)
+    if not comparable:
+        return None
+    return next((indexed for indexed in index["models"] if _comparable_name(indexed) == comparable), None)
+
+
+class EsimIndexCache:
+    """Per-brand eSIM indexes kept in memory and on disk.
+
+    Entries are served from memory until the TTL expires, then revalidated with
+    If-None-Match / If-Modified-Since so an unchanged page costs a 304 and no parsing.
+    If the page can't be fetched the stale index is still served.
+    """
+
+    def __init__(self, cache_path: pathlib.Path | str | None = None, ttl: float | None = None,
+                 sources: dict[str, str] = ESIM_SOURCES, fetcher: WebFetcher | None = None):
+        self.cache_path = pathlib.Path(cache_path or os.getenv("ESIM_INDEX_CACHE", DEFAULT_CACHE_PATH))
+        self.ttl = ttl if ttl is not None else float(os.getenv("ESIM_INDEX_TTL", DEFAULT_TTL_SECONDS))
+        self.sources = sources
+        self.fetcher = fetcher or WebFetcher()
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._entries: dict[str, dict] = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {brand: entry for brand, entry in entries.items() if self._is_current(brand, entry)}
+
+    def _is_current(self, brand: str, entry: dict | None) -> bool:
+        """An entry only counts for a brand while it was built from the brand's configured source."""
+        return bool(entry) and entry.get("source") == self.sources.get(brand)
+
+    def _save(self) -> None:
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # The disk cache is only an optimization for cold starts
+            pass
+
+    async def _fetch(self, brand: str, entry: dict | None) -> dict:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = await self.fetcher.fetch(self.sources[brand], headers=headers)
+        if response.status_code == 304 and entry:
+            return dict(entry, fetched_at=time.time())
+        if response.status_code != 200:
+            raise FetchError(f"{self.sources[brand]} returned status code {response.status_code}")
+        if response.truncated:
+            # A cut page would silently drop devices from the index
+            raise FetchError(f"{self.sources[brand]} is larger than {self.fetcher.max_bytes} bytes")
+        index = build_index_from_html(brand, response.text)
+        if not index["models"]:
+            # A redesigned or error page must not replace a good index with an empty one
+            raise FetchError(f"No eSIM devices found on {self.sources[brand]}")
+        return {
+            "source": self.sources[brand],
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            **index,
+        }
+
+    async def get(self, brand: str) -> dict:
+        """Return the index for a brand, fetching or revalidating it when needed.
+
+        Concurrent callers for the same brand wait for one fetch instead of each downloading the page.
+        """
+        entry = self._entries.get(brand)
+        if self._is_current(brand, entry) and time.time() - entry["fetched_at"] < self.ttl:
+            return entry
+        async with self._locks.setdefault(brand, asyncio.Lock()):
+            entry = self._entries.get(brand)
+            if not self._is_current(brand, entry):
+                # ESIM_SOURCE_* changed since the entry was cached: neither serve nor revalidate it
+                entry = None
+            elif time.time() - entry["fetched_at"] < self.ttl:
+                return entry
+            try:
+                entry = await self._fetch(brand, entry)
+            except FetchError:
+                if entry:
+                    return entry
+                raise
+            self._entries[brand] = entry
+            self._save()
+            return entry
+
+    def put_html(self, brand: str, html: str) -> dict:
+        """Seed the index for a brand from saved HTML (fixtures, offline environments)."""
+        entry = {"source": self.sources[brand], "etag": None, "last_modified": None,
+                 "fetched_at": time.time(), **build_index_from_html(brand, html)}
+        self._entries[brand] = entry
+        return entry
+
+    async def check(self, brand: str, model: str) -> dict:
+        brand = (brand or "").strip().lower() or guess_brand(model)
+        if brand not in self.sources:
+            return {"error": f"Unsupported brand '{brand}'. Supported brands: {', '.join(self.sources)}."}
+        entry = await self.get(brand)
+        if not entry["models"]:
+            # An empty index says nothing about the device; "not compatible" would be a wrong answer
+            return {"brand": brand, "model": model, "compatible": None, "source": entry["source"],
+                    "error": f"The {brand} eSIM device list is unavailable; compatibility is unknown."}
+        matched = lookup_model(entry, model)
+        return {
+            "brand": brand,
+            "model": model,
+            "compatible": matched is not None,
+            "matched_model": entry["models"].get(matched) if matched else None,
+            "source": entry["source"],
+            "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(entry["fetched_at"])),
+        }
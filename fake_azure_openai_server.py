@@ -0,0 +1,240 @@
+# Local stand-in for an Azure OpenAI chat-completions deployment, used by the benchmarks.
+# Point AZURE_OPENAI_BASE_URL at <endpoint>/openai/deployments/<name> and AzureChatCompletion talks to it like the real service.
+
+import collections
+import json
+import math
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class FakeChatScript:
+    """What the fake deployment answers.
+
+    tool_calls: functions ("plugin-function", arguments) requested on the first turn when the
+        request offers tools; the final answer is sent once the tool results come back.
+    skip_tool_calls_if_known: function name -> text; the call is not requested when the text is
+        already in the prompt (e.g. a prefetched customer record).
+    structured_answer: sent instead of answer when the system prompt asks for the JSON answer
+        format (title, verdict, paragraphs, sources).
+    throttle_first: the first N requests are answered 429 with a Retry-After of retry_after seconds.
+    requests_per_second: if set, requests over this rate (1 s sliding window) get a 429 whose
+        Retry-After says when the window has room again, like a deployment out of quota.
+    """
+    answer: str = "<h1>Respuesta</h1><p>Sí, su dispositivo es compatible con eSIM.</p>"
+    structured_answer: str = ('{"title":"Compatibilidad eSIM","verdict":"Sí",'
+                              '"paragraphs":["Su dispositivo es compatible con eSIM."],'
+                              '"sources":["check_esim_compatibility"]}')
+    tool_calls: list[tuple[str, dict]] = field(default_factory=list)
+    first_token_latency: float = 0.05
+    chunk_latency: float = 0.005
+    chunk_size: int = 8
+    manager_agent: str = "AgentCare"
+    skip_tool_calls_if_known: dict[str, str] = field(default_factory=dict)
+    throttle_first: int = 0
+    retry_after: float = 1.0
+    requests_per_second: float = 0.0
+
+
+class FakeAzureOpenAIServer:
+    """Threaded HTTP server answering /openai/deployments/<name>/chat/completions."""
+
+    def __init__(self, script: FakeChatScript | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.script = script or FakeChatScript()
+        self.requests = 0
+        self.completion_tokens = 0
+        self.prompt_tokens = 0
+        self.throttled = 0
+        self._recent: collections.deque[float] = collections.deque()
+        self.last_messages: list[dict] = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAzureOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def _throttle(self) -> float | None:
+        """Retry-After for this request if it must be refused with a 429, else None."""
+        script = self.script
+        with self._lock:
+            if self.requests <= script.throttle_first:
+                self.throttled += 1
+                return script.retry_after
+            if script.requests_per_second:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] >= 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= script.requests_per_second:
+                    self.throttled += 1
+                    return 1.0 - (now - self._recent[0])
+                self._recent.append(now)
+        return None
+
+    def _count_usage(self, usage: dict) -> None:
+        with self._lock:
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.completion_tokens += usage["completion_tokens"]
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if "/chat/completions" not in self.path:
+                    self.send_error(404)
+                    return
+                server._count_request()
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                retry_after = server._throttle()
+                if retry_after is not None:
+                    self._send_throttled(retry_after)
+                    return
+                server.last_messages = body.get("messages", [])
+                reply = server._reply_for(body)
+                server._count_usage(reply["usage"])
+                time.sleep(server.script.first_token_latency)
+                if body.get("stream"):
+                    self._send_stream(reply)
+                else:
+                    self._send_json(reply)
+
+            def _send_throttled(self, retry_after):
+                data = json.dumps({"error": {
+                    "code": "429",
+                    "message": "Requests to the ChatCompletions_Create Operation have exceeded the rate limit "
+                               f"of your current tier. Please retry after {math.ceil(retry_after)} seconds.",
+                }}).encode("utf-8")
+                self.send_response(429)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Retry-After", str(math.ceil(retry_after)))
+                self.send_header("retry-after-ms", str(int(retry_after * 1000)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_json(self, reply):
+                message = {"role": "assistant", "content": reply.get("content")}
+                if reply.get("tool_calls"):
+                    message["tool_calls"] = reply["tool_calls"]
+                payload = {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "fake",
+                    "choices": [{"index": 0, "message": message, "finish_reason": reply["finish_reason"]}],
+                    "usage": reply["usage"],
+                }
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, reply):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+                def emit(delta, finish_reason=None, usage=None):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": "fake",
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    }
+                    if usage:
+                        chunk["usage"] = usage
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                if reply.get("tool_calls"):
+                    delta = {"role": "assistant", "tool_calls": [
+                        dict(call, index=i) for i, call in enumerate(reply["tool_calls"])
+                    ]}
+                    emit(delta)
+                else:
+                    content = reply["content"]
+                    size = server.script.chunk_size
+                    for start in range(0, len(content), size):
+                        emit({"role": "assistant", "content": content[start:start + size]})
+                        time.sleep(server.script.chunk_latency)
+                emit({}, finish_reason=reply["finish_reason"], usage=reply["usage"])
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def _reply_for(self, body: dict) -> dict:
+        """Decide between a scripted tool call and the final answer for one request."""
+        script = self.script
+        messages = body.get("messages", [])
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        system = " ".join(str(m.get("content") or "") for m in messages if m.get("role") == "system")
+        already_called = any(m.get("role") == "tool" for m in messages)
+        prompt = " ".join(str(m.get("content") or "") for m in messages)
+        tool_calls = [
+            (name, args) for name, args in script.tool_calls
+            if name not in script.skip_tool_calls_if_known or script.skip_tool_calls_if_known[name] not in prompt
+        ]
+        if body.get("tools") and tool_calls and not already_called:
+            calls = [
+                {"id": f"call_{i}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+                for i, (name, args) in enumerate(tool_calls)
+            ]
+            return {"tool_calls": calls, "finish_reason": "tool_calls",
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 10 * len(calls),
+                              "total_tokens": prompt_tokens + 10 * len(calls)}}
+        if "manager agent" in system:
+            question = next((str(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+            content = json.dumps({"agent": script.manager_agent, "question": question})
+        elif '"paragraphs"' in system:
+            content = script.structured_answer
+        else:
+            content = script.answer
+        completion_tokens = max(1, len(content) // 4)
+        return {"content": content, "finish_reason": "stop",
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens}}
+
+
+if __name__ == "__main__":
+    with FakeAzureOpenAIServer(port=8090) as fake:
+        print(f"Fake Azure OpenAI listening on {fake.endpoint}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
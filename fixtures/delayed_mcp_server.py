@@ -0,0 +1,29 @@
+# Stub MCP server for the tool-call benchmark: every tool answers after an artificial delay.
+# DO NOT print to stdout, it carries the MCP protocol.
+
+import asyncio
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("DelayedStubServer")
+CALLS = {"lookup": 0}
+
+
+@mcp.tool()
+async def lookup(key: str, delay: float = 0.5) -> dict:
+    """Return the key after waiting `delay` seconds."""
+    CALLS["lookup"] += 1
+    started = time.time()
+    await asyncio.sleep(delay)
+    return {"key": key, "started": started, "finished": time.time()}
+
+
+@mcp.tool()
+async def call_count() -> dict:
+    """How many lookups this server has run."""
+    return dict(CALLS)
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
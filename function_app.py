@@ -1,8 +1,11 @@
 import azure.functions as func
 import logging
 import json
-import nest_asyncio
-from customer_care_agent_mgr import process_question
+import os
+import sys
+import threading
+import time
+from azurefunctions.extensions.http.fastapi import JSONResponse, Request, StreamingResponse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -10,62 +13,180 @@ logger = logging.getLogger('customer_care_func')
 
 app = func.FunctionApp()
 
-# Apply nest_asyncio to allow nested event loops
-nest_asyncio.apply()
+# Cold start. The agent stack (Semantic Kernel, the OpenAI SDK, the MCP client, pydantic...) takes
+# seconds to import, so it isn't imported while the host loads this module:
+#   background (default)  a thread imports it and builds the agent registry while the host starts up
+#   eager                 import and build before the module finishes loading (the old behaviour)
+#   lazy                  nothing until the first request
+COLD_START_WARMUP = os.getenv("COLD_START_WARMUP", "background")
+
+# No handler nests event loops any more; NEST_ASYNCIO=1 restores nest_asyncio.apply() if one does
+if os.getenv("NEST_ASYNCIO", "0") == "1":
+    import nest_asyncio
+    nest_asyncio.apply()
+
+def agent_mgr():
+    """customer_care_agent_mgr, imported on first use."""
+    import customer_care_agent_mgr
+    return customer_care_agent_mgr
+
+def is_deployment_busy(e: Exception) -> bool:
+    """True for the DeploymentBusyError raised when Azure OpenAI keeps throttling us."""
+    # If the rate limiter was never imported, no request can have been throttled by it
+    rate_limit = sys.modules.get('customer_care_rate_limit')
+    return rate_limit is not None and isinstance(e, rate_limit.DeploymentBusyError)
+
+def is_session_mismatch(e: Exception) -> bool:
+    """True for the SessionMismatchError raised when a session ID is reused by another customer."""
+    sessions = sys.modules.get('customer_care_sessions')
+    return sessions is not None and isinstance(e, sessions.SessionMismatchError)
+
+def warm_up() -> None:
+    """Import the agent stack and build the chat service and agents that every invocation reuses."""
+    start = time.perf_counter()
+    try:
+        agent_mgr().get_registry()
+    except RuntimeError as e:
+        logger.warning('Agent registry not built at startup: %s', str(e))
+    except Exception as e:
+        # The first request retries and reports the error; a failed warm-up must not stop the host
+        logger.error('Warm-up failed: %s', str(e), exc_info=True)
+    logger.info('Warm-up (%s) finished in %.0f ms', COLD_START_WARMUP, (time.perf_counter() - start) * 1000)
+
+warmup_thread = None
+if COLD_START_WARMUP == "eager":
+    warm_up()
+elif COLD_START_WARMUP == "background":
+    warmup_thread = threading.Thread(target=warm_up, name="customer-care-warm-up", daemon=True)
+    warmup_thread.start()
 
 @app.route(route="api/customer-care/{imsi}/{pregunta}", auth_level=func.AuthLevel.ANONYMOUS, methods=['GET'])
-async def customer_care_func(req: func.HttpRequest) -> func.HttpResponse:
+async def customer_care_func(req: Request) -> JSONResponse:
     """
     Azure Function entry point for customer care service.
-    Accepts GET requests with IMSI and question as part of the URL path.
+    Accepts GET requests with IMSI and question as part of the URL path; an optional
+    ?session= query parameter continues a multi-turn conversation.
     """
     logger.info('Function triggered with request: %s', req.url)
     
     try:
         # Get IMSI and question from route parameters
-        imsi = req.route_params.get('imsi')
-        question = req.route_params.get('pregunta')
+        imsi = req.path_params.get('imsi')
+        question = req.path_params.get('pregunta')
+        session_id = req.query_params.get('session')
         
         if not imsi:
             logger.error('Missing imsi parameter in URL path')
-            return func.HttpResponse(
-                json.dumps({"error": "Missing IMSI parameter in URL path"}),
-                mimetype="application/json",
+            return JSONResponse(
+                {"error": "Missing IMSI parameter in URL path"},
                 status_code=400
             )
         
         if not question:
             logger.error('Missing pregunta parameter in URL path')
-            return func.HttpResponse(
-                json.dumps({"error": "Missing question parameter in URL path"}),
-                mimetype="application/json",
+            return JSONResponse(
+                {"error": "Missing question parameter in URL path"},
                 status_code=400
             )
         
         # Process the question with IMSI
         logger.info('Processing question: %s with IMSI: %s', question, imsi)
-        answer = await process_question(question, imsi)
+        mgr = agent_mgr()
+        answer = await mgr.process_question(question, imsi, session_id)
         logger.info('Received answer of length: %d', len(str(answer)) if answer else 0)
+        registry = mgr.get_registry()
+        logger.info('Router metrics: %s', registry.router.metrics.snapshot())
+        logger.info('Response cache metrics: %s', registry.response_cache.metrics.snapshot())
+        logger.info('Customer prefetch metrics: %s', registry.prefetch.metrics.snapshot())
+        logger.info('Azure OpenAI scheduler metrics: %s', registry.scheduler.metrics.snapshot())
+        logger.info('Question coalescing metrics: %s', registry.question_flights.metrics.snapshot())
+        logger.info('MCP tool coalescing metrics: %s', mgr.get_mcp_pool().tool_flights.metrics.snapshot())
+        logger.info('Session metrics: %s', registry.sessions.metrics.snapshot())
         
         if answer is None:
             logger.warning('Received None answer from agent')
-            return func.HttpResponse(
-                json.dumps({"error": "No answer was generated"}),
-                mimetype="application/json",
+            return JSONResponse(
+                {"error": "No answer was generated"},
                 status_code=500
             )
         
         # Return successful response
-        return func.HttpResponse(
-            json.dumps({"answer": answer}),
-            mimetype="application/json",
+        return JSONResponse(
+            {"answer": answer},
             status_code=200
         )
 
     except Exception as e:
+        if is_session_mismatch(e):
+            # The session ID was started by another customer
+            logger.warning('Rejected session %s for IMSI %s: %s', session_id, imsi, str(e))
+            return JSONResponse(
+                {"error": "The session belongs to another customer"},
+                status_code=403
+            )
+        if is_deployment_busy(e):
+            # Throttled by Azure OpenAI even after the scheduler's retries: ask the client to come back later
+            logger.warning('Azure OpenAI throttled the request: %s', str(e))
+            return JSONResponse(
+                {"error": "El servicio está ocupado, por favor intente nuevamente en unos segundos."},
+                status_code=503,
+                headers={"Retry-After": str(max(1, round(e.retry_after or 1)))}
+            )
         logger.error('Error processing request: %s', str(e), exc_info=True)
-        return func.HttpResponse(
-            json.dumps({"error": f"Internal server error: {str(e)}"}),
-            mimetype="application/json",
+        return JSONResponse(
+            {"error": f"Internal server error: {str(e)}"},
             status_code=500
-        )
\ No newline at end of file
+        )
+
+def sse_event(data: str, event: str = None) -> str:
+    """Format one Server-Sent Event; multi-line data is split into several data: lines."""
+    lines = [f"event: {event}"] if event else []
+    lines += [f"data: {line}" for line in data.split("\n")]
+    return "\n".join(lines) + "\n\n"
+
+async def stream_answer(question: str, imsi: str, session_id: str = None):
+    """Forward the answer chunks as Server-Sent Events, then a final 'done' event."""
+    total_length = 0
+    try:
+        async for chunk in agent_mgr().process_question_stream(question, imsi, session_id):
+            total_length += len(chunk)
+            yield sse_event(chunk)
+        logger.info('Streamed answer of length: %d', total_length)
+        yield sse_event(json.dumps({"length": total_length}), event="done")
+    except Exception as e:
+        if is_session_mismatch(e):
+            logger.warning('Rejected session %s for IMSI %s: %s', session_id, imsi, str(e))
+            yield sse_event(json.dumps({"error": "The session belongs to another customer"}), event="error")
+            return
+        if is_deployment_busy(e):
+            logger.warning('Azure OpenAI throttled the streamed request: %s', str(e))
+            yield sse_event(json.dumps({"error": "busy", "retry_after": max(1, round(e.retry_after or 1))}), event="error")
+            return
+        logger.error('Error streaming answer: %s', str(e), exc_info=True)
+        yield sse_event(json.dumps({"error": f"Internal server error: {str(e)}"}), event="error")
+
+@app.route(route="api/customer-care/stream/{imsi}/{pregunta}", auth_level=func.AuthLevel.ANONYMOUS, methods=['GET'])
+async def customer_care_stream_func(req: Request) -> StreamingResponse:
+    """
+    Streaming variant of customer_care_func.
+    Sends the answer as Server-Sent Events while the agent generates it.
+    """
+    logger.info('Streaming function triggered with request: %s', req.url)
+    imsi = req.path_params.get('imsi') or req.query_params.get('imsi')
+    question = req.path_params.get('pregunta') or req.query_params.get('pregunta')
+    session_id = req.query_params.get('session')
+
+    if not imsi or not question:
+        missing = "IMSI" if not imsi else "question"
+        return StreamingResponse(
+            iter([sse_event(json.dumps({"error": f"Missing {missing} parameter in URL path"}), event="error")]),
+            media_type="text/event-stream",
+            status_code=400
+        )
+
+    logger.info('Streaming question: %s with IMSI: %s', question, imsi)
+    return StreamingResponse(
+        stream_answer(question, imsi, session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
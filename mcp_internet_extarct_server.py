@@ -1,35 +1,66 @@
-from mcp.server.fastmcp import FastMCP  
-import requests  
-from bs4 import BeautifulSoup  
-  
-# Instanciar una instancia del servidor MCP con un nombre  
-mcp = FastMCP("TelefonicaDevices")  
-  
-@mcp.tool()  
-def extract_dataFrom_URL(url): 
-    """Return all data from a url on the web.."""
-    response = requests.get(url)  
-    if response.status_code == 200:  # Check if the request was successful  
-    # Parse the HTML content with BeautifulSoup  
-        soup = BeautifulSoup(response.text, 'html.parser')  
-        
-        # Extract all the text from the page  
-        all_text = soup.get_text(separator="\n")  # Use newline as separator for better readability  
-        
-        # Store extracted lines in a list  
-        extracted_lines = []  
-        for line in all_text.split("\n"):  
-            cleaned_line = line.strip()  # Remove extra spaces  
-            if cleaned_line:  # Only include non-empty lines  
-                extracted_lines.append(cleaned_line)  
-        
-        # Remove unused json_output variable
-        return extracted_lines
-    else:
-        # Always return a JSON-serializable error object
-        return {"error": f"Failed to fetch the webpage. Status code: {response.status_code}"}
+import os
+
+from mcp.server.fastmcp import FastMCP
+from esim_device_index import EsimIndexCache
+from mcp_server_cli import run_server
+from web_page_fetcher import FetchError, WebFetcher, extract_text_lines
+
+# Instanciar una instancia del servidor MCP con un nombre
+mcp = FastMCP("TelefonicaDevices")
+
+# Cliente HTTP compartido: conexiones keep-alive, timeouts, tamaño máximo de página y descargas concurrentes acotadas
+FETCHER = WebFetcher(
+    timeout=float(os.getenv("WEB_FETCH_TIMEOUT", "10")),
+    max_bytes=int(os.getenv("WEB_FETCH_MAX_BYTES", str(5 * 1024 * 1024))),
+    max_concurrency=int(os.getenv("WEB_FETCH_CONCURRENCY", "8")),
+)
+
+# Índice de compatibilidad eSIM, persistido en disco para no volver a descargar las páginas en cada arranque
+ESIM_INDEX = EsimIndexCache(fetcher=FETCHER)
+
+
+def page_lines(result, selector: str | None = None) -> list | dict:
+    """Extracted text lines of a fetched page, or a JSON-serializable error object."""
+    if isinstance(result, Exception):
+        return {"error": str(result)}
+    if result.status_code != 200:
+        return {"error": f"Failed to fetch the webpage. Status code: {result.status_code}"}
+    try:
+        return extract_text_lines(result.text, selector)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def extract_dataFrom_URL(url: str, selector: str = "") -> list | dict:
+    """Return all data from a url on the web.. Optionally pass a CSS selector
+    (e.g. 'main', 'table', '#devices li') to only return the text of that part of the page."""
+    try:
+        result = await FETCHER.fetch(url)
+    except FetchError as e:
+        result = e
+    return page_lines(result, selector or None)
+
+
+@mcp.tool()
+async def extract_data_from_URLs(urls: list[str], selector: str = "") -> dict:
+    """Fetch several web pages at the same time and return the text lines of each one, keyed by url.
+    Optionally pass a CSS selector to only return the text of that part of every page."""
+    results = await FETCHER.fetch_many(urls)
+    return {url: page_lines(result, selector or None) for url, result in zip(urls, results)}
+
+
+@mcp.tool()
+async def check_esim_compatibility(brand: str, model: str) -> dict:
+    """Check whether an exact device model supports eSIM (brand: 'apple' or 'samsung';
+    model: e.g. 'IPHONE 13 PRO MAX(A2484)' or 'Galaxy S23 Ultra'). Answers from a cached
+    index of the Apple and Samsung eSIM device pages."""
+    try:
+        return await ESIM_INDEX.check(brand, model)
+    except FetchError as e:
+        return {"error": f"Failed to fetch the eSIM device list: {str(e)}"}
 
 if __name__ == "__main__":
-    # This server will be launched automatically by the MCP stdio agent
-    # You don't need to run this file directly - it will be spawned as a subprocess
-    mcp.run(transport="stdio")
+    # By default this server is launched automatically by the MCP stdio agent as a subprocess;
+    # run it with --transport streamable-http (or sse) to share one instance between workers
+    run_server(mcp, default_port=8002)
@@ -0,0 +1,75 @@
+# Command line shared by the MCP servers. By default a server speaks stdio and is spawned by each
+# worker's MCP pool; with --transport sse or streamable-http it runs as one long-lived network
+# service that every Functions worker connects to (see MCP_<PLUGIN>_URL in customer_care_mcp_pool.py).
+#
+#   python customer_care_knowledge_base_server.py --transport streamable-http --host 0.0.0.0 --port 8001
+#
+# MCP_SERVER_TRANSPORT, MCP_SERVER_HOST and MCP_SERVER_PORT give the defaults (e.g. in a container).
+#
+# The servers have no authentication and return customer data (IMSI, IMEI), so DNS-rebinding
+# protection stays on: requests must name the server by a loopback address, the address it is
+# bound to, or one of --allowed-hosts (MCP_SERVER_ALLOWED_HOSTS, e.g. the service name the
+# workers use in MCP_<PLUGIN>_URL). Browser requests must come from --allowed-origins.
+
+import argparse
+import os
+import sys
+
+from mcp.server.transport_security import TransportSecuritySettings
+
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+WILDCARD_HOSTS = ("0.0.0.0", "::", "")
+
+
+def _comma_list(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def _host_patterns(host: str) -> list[str]:
+    """Host header values accepted for host: any port unless it names one ("kb.internal:8001")."""
+    if host.count(":") > 1 and not host.startswith("["):
+        host = f"[{host}]"  # bare IPv6 address
+    if host.startswith("["):
+        name, _, port = host.partition("]")
+        name, port = name + "]", port.lstrip(":")
+    else:
+        name, _, port = host.partition(":")
+    return [f"{name}:{port}"] if port else [name, f"{name}:*"]
+
+
+def transport_security(host: str, allowed_hosts: list[str] = (), allowed_origins: list[str] = ()) -> TransportSecuritySettings:
+    """DNS-rebinding protection for a server bound to host, also accepting allowed_hosts and allowed_origins."""
+    hosts = list(LOOPBACK_HOSTS)
+    if host not in WILDCARD_HOSTS and host not in hosts:
+        hosts.append(host)
+    patterns = []
+    for name in [*hosts, *allowed_hosts]:
+        patterns.extend(pattern for pattern in _host_patterns(name) if pattern not in patterns)
+    return TransportSecuritySettings(enable_dns_rebinding_protection=True, allowed_hosts=patterns,
+                                     allowed_origins=list(allowed_origins))
+
+
+def run_server(mcp, default_port: int, argv: list[str] | None = None) -> None:
+    """Parse the transport options and run the FastMCP server until it is stopped."""
+    parser = argparse.ArgumentParser(description=f"MCP server {mcp.name}")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=os.getenv("MCP_SERVER_TRANSPORT", "stdio"))
+    parser.add_argument("--host", default=os.getenv("MCP_SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_SERVER_PORT", default_port)))
+    parser.add_argument("--allowed-hosts", type=_comma_list, default=_comma_list(os.getenv("MCP_SERVER_ALLOWED_HOSTS")),
+                        help="comma-separated host names (optionally host:port) clients may use to reach the server")
+    parser.add_argument("--allowed-origins", type=_comma_list, default=_comma_list(os.getenv("MCP_SERVER_ALLOWED_ORIGINS")),
+                        help="comma-separated Origin values accepted from browsers (none by default)")
+    args = parser.parse_args(argv)
+
+    if args.transport != "stdio":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        # FastMCP's default only accepts localhost; a shared service is reached by its network name
+        mcp.settings.transport_security = transport_security(args.host, args.allowed_hosts, args.allowed_origins)
+        # Our tools send no progress notifications, so plain JSON responses are enough and avoid
+        # opening an SSE stream per streamable-HTTP call
+        mcp.settings.json_response = True
+        path = mcp.settings.sse_path if args.transport == "sse" else mcp.settings.streamable_http_path
+        print(f"{mcp.name} serving {args.transport} on http://{args.host}:{args.port}{path}", file=sys.stderr)
+    mcp.run(transport=args.transport)
@@ -0,0 +1,65 @@
+# The modules live at the top of the repository, next to function_app.py
+import asyncio
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import pytest
+
+from fake_azure_openai_server import FakeAzureOpenAIServer, FakeChatScript
+
+
+@pytest.fixture
+def fake_deployment(monkeypatch):
+    """The fake Azure OpenAI deployment, with the AZURE_OPENAI_* settings pointing at it."""
+    with FakeAzureOpenAIServer(FakeChatScript(first_token_latency=0.01)) as fake:
+        # Plain http is only accepted as a base URL
+        monkeypatch.delenv("AZURE_OPENAI_ENDPOINT", raising=False)
+        monkeypatch.setenv("AZURE_OPENAI_BASE_URL", f"{fake.endpoint}/openai/deployments/fake-deployment")
+        monkeypatch.setenv("AZURE_OPENAI_DEPLOYMENT", "fake-deployment")
+        monkeypatch.setenv("AZURE_OPENAI_KEY", "fake-key")
+        yield fake
+
+
+@pytest.fixture
+def agent_stack(fake_deployment, monkeypatch):
+    """A fresh agent registry on the fake deployment (response cache off).
+
+    Returns run(coroutine_function): runs it in a new event loop and closes the MCP servers it
+    started before the loop ends.
+    """
+    import customer_care_agent_mgr
+    import customer_care_rate_limit
+    from customer_care_mcp_pool import get_mcp_pool
+
+    monkeypatch.setenv("RESPONSE_CACHE_SIZE", "0")
+    monkeypatch.setattr(customer_care_agent_mgr, "_REGISTRY", None)
+    customer_care_rate_limit._SCHEDULERS.clear()
+
+    def run(coroutine_function):
+        async def scenario():
+            try:
+                return await coroutine_function()
+            finally:
+                await get_mcp_pool().close()
+        return asyncio.run(scenario())
+
+    yield run
+    customer_care_rate_limit._SCHEDULERS.clear()
+
+
+@pytest.fixture
+def two_customers(tmp_path, monkeypatch) -> list[str]:
+    """The sample export with every event repeated for a second IMSI (same iPhone), as CUSTOMERS_FILE."""
+    with open(os.path.join(REPO_ROOT, "customers.txt"), encoding="utf-8") as f:
+        export = json.load(f)
+    events = export["datos"]["signalQualityIssuesDetail"]["detailSignalPlane"]
+    imsis = [str(events[0]["imsi"]), "730029988243962"]
+    events += [dict(event, imsi=int(imsis[1])) for event in events]
+    path = tmp_path / "customers.json"
+    path.write_text(json.dumps(export), encoding="utf-8")
+    monkeypatch.setenv("CUSTOMERS_FILE", str(path))
+    return imsis
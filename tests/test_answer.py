@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from customer_care_answer import (
+    CONTAINER_CLOSE, CONTAINER_OPEN, PARAGRAPH, SOURCE, SOURCES_CLOSE, SOURCES_OPEN, TITLE, VERDICT, AnswerRenderer,
+)
+
+ANSWER = {
+    "title": "Compatibilidad eSIM",
+    "verdict": "Sí",
+    "paragraphs": ["Su iPhone 13 Pro Max es compatible con eSIM.", "Active la línea desde Ajustes > Celular."],
+    "sources": ["check_esim_compatibility"],
+}
+EXPECTED = (
+    CONTAINER_OPEN + TITLE.format("Compatibilidad eSIM") + VERDICT.format("Sí")
+    + PARAGRAPH.format("Su iPhone 13 Pro Max es compatible con eSIM.")
+    + PARAGRAPH.format("Active la línea desde Ajustes &gt; Celular.")
+    + SOURCES_OPEN + SOURCE.format("check_esim_compatibility") + SOURCES_CLOSE + CONTAINER_CLOSE
+)
+
+
+def render(text: str, chunk_size: int) -> tuple[list[str], str]:
+    """What feed() returns for each chunk of text, and close()."""
+    renderer = AnswerRenderer()
+    pieces = [renderer.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    return pieces, renderer.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_json_split_anywhere_renders_the_same_html(chunk_size):
+    pieces, rest = render(json.dumps(ANSWER, ensure_ascii=False, indent=1), chunk_size)
+    assert "".join(pieces) + rest == EXPECTED
+    assert rest == CONTAINER_CLOSE
+
+
+def test_each_field_is_sent_as_soon_as_it_is_complete():
+    text = json.dumps(ANSWER, ensure_ascii=False)
+    renderer = AnswerRenderer()
+    head = text[:text.index('"verdict"')]
+    assert renderer.feed(head) == CONTAINER_OPEN + TITLE.format("Compatibilidad eSIM")
+    # Half a paragraph renders nothing yet
+    middle = text[len(head):text.index("compatible con eSIM")]
+    assert renderer.feed(middle) == VERDICT.format("Sí")
+
+
+@pytest.mark.parametrize("fence", ["```json\n{}\n```", "```\n{}\n```\n", "  ```json\n\n{}```"])
+def test_markdown_fence_is_stripped(fence):
+    text = fence.replace("{}", json.dumps(ANSWER, ensure_ascii=False))
+    for chunk_size in (1, 5, 1000):
+        pieces, rest = render(text, chunk_size)
+        assert "".join(pieces) + rest == EXPECTED
+
+
+def test_truncated_object_is_closed_and_keeps_the_partial_text():
+    text = '{"title": "Compatibilidad eSIM", "paragraphs": ["Su iPhone es compatible", "Para activ'
+    pieces, rest = render(text, 4)
+    html = "".join(pieces) + rest
+    assert html.startswith(CONTAINER_OPEN + TITLE.format("Compatibilidad eSIM")
+                           + PARAGRAPH.format("Su iPhone es compatible"))
+    assert "Para activ" in rest
+    assert html.endswith(CONTAINER_CLOSE) and html.count(CONTAINER_CLOSE) == 1
+
+
+def test_text_after_the_object_is_shown_as_a_last_paragraph():
+    text = json.dumps(ANSWER, ensure_ascii=False) + "\n\n¿Le puedo ayudar en algo más? <b>"
+    pieces, rest = render(text, 6)
+    assert "".join(pieces) + rest == EXPECTED[:-len(CONTAINER_CLOSE)] + PARAGRAPH.format(
+        "¿Le puedo ayudar en algo más? &lt;b&gt;") + CONTAINER_CLOSE
+
+    fenced = "```json\n" + json.dumps(ANSWER, ensure_ascii=False) + "\n```\nSaludos"
+    pieces, rest = render(fenced, 6)
+    assert rest == PARAGRAPH.format("Saludos") + CONTAINER_CLOSE
+
+
+@pytest.mark.parametrize("text", ["<p>Respuesta en HTML</p>", "Error: servicio no disponible", ""])
+def test_anything_but_a_json_object_passes_through(text):
+    pieces, rest = render(text, 3)
+    assert "".join(pieces) + rest == text
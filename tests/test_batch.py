@@ -0,0 +1,74 @@
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+
+import customer_care_batch
+from customer_care_batch import BatchItem, drop_incomplete_line, process_batch
+
+ITEMS = [BatchItem(id=f"q{i}", question=f"pregunta {i}", imsi="730029988243961") for i in range(20)]
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """process_question replaced by a slow stub; returns the questions it was asked."""
+    asked = []
+
+    class Registry:
+        async def ensure_started(self):
+            pass
+
+    async def process_question(question, imsi=None):
+        asked.append(question)
+        await asyncio.sleep(0.01)
+        return f"<p>respuesta a {question}</p>"
+
+    monkeypatch.setattr(customer_care_batch, "get_registry", Registry)
+    monkeypatch.setattr(customer_care_batch, "process_question", process_question)
+    return asked
+
+
+def records(path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_interrupted_run_resumes_without_duplicates_or_losses(tmp_path, answers):
+    output = tmp_path / "answers.jsonl"
+
+    async def interrupted():
+        run = asyncio.create_task(process_batch(ITEMS, str(output), concurrency=4))
+        while not output.exists() or len(output.read_text(encoding="utf-8").splitlines()) < 6:
+            await asyncio.sleep(0.005)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+    asyncio.run(interrupted())
+    # The process was killed halfway through writing one more record
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "q19", "question": "pregunta 19", "answ')
+    first_run = len(answers)
+
+    report = asyncio.run(process_batch(ITEMS, str(output), concurrency=4))
+    written = records(output)
+    assert Counter(record["id"] for record in written) == Counter(item.id for item in ITEMS)
+    assert all(record["answer"] == f"<p>respuesta a {record['question']}</p>" for record in written)
+    assert report.skipped >= 6 and report.skipped + report.processed == len(ITEMS)
+    # Only the questions without a complete record were asked again
+    assert len(answers) - first_run == report.processed
+
+
+def test_drop_incomplete_line(tmp_path):
+    path = tmp_path / "answers.jsonl"
+    assert drop_incomplete_line(str(path)) == 0
+    complete = '{"id": "a"}\n' * 1000
+    path.write_text(complete, encoding="utf-8")
+    assert drop_incomplete_line(str(path)) == 0
+    path.write_text(complete + '{"id": "b", "ans' + "x" * 5000, encoding="utf-8")
+    assert drop_incomplete_line(str(path)) == len('{"id": "b", "ans') + 5000
+    assert path.read_text(encoding="utf-8") == complete
+    path.write_text('{"id": "c"', encoding="utf-8")
+    drop_incomplete_line(str(path))
+    assert path.read_text(encoding="utf-8") == ""
@@ -0,0 +1,48 @@
+from customer_care_cache import ResponseCache
+
+IPHONE = {"brand": "APPLE", "model": "IPHONE 13 PRO MAX(A2484)"}
+
+
+def test_device_scoped_question_is_shared_by_customers_with_the_same_device():
+    cache = ResponseCache()
+    question = "¿Mi celular es compatible con eSIM?"
+    assert cache.answer_key("AgentCare", question, IPHONE, "730029988243961") == \
+        cache.answer_key("AgentCare", question, IPHONE, "730021111111111")
+    assert cache.answer_key("AgentCare", question, IPHONE, "730029988243961") != \
+        cache.answer_key("AgentCare", question, {"brand": "SAMSUNG", "model": "GALAXY S23"}, "730029988243961")
+
+
+def test_question_about_the_customers_line_is_keyed_per_imsi():
+    cache = ResponseCache()
+    for question in ("tengo problemas de señal y llamadas caídas", "¿tengo roaming activo?",
+                     "¿cómo activo la eSIM en mi línea?"):
+        assert cache.answer_key("AgentCare", question, IPHONE, "730029988243961") != \
+            cache.answer_key("AgentCare", question, IPHONE, "730021111111111"), question
+
+
+def test_agent_without_customer_facts_and_never_cached_agent():
+    cache = ResponseCache()
+    question = "¿Cuánto cuesta el plan de 50 gigas?"
+    assert cache.answer_key("RatePlansExpertAgent", question, IPHONE, "730029988243961") == \
+        cache.answer_key("RatePlansExpertAgent", question, {}, "730021111111111")
+    assert cache.answer_key("SentimentAnalysisAgent", "analiza la llamada", IPHONE, "730029988243961") is None
+
+
+def test_cache_round_trip_and_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "answer a")
+    cache.put("b", "answer b")
+    assert cache.get("a") == "answer a"
+    cache.put("c", "answer c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "answer a"
+    assert cache.metrics.snapshot()["evictions"] == 1
+
+
+def test_answer_given_with_the_customer_record_is_keyed_per_imsi():
+    cache = ResponseCache()
+    question = "¿Mi celular es compatible con eSIM?"
+    first = cache.answer_key("AgentCare", question, IPHONE, "730029988243961", personal=True)
+    assert first != cache.answer_key("AgentCare", question, IPHONE, "730021111111111", personal=True)
+    assert first != cache.answer_key("AgentCare", question, IPHONE, "730029988243961")
+    assert first == cache.answer_key("AgentCare", question, IPHONE, "730029988243961", personal=True)
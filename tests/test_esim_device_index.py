@@ -0,0 +1,111 @@
+import asyncio
+import json
+import pathlib
+
+import pytest
+
+from esim_device_index import EsimIndexCache, build_index_from_html, lookup_model
+from web_page_fetcher import FetchResult
+
+FIXTURES = pathlib.Path(__file__).resolve().parent.parent / "fixtures"
+SOURCES = {"apple": "https://apple.example/esim", "samsung": "https://samsung.example/esim"}
+
+
+def page(brand: str) -> str:
+    return (FIXTURES / f"esim_{brand}.html").read_text(encoding="utf-8")
+
+
+class StubFetcher:
+    """Serves the fixture pages (or a given body) and records the requests."""
+
+    max_bytes = 1 << 20
+
+    def __init__(self, bodies: dict[str, str] | None = None):
+        self.bodies = bodies or {}
+        self.requests: list[tuple[str, dict]] = []
+
+    async def fetch(self, url: str, headers: dict | None = None) -> FetchResult:
+        self.requests.append((url, headers or {}))
+        brand = "apple" if "apple" in url else "samsung"
+        return FetchResult(url=url, status_code=200, text=self.bodies.get(url, page(brand)))
+
+
+def test_samsung_headings_are_not_indexed():
+    models = build_index_from_html("samsung", page("samsung"))["models"]
+    assert "GALAXY S23 ULTRA" in models and "GALAXY Z FOLD5" in models
+    for heading in ("GALAXY ESIM", "GALAXY ESIM Y OPERADORES COMPATIBLES", "GALAXY S", "GALAXY Z", "GALAXY A"):
+        assert heading not in models
+    assert all(name.startswith("GALAXY ") for name in models)
+
+
+def test_apple_prose_is_not_indexed():
+    models = build_index_from_html("apple", page("apple"))["models"]
+    assert "IPHONE 13 PRO MAX" in models and "IPHONE XR" in models
+    assert not any("COMPRADOS" in name or "COMPATIBLES" in name for name in models)
+
+
+@pytest.mark.parametrize("brand, model, expected", [
+    ("samsung", "Galaxy A54", "GALAXY A54 5G"),
+    ("samsung", "SAMSUNG GALAXY A35", "GALAXY A35 5G"),
+    ("samsung", "Galaxy Z Fold 5", "GALAXY Z FOLD5"),
+    ("samsung", "Galaxy S23 5G", "GALAXY S23"),
+    ("samsung", "SM-S918B", "GALAXY S23 ULTRA"),
+    ("apple", "IPHONE 13 PRO MAX(A2484)", "IPHONE 13 PRO MAX"),
+    ("apple", "iPhone 13", "IPHONE 13"),
+])
+def test_lookup_tolerates_network_suffixes_and_spacing(brand, model, expected):
+    assert lookup_model(build_index_from_html(brand, page(brand)), model) == expected
+
+
+@pytest.mark.parametrize("brand, model", [
+    ("apple", "iPhone 13 Pro Max Ultra"),
+    ("apple", "iPhone 10"),
+    ("samsung", "Galaxy A53 5G"),
+    ("samsung", "Galaxy S23 FE"),
+])
+def test_lookup_does_not_match_other_devices(brand, model):
+    assert lookup_model(build_index_from_html(brand, page(brand)), model) is None
+
+
+def test_check_on_an_empty_index_is_unknown(tmp_path):
+    cache = EsimIndexCache(cache_path=tmp_path / "esim.json", sources=SOURCES, fetcher=StubFetcher())
+    cache.put_html("samsung", "<html><body><h1>Página en mantenimiento</h1></body></html>")
+    result = asyncio.run(cache.check("samsung", "Galaxy S23"))
+    assert result["compatible"] is None
+    assert "unknown" in result["error"]
+
+
+def test_check_answers_from_the_page(tmp_path):
+    cache = EsimIndexCache(cache_path=tmp_path / "esim.json", sources=SOURCES, fetcher=StubFetcher())
+    compatible = asyncio.run(cache.check("", "Galaxy A54"))
+    assert compatible["brand"] == "samsung" and compatible["compatible"] is True
+    incompatible = asyncio.run(cache.check("apple", "iPhone 8"))
+    assert incompatible["compatible"] is False and "error" not in incompatible
+
+
+def test_a_page_without_devices_keeps_the_previous_index(tmp_path):
+    fetcher = StubFetcher()
+    cache = EsimIndexCache(cache_path=tmp_path / "esim.json", ttl=0, sources=SOURCES, fetcher=fetcher)
+    assert asyncio.run(cache.check("apple", "iPhone 15"))["compatible"] is True
+    fetcher.bodies[SOURCES["apple"]] = "<html><body><p>Error 500</p></body></html>"
+    assert asyncio.run(cache.check("apple", "iPhone 15"))["compatible"] is True
+
+
+def test_disk_cache_is_dropped_when_the_source_changes(tmp_path):
+    cache_path = tmp_path / "esim.json"
+    first = EsimIndexCache(cache_path=cache_path, sources=SOURCES, fetcher=StubFetcher())
+    asyncio.run(first.get("samsung"))
+    assert json.loads(cache_path.read_text())["samsung"]["source"] == SOURCES["samsung"]
+
+    # Same source: the disk entry is served without a request
+    fetcher = StubFetcher()
+    asyncio.run(EsimIndexCache(cache_path=cache_path, sources=SOURCES, fetcher=fetcher).get("samsung"))
+    assert fetcher.requests == []
+
+    # New source: the old entry is neither served nor revalidated
+    moved = dict(SOURCES, samsung="https://samsung.example/esim-v2")
+    fetcher = StubFetcher({moved["samsung"]: page("samsung").replace("Galaxy A54 5G | ", "")})
+    entry = asyncio.run(EsimIndexCache(cache_path=cache_path, sources=moved, fetcher=fetcher).get("samsung"))
+    assert fetcher.requests == [(moved["samsung"], {})]
+    assert entry["source"] == moved["samsung"]
+    assert "GALAXY A54 5G" not in entry["models"]
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from mcp.server.transport_security import TransportSecurityMiddleware
+
+from mcp_server_cli import run_server, transport_security
+
+
+def accepts(settings, host: str, origin: str | None = None) -> bool:
+    middleware = TransportSecurityMiddleware(settings)
+    return middleware._validate_host(host) and middleware._validate_origin(origin)
+
+
+def test_network_server_keeps_dns_rebinding_protection():
+    settings = transport_security("0.0.0.0", ["kb.internal"])
+    assert settings.enable_dns_rebinding_protection
+    assert accepts(settings, "kb.internal:8001")
+    assert accepts(settings, "kb.internal")
+    assert accepts(settings, "127.0.0.1:8001")
+    assert accepts(settings, "[::1]:8001")
+    assert not accepts(settings, "attacker.example:8001")
+    assert not accepts(settings, "kb.internal:8001", origin="http://attacker.example")
+
+
+def test_bound_address_port_pinned_hosts_and_origins():
+    settings = transport_security("10.0.0.5", ["kb.internal:8001", "fd00::1"], ["https://portal.example.com"])
+    assert accepts(settings, "10.0.0.5:8001")
+    assert accepts(settings, "kb.internal:8001")
+    assert not accepts(settings, "kb.internal:9000")
+    assert accepts(settings, "[fd00::1]:8001")
+    assert accepts(settings, "kb.internal:8001", origin="https://portal.example.com")
+
+
+def test_run_server_sets_the_protection(monkeypatch):
+    monkeypatch.setenv("MCP_SERVER_ALLOWED_HOSTS", "kb.internal, kb")
+    runs = []
+    mcp = SimpleNamespace(name="Test", settings=SimpleNamespace(sse_path="/sse", streamable_http_path="/mcp"),
+                          run=lambda transport: runs.append(transport))
+    run_server(mcp, 8001, ["--transport", "streamable-http", "--host", "0.0.0.0"])
+    assert runs == ["streamable-http"]
+    assert accepts(mcp.settings.transport_security, "kb:8001")
+    assert not accepts(mcp.settings.transport_security, "attacker.example:8001")
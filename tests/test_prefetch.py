@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import customer_care_agent_mgr
+import customer_care_tracing
+from customer_care_tracing import InMemoryExporter, Tracer
+
+IMSI = "730029988243961"
+LOOKUP = "knowledge_base-get_customer_by_imsi"
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Returns a function counting the get_customer_by_imsi calls that reached the MCP server."""
+    exporter = InMemoryExporter()
+    monkeypatch.setattr(customer_care_tracing, "_TRACER", Tracer([exporter]))
+
+    def count() -> int:
+        return sum(1 for span in exporter.by_name("mcp.call_tool")
+                   if span.attributes.get("tool") == "get_customer_by_imsi")
+    return count
+
+
+@pytest.mark.parametrize("question", ["tengo problemas de señal", "puede mi celular usar el eSIM"])
+def test_prefetched_record_replaces_the_models_lookup(agent_stack, fake_deployment, lookups, question):
+    # The fake model looks the customer up unless the record is already in the prompt
+    fake_deployment.script.tool_calls = [(LOOKUP, {"imsi": IMSI})]
+    fake_deployment.script.skip_tool_calls_if_known = {LOOKUP: "Datos del cliente con IMSI"}
+
+    async def scenario():
+        registry = customer_care_agent_mgr.get_registry()
+        await registry.ensure_started()
+        runs = {}
+        for name, agents in (("with prefetch", {"AgentCare"}), ("without prefetch", set())):
+            registry.prefetch.agents = frozenset(agents)
+            requests, calls = fake_deployment.requests, lookups()
+            await customer_care_agent_mgr.process_question(question, IMSI)
+            runs[name] = (fake_deployment.requests - requests, lookups() - calls)
+        return runs, registry.prefetch.metrics.snapshot()
+
+    runs, metrics = agent_stack(scenario)
+    # The prefetched record is the only lookup: the model doesn't ask for it again, which saves a
+    # round trip (without the prefetch, a device question is also looked up for its cache key)
+    assert runs["with prefetch"][1] == 1
+    assert runs["without prefetch"][1] == (2 if "eSIM" in question else 1)
+    assert runs["with prefetch"][0] == runs["without prefetch"][0] - 1
+    assert metrics["started"] == metrics["injected"] == metrics["round_trips_saved"] == 1
+    assert metrics["redundant_lookups"] == 0
+
+
+def test_lookup_is_cancelled_when_the_agent_needs_no_customer_facts(agent_stack, fake_deployment, monkeypatch):
+    outcomes = []
+    get_customer_facts = customer_care_agent_mgr.get_customer_facts
+
+    async def slow_lookup(imsi):
+        outcomes.append("started")
+        try:
+            await asyncio.sleep(1.0)
+            result = await get_customer_facts(imsi)
+        except asyncio.CancelledError:
+            outcomes.append("cancelled")
+            raise
+        outcomes.append("done")
+        return result
+
+    monkeypatch.setattr(customer_care_agent_mgr, "get_customer_facts", slow_lookup)
+
+    async def scenario():
+        registry = customer_care_agent_mgr.get_registry()
+        await registry.ensure_started()
+        start = time.perf_counter()
+        answer = await customer_care_agent_mgr.process_question("¿Cuánto cuesta el plan de 50 gigas?", IMSI)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0)
+        return answer, elapsed, registry.prefetch.metrics.snapshot()
+
+    answer, elapsed, metrics = agent_stack(scenario)
+    assert answer and not answer.startswith("Error")
+    # Routed to RatePlansExpertAgent without waiting for the lookup, which was dropped
+    assert elapsed < 1.0
+    assert "done" not in outcomes
+    assert metrics["started"] == metrics["discarded"] == 1
+    assert metrics["injected"] == metrics["not_found"] == 0
+    assert "Datos del cliente" not in json.dumps(fake_deployment.last_messages, ensure_ascii=False)
@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+
+import customer_care_agent_mgr
+from customer_care_rate_limit import DeploymentBusyError, DeploymentScheduler, Priority
+
+
+def test_concurrency_halves_on_429_and_grows_back_slowly():
+    scheduler = DeploymentScheduler(max_concurrency=8)
+    scheduler.on_throttled(None)
+    assert scheduler.concurrency_limit == 4
+    # The requests already in flight throttle together: one decrease per second
+    scheduler.on_throttled(None)
+    assert scheduler.concurrency_limit == 4
+    scheduler._last_decrease -= 1.0
+    scheduler.on_throttled(None)
+    assert scheduler.concurrency_limit == 2
+
+    # Additive increase: about one slot per window of `limit` successes (2 -> 2.5 -> 2.9 -> 3.24)
+    for _ in range(2):
+        scheduler.on_success()
+    assert scheduler.concurrency_limit == 2
+    scheduler.on_success()
+    assert scheduler.concurrency_limit == 3
+    for _ in range(100):
+        scheduler.on_success()
+    assert scheduler.concurrency_limit == 8
+    assert scheduler.metrics.snapshot()["concurrency_limit"] == 8
+
+
+def test_concurrency_never_drops_below_one():
+    scheduler = DeploymentScheduler(max_concurrency=2)
+    for _ in range(5):
+        scheduler._last_decrease -= 1.0
+        scheduler.on_throttled(None)
+    assert scheduler.concurrency_limit == 1
+
+
+def test_retry_after_pauses_the_whole_deployment():
+    scheduler = DeploymentScheduler(max_concurrency=4)
+
+    async def scenario():
+        scheduler.on_throttled(0.3)
+        start = time.perf_counter()
+        await scheduler.acquire(Priority.INTERACTIVE, 1)
+        scheduler.release()
+        return time.perf_counter() - start
+
+    assert asyncio.run(scenario()) >= 0.25
+
+
+def test_interactive_requests_go_ahead_of_queued_batch_work():
+    scheduler = DeploymentScheduler(max_concurrency=1)
+    admitted = []
+
+    async def request(name: str, priority: Priority) -> None:
+        await scheduler.acquire(priority, 1)
+        admitted.append(name)
+        await asyncio.sleep(0.01)
+        scheduler.release()
+
+    async def scenario():
+        await scheduler.acquire(Priority.BATCH, 1)   # the only slot is busy
+        tasks = [asyncio.create_task(request(f"batch-{i}", Priority.BATCH)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(request("interactive", Priority.INTERACTIVE)))
+        await asyncio.sleep(0.01)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert admitted == ["interactive", "batch-0", "batch-1", "batch-2"]
+    assert scheduler.metrics.snapshot()["mean_queue_ms"]["batch"] > scheduler.metrics.snapshot()["mean_queue_ms"]["interactive"]
+
+
+def test_requests_per_minute_budget_spaces_out_a_burst():
+    # 600 RPM: a one-second burst of 10, then one request every 0.1 s
+    scheduler = DeploymentScheduler(rpm=600, max_concurrency=100)
+
+    async def scenario():
+        start = time.perf_counter()
+
+        async def request():
+            await scheduler.acquire(Priority.INTERACTIVE, 1)
+            scheduler.release()
+            return time.perf_counter() - start
+
+        return sorted(await asyncio.gather(*(request() for _ in range(15))))
+
+    admitted = asyncio.run(scenario())
+    # The 5 requests after the burst need ~0.5 s of refill, however late the burst itself ran
+    assert admitted[-1] - admitted[9] >= 0.35
+    assert admitted[-1] >= 0.4
+
+
+def test_scripted_429s_are_retried_after_retry_after(agent_stack, fake_deployment):
+    fake_deployment.script.throttle_first = 2
+    fake_deployment.script.retry_after = 0.2
+
+    async def scenario():
+        start = time.perf_counter()
+        answer = await customer_care_agent_mgr.process_question("puede mi celular usar el eSIM", "730029988243961")
+        return answer, time.perf_counter() - start, customer_care_agent_mgr.get_registry().scheduler
+
+    answer, elapsed, scheduler = agent_stack(scenario)
+    assert not answer.startswith("Error")
+    assert fake_deployment.throttled == 2
+    metrics = scheduler.metrics.snapshot()
+    assert metrics["throttled"] == 2 and metrics["retries"] == 2 and metrics["exhausted"] == 0
+    assert elapsed >= 0.4
+    assert metrics["concurrency_limit"] < scheduler.max_concurrency
+
+
+def test_throttling_past_the_retries_is_reported_as_busy(agent_stack, fake_deployment, monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_MAX_RETRIES", "1")
+    fake_deployment.script.throttle_first = 100
+    fake_deployment.script.retry_after = 0.1
+
+    async def scenario():
+        with pytest.raises(DeploymentBusyError) as raised:
+            await customer_care_agent_mgr.process_question("puede mi celular usar el eSIM", "730029988243961")
+        return raised.value, customer_care_agent_mgr.get_registry().scheduler
+
+    error, scheduler = agent_stack(scenario)
+    assert error.retry_after == pytest.approx(0.1)
+    assert scheduler.metrics.snapshot()["exhausted"] >= 1
@@ -0,0 +1,69 @@
+import pytest
+
+from customer_care_router import IntentRouter, normalize_text
+
+ROUTES = [
+    # eSIM and device compatibility
+    ("¿Mi iPhone es compatible con eSIM?", "AgentCare"),
+    ("puede mi celular usar el eSIM", "AgentCare"),
+    ("Quiero activar una e-SIM", "AgentCare"),
+    ("ESIM", "AgentCare"),
+    # Signal and coverage
+    ("Tengo mala señal en mi casa", "AgentCare"),
+    ("No tengo cobertura 5G", "AgentCare"),
+    ("se me cortan las llamadas, llamadas caídas", "AgentCare"),
+    # Plans and prices
+    ("¿Cuánto cuesta el plan de 50 gigas?", "RatePlansExpertAgent"),
+    ("¿Qué promociones tienen en planes postpago?", "RatePlansExpertAgent"),
+    ("tarifas prepago", "RatePlansExpertAgent"),
+    # Call analysis
+    ("analiza la llamada y dime el sentimiento del cliente", "SentimentAnalysisAgent"),
+    ("transcripción de la grabación", "SentimentAnalysisAgent"),
+    # Mixed intents: competing hints lower the confidence, ManagerAgent decides
+    ("¿Cuánto cuesta un iPhone compatible con eSIM?", None),
+    ("¿el plan incluye roaming?", None),
+    ("el precio del chip", None),
+    # A single weak hint, or none at all
+    ("mi plan", None),
+    ("hola, buenos días", None),
+    ("quiero hablar con un asesor", None),
+    ("esimple", None),
+]
+
+
+@pytest.mark.parametrize("question, agent", ROUTES)
+def test_routes(question, agent):
+    assert IntentRouter().route(question).agent == agent
+
+
+@pytest.mark.parametrize("question, agent, confidence", [
+    ("puede mi celular usar el eSIM", "AgentCare", 1 - 0.1 * 0.6),          # noisy-OR of eSIM and celular
+    ("mi plan", "RatePlansExpertAgent", 0.6),
+    ("el precio del chip", "RatePlansExpertAgent", 0.7 * (1 - 0.6)),        # price, discounted by the SIM hint
+    ("hola, buenos días", None, 0.0),
+])
+def test_confidence_combines_hints_and_discounts_the_runner_up(question, agent, confidence):
+    assert IntentRouter().classify(question) == (agent, pytest.approx(confidence))
+
+
+@pytest.mark.parametrize("threshold, agent", [(0.5, "RatePlansExpertAgent"), (0.6, "RatePlansExpertAgent"),
+                                              (0.61, None), (0.7, None)])
+def test_threshold_decides_between_the_fast_path_and_the_fallback(threshold, agent):
+    decision = IntentRouter(threshold=threshold).route("mi plan")
+    assert decision.agent == agent
+    assert decision.confidence == pytest.approx(0.6)
+
+
+def test_metrics_count_routed_questions_and_fallbacks():
+    router = IntentRouter()
+    for question, _ in ROUTES:
+        router.route(question)
+    metrics = router.metrics.snapshot()
+    routed = sum(1 for _, agent in ROUTES if agent)
+    assert (metrics["routed"], metrics["fallbacks"]) == (routed, len(ROUTES) - routed)
+    assert metrics["hit_rate"] == pytest.approx(routed / len(ROUTES))
+    assert metrics["mean_latency_us"] > 0
+
+
+def test_accents_and_case_are_ignored():
+    assert normalize_text("SEÑAL Compatibilidad Ésim") == "senal compatibilidad esim"
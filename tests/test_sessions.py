@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from customer_care_sessions import (
+    ConversationSession, InMemorySessionBackend, LRUSessionBackend, REPEATED_OUTPUT, SessionMismatchError,
+    SessionStore,
+)
+
+PAGE = "Dispositivos compatibles con eSIM: " + ", ".join(f"iPhone modelo {n}" for n in range(400))
+RECORD = "Datos del cliente con IMSI 730029988243961: APPLE IPHONE 13 PRO MAX(A2484)"
+
+
+def run_turns(session: ConversationSession, turns: int) -> list[int]:
+    """Record turns that all return the customer record and the same eSIM page; prompt tokens before each."""
+    async def run():
+        sizes = []
+        for i in range(turns):
+            turn = session.begin_turn()
+            sizes.append(session.prompt_tokens())
+            turn.tool_outputs.extend([("get_customer_by_imsi", RECORD), ("check_esim_compatibility", PAGE)])
+            await session.end_turn(turn, f"pregunta {i}", f"<p>respuesta {i}</p>")
+        return sizes
+    return asyncio.run(run())
+
+
+def test_session_is_bound_to_the_imsi():
+    store = SessionStore(InMemorySessionBackend())
+    mine = store.session_for("abc", "730029988243961")
+    run_turns(mine, 1)
+    assert store.session_for("abc", "730029988243961") is mine
+    assert store.session_for("xyz", "730021111111111") is not mine
+
+
+def test_session_id_reused_by_another_customer_is_rejected():
+    store = SessionStore(InMemorySessionBackend())
+    mine = store.session_for("abc", "730029988243961")
+    run_turns(mine, 1)
+    with pytest.raises(SessionMismatchError):
+        store.session_for("abc", "730021111111111")
+    assert store.metrics.snapshot()["rejected"] == 1
+    # The owner still gets their session back
+    assert store.session_for("abc", "730029988243961") is mine
+
+
+def test_prompt_stays_under_the_token_budget():
+    store = SessionStore(InMemorySessionBackend(), token_budget=1500, summary_tokens=300, tool_output_tokens=400)
+    session = store.session_for("abc", "730029988243961")
+    sizes = run_turns(session, 50)
+    assert max(sizes) <= 1500
+    assert session.summary
+    metrics = store.metrics.snapshot()
+    assert metrics["turns_summarized"] > 0
+    assert metrics["tool_outputs_truncated"] >= 1
+
+
+def test_repeated_tool_output_is_kept_once():
+    store = SessionStore(InMemorySessionBackend(), token_budget=100_000, tool_output_tokens=100_000)
+    session = store.session_for("abc")
+    run_turns(session, 3)
+    contents = [content for _, content in session.prompt_messages()]
+    assert sum(PAGE in content for content in contents) == 1
+    assert sum(REPEATED_OUTPUT.format(name="check_esim_compatibility") in content for content in contents) == 2
+    assert session.begin_turn().knows(RECORD)
+
+
+def test_lru_backend_evicts_the_least_recently_used_session():
+    store = SessionStore(LRUSessionBackend(max_sessions=2))
+    first = store.session_for("a")
+    store.session_for("b")
+    assert store.session_for("a") is first
+    store.session_for("c")
+    assert len(store) == 2
+    assert store.metrics.snapshot()["evicted"] == 1
+    assert store.session_for("a") is first
+    assert store.metrics.snapshot()["created"] == 3
+
+
+def test_sessions_off():
+    store = SessionStore(key_mode="off")
+    assert store.session_for("abc", "730029988243961") is None
+    assert SessionStore().session_for(None, "730029988243961") is None
+    assert SessionStore(key_mode="imsi").session_for(None, "730029988243961") is not None
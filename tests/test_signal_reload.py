@@ -0,0 +1,157 @@
+import json
+import os
+import random
+import threading
+import time
+
+import pytest
+
+from customer_care_signal_reload import SignalDataReloader
+
+IMSIS = [str(730020000000000 + i) for i in range(5)]
+
+
+def event(imsi: str, minute: int) -> dict:
+    stamp = f"2025-06-06T10:{minute // 60:02d}:{minute % 60:02d}"
+    return {"timePeriod": {"startDateTime": stamp, "endDateTime": stamp}, "imsi": int(imsi),
+            "brand": "APPLE", "model": "IPHONE 13 PRO MAX(A2484)", "accessType": "4G", "status": "Success"}
+
+
+def write_export(path, events: list[dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"datos": {"signalQualityIssuesDetail": {"detailSignalPlane": events}}}, f)
+
+
+def append_delta(path, events: list[dict], newline: bool = True) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps(e) for e in events) + ("\n" if newline else ""))
+
+
+@pytest.fixture
+def sources(tmp_path):
+    export, delta = tmp_path / "customers.json", tmp_path / "customers.delta.jsonl"
+    write_export(export, [event(imsi, 0) for imsi in IMSIS])
+    return str(export), str(delta)
+
+
+def test_delta_lines_publish_a_new_version_without_touching_the_old_one(sources):
+    export, delta = sources
+    reloader = SignalDataReloader(export, delta)
+    first = reloader.current
+    assert (first.version, len(first.store)) == (1, len(IMSIS))
+    assert reloader.refresh() is False
+
+    append_delta(delta, [event(IMSIS[0], 1), event(IMSIS[0], 2)])
+    assert reloader.refresh() is True
+    second = reloader.current
+    assert second.version == 2
+    assert second.refresh["kind"] == "delta" and second.refresh["events_added"] == 2
+    assert len(second.store.events_for_imsi(IMSIS[0])) == 3
+    assert second.store.latest_event(IMSIS[0])["timePeriod"]["startDateTime"] == "2025-06-06T10:00:02"
+    # A reader still holding the first snapshot sees exactly what it saw before
+    assert len(first.store) == len(IMSIS)
+    assert len(first.store.events_for_imsi(IMSIS[0])) == 1
+
+
+def test_a_line_still_being_written_waits_for_its_newline(sources):
+    export, delta = sources
+    reloader = SignalDataReloader(export, delta)
+    append_delta(delta, [event(IMSIS[1], 1)], newline=False)
+    reloader.refresh()
+    assert len(reloader.store) == len(IMSIS)
+    with open(delta, "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert reloader.refresh() is True
+    assert len(reloader.store.events_for_imsi(IMSIS[1])) == 2
+
+
+def test_malformed_delta_lines_are_skipped(sources, capsys):
+    export, delta = sources
+    reloader = SignalDataReloader(export, delta)
+    with open(delta, "a", encoding="utf-8") as f:
+        f.write("{not json\n[1, 2]\n" + json.dumps(event(IMSIS[2], 1)) + "\n")
+    reloader.refresh()
+    assert reloader.current.refresh["events_added"] == 1
+    assert "Skipping delta line 1" in capsys.readouterr().err
+
+
+def test_changed_export_or_truncated_delta_reloads_in_full(sources):
+    export, delta = sources
+    reloader = SignalDataReloader(export, delta)
+    append_delta(delta, [event(IMSIS[0], 1)])
+    reloader.refresh()
+
+    write_export(export, [event(imsi, 0) for imsi in IMSIS] + [event(IMSIS[3], 5)])
+    os.utime(export, ns=(time.time_ns(), time.time_ns() + 10**9))
+    reloader.refresh()
+    assert reloader.current.refresh["kind"] == "full"
+    assert len(reloader.store) == len(IMSIS) + 2   # the export's new event and the delta's
+
+    with open(delta, "w", encoding="utf-8"):
+        pass
+    reloader.refresh()
+    assert reloader.current.refresh["kind"] == "full"
+    assert len(reloader.store) == len(IMSIS) + 1
+    status = reloader.status()
+    assert status["version"] == reloader.current.version == 4
+    assert status["events"] == len(IMSIS) + 1 and status["imsis"] == len(IMSIS)
+
+
+def test_concurrent_reads_always_see_one_complete_version(sources):
+    export, delta = sources
+    reloader = SignalDataReloader(export, delta)
+    counts = {imsi: 1 for imsi in IMSIS}
+    expected = {reloader.current.version: dict(counts)}
+    stop = threading.Event()
+    errors, reads = [], []
+
+    def reader(seed: int) -> None:
+        rng = random.Random(seed)
+        while not stop.is_set():
+            snapshot = reloader.current
+            imsi = rng.choice(IMSIS)
+            n = len(snapshot.store.events_for_imsi(imsi))
+            latest = snapshot.store.latest_event(imsi)
+            reads.append(snapshot.version)
+            if n != expected[snapshot.version][imsi] or latest is None:
+                errors.append((snapshot.version, imsi, n))
+
+    readers = [threading.Thread(target=reader, args=(i,)) for i in range(4)]
+    for thread in readers:
+        thread.start()
+    try:
+        for r in range(20):
+            batch = [event(IMSIS[i % len(IMSIS)], 60 * (r + 1) + i) for i in range(200)]
+            for e in batch:
+                counts[str(e["imsi"])] += 1
+            # Published only once refresh() has built the whole new store
+            expected[reloader.current.version + 1] = dict(counts)
+            append_delta(delta, batch)
+            reloader.refresh()
+        expected[reloader.current.version + 1] = dict(counts)
+        os.utime(export, ns=(time.time_ns(), time.time_ns() + 10**9))
+        reloader.refresh()
+        time.sleep(0.05)
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+    assert errors == []
+    assert reloader.current.version == 22
+    assert len(set(reads)) > 1
+
+
+def test_watch_picks_up_appended_records(sources):
+    export, delta = sources
+    reloader = SignalDataReloader(export, delta)
+    reloader.watch(0.05)
+    try:
+        append_delta(delta, [event(IMSIS[4], 1)])
+        deadline = time.monotonic() + 5
+        while reloader.current.version == 1 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        reloader.stop()
+    assert reloader.current.version == 2
+    assert len(reloader.store.events_for_imsi(IMSIS[4])) == 2
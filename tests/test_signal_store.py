@@ -0,0 +1,113 @@
+from array import array
+
+import pytest
+
+import customer_care_signal_store
+from customer_care_signal_ingest import iter_signal_events
+from customer_care_signal_store import SignalEventStore, load_signal_store
+
+
+def store_of(*events) -> SignalEventStore:
+    store = SignalEventStore()
+    for entry in events:
+        store.add(entry)
+    return store.finalize()
+
+
+def test_sample_export_round_trips():
+    events = [entry for entry in iter_signal_events("customers.txt") if "imsi" in entry]
+    store = load_signal_store("customers.txt")
+    assert len(store) == len(events)
+    rebuilt = sorted((store.materialize(row_id) for row_id in range(len(store))), key=repr)
+    assert rebuilt == sorted(events, key=repr)
+
+
+def test_unknown_fields_are_kept():
+    entry = {
+        "timePeriod": {"startDateTime": "2025-06-06T10:00:00", "timezone": "UTC-4"},
+        "imsi": 1, "status": "Success",
+        "roaming": {"status": "No Roaming", "visitedNetwork": {"plmn": "73002"}},
+        "qos": {"qci": 9}, "tags": ["vip"],
+    }
+    assert store_of(entry).latest_event("1") == entry
+
+
+def test_nested_objects_without_known_children_are_kept():
+    entry = {"timePeriod": {"startDateTime": "2025-06-06T10:00:00"}, "imsi": 1, "roaming": "unknown", "SAI": {}}
+    weird = {"timePeriod": {"startDateTime": "2025-06-06T11:00:00"}, "imsi": 2, "roaming": {}}
+    store = store_of(entry, weird)
+    assert store.latest_event("1") == entry
+    assert store.latest_event("2") == weird
+
+
+@pytest.fixture(params=["numpy", "python"])
+def counting(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(customer_care_signal_store, "np", None)
+    elif customer_care_signal_store.np is None:
+        pytest.skip("numpy is not installed")
+
+
+def test_unhashable_values_do_not_abort_the_load(counting):
+    events = [
+        {"timePeriod": {"startDateTime": "2025-06-06T10:00:00"}, "imsi": 1, "cellname": ["CELL_A", "CELL_B"],
+         "status": "Failed", "causeDescription": {"code": 17}},
+        {"timePeriod": {"startDateTime": "2025-06-06T10:01:00"}, "imsi": 1, "cellname": "CELL_A", "status": "Failed"},
+    ]
+    store = store_of(*events)
+    rows = store.events_for_imsi("1")
+    assert [store.materialize(row_id) for row_id in rows] == events
+    assert store.value_counts(rows, "cellname") == {"CELL_A": 1}
+    assert list(store.filter(rows, "cellname", "CELL_A")) == [rows[1]]
+    assert list(store.filter(rows, "cellname", ["CELL_A", "CELL_B"])) == [rows[0]]
+    assert list(store.filter(rows, "causeDescription", {"code": 17}, exclude=True)) == [rows[1]]
+    assert list(store.find("cellname", "CELL_A")) == [rows[1]]
+
+
+def test_cell_and_cellname_are_different_fields(counting):
+    store = store_of(
+        {"timePeriod": {"startDateTime": "2025-06-06T10:00:00"}, "imsi": 1, "cellname": "CELL_A", "cell": 7.3e128},
+        {"timePeriod": {"startDateTime": "2025-06-06T10:01:00"}, "imsi": 1, "cellname": "CELL_A", "cell": 1234},
+    )
+    rows = store.events_for_imsi("1")
+    assert store.value_counts(rows, "cell") == {7.3e128: 1, 1234: 1}
+    assert store.value_counts(rows, "cellname") == {"CELL_A": 2}
+    with pytest.raises(KeyError):
+        store.find("cell", "CELL_A")
+
+
+def test_copy_is_independent():
+    store = store_of({"timePeriod": {"startDateTime": "2025-06-06T10:00:00"}, "imsi": 1, "extra": 1})
+    copy = store.copy()
+    copy.add({"timePeriod": {"startDateTime": "2025-06-06T09:00:00"}, "imsi": 1, "extra": 2})
+    copy.finalize()
+    assert len(store) == 1 and len(copy) == 2
+    assert [copy.materialize(row_id)["extra"] for row_id in copy.events_for_imsi("1")] == [2, 1]
+    assert store.latest_event("1")["extra"] == 1
+
+
+def test_copy_shares_the_columns_and_untouched_postings():
+    store = store_of(*({"timePeriod": {"startDateTime": "2025-06-06T10:00:00"}, "imsi": imsi, "status": "Success"}
+                       for imsi in (1, 2)))
+    copy = store.copy()
+    copy.add({"timePeriod": {"startDateTime": "2025-06-06T11:00:00"}, "imsi": 1, "status": "Failed"})
+    copy.finalize()
+    assert copy._columns is store._columns
+    assert copy.events_for_imsi("2") is store.events_for_imsi("2")
+    assert list(store.events_for_imsi("1")) == [0] and list(copy.events_for_imsi("1")) == [0, 2]
+    assert len(store.find("status", "Failed")) == 0 and len(copy.find("status", "Failed")) == 1
+    assert store.value_counts(array("I", range(len(store))), "status") == {"Success": 2}
+    with pytest.raises(RuntimeError):
+        store.add({"timePeriod": {"startDateTime": "2025-06-06T12:00:00"}, "imsi": 2})
+
+
+def test_copying_an_older_store_again_copies_only_its_own_rows():
+    store = store_of({"timePeriod": {"startDateTime": "2025-06-06T10:00:00"}, "imsi": 1, "extra": 1})
+    newer = store.copy()
+    newer.add({"timePeriod": {"startDateTime": "2025-06-06T11:00:00"}, "imsi": 1, "extra": 2})
+    other = store.copy()
+    other.add({"timePeriod": {"startDateTime": "2025-06-06T09:00:00"}, "imsi": 1, "extra": 3})
+    other.finalize()
+    assert other._columns is not store._columns
+    assert [other.materialize(row_id)["extra"] for row_id in other.events_for_imsi("1")] == [3, 1]
+    assert [newer.materialize(row_id)["extra"] for row_id in newer.finalize().events_for_imsi("1")] == [1, 2]
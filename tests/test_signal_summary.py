@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+import customer_care_signal_store
+from customer_care_signal_store import SignalEventStore
+from customer_care_signal_summary import summarize_signal_events
+
+IMSI = 730029988243961
+
+
+def event(minute: int, status: str = "Success", transaction: str = "Voice call", **fields) -> dict:
+    entry = {
+        "timePeriod": {"startDateTime": f"2025-06-06T10:{minute:02d}:00", "endDateTime": f"2025-06-06T10:{minute:02d}:30"},
+        "imsi": IMSI,
+        "transaction": transaction,
+        "status": status,
+        "causeDescription": "--" if status == "Success" else "Radio link failure",
+        "cellname": "CELL_A",
+        "accessType": "4G",
+        "roaming": {"status": "No Roaming", "direction": "Local", "country": "--", "operator": "--"},
+    }
+    entry.update(fields)
+    return {name: value for name, value in entry.items() if value is not None}
+
+
+def summarize(events: list[dict], **kwargs) -> dict:
+    store = SignalEventStore()
+    for entry in events:
+        store.add(entry)
+    store.finalize()
+    return summarize_signal_events(store, store.events_for_imsi(str(IMSI)), **kwargs)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def counting(request, monkeypatch):
+    """Run each test with the numpy bincount and with the plain Python counting."""
+    if request.param == "python":
+        monkeypatch.setattr(customer_care_signal_store, "np", None)
+    elif customer_care_signal_store.np is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+
+def test_failure_rates_cells_and_causes(counting):
+    summary = summarize([
+        event(0),
+        event(1, status="Failed", cellname="CELL_B"),
+        event(2, status="Failed", cellname="CELL_B", transaction="SMS"),
+        event(3, status="Failed", cellname="CELL_C", causeDescription="Timeout"),
+        event(4, transaction="SMS"),
+    ])
+    assert summary["events"] == 5
+    assert summary["failures"] == 3
+    assert summary["failure_rate"] == 0.6
+    assert summary["first_event"] == "2025-06-06T10:00:00"
+    assert summary["last_event"] == "2025-06-06T10:04:00"
+    assert summary["by_transaction"] == {
+        "Voice call": {"events": 3, "failures": 2, "failure_rate": 0.6667},
+        "SMS": {"events": 2, "failures": 1, "failure_rate": 0.5},
+    }
+    assert summary["top_failing_cells"] == [{"cellname": "CELL_B", "failures": 2}, {"cellname": "CELL_C", "failures": 1}]
+    assert summary["failure_causes"] == {"Radio link failure": 2, "Timeout": 1}
+    assert summary["access_type_share"] == {"4G": 1.0}
+
+
+def test_events_without_a_summarized_field(counting):
+    summary = summarize([
+        event(0, accessType=None),
+        event(1, accessType="5G", status="Failed", cellname=None, causeDescription=None),
+        event(2, accessType="4G", transaction=None),
+        event(3, timePeriod=None),
+    ])
+    assert summary["events"] == 4
+    assert summary["access_type_share"] == {"4G": 0.5, "5G": 0.25}
+    assert summary["top_failing_cells"] == []
+    assert summary["failure_causes"] == {}
+    assert summary["by_transaction"] == {"Voice call": {"events": 3, "failures": 1, "failure_rate": 0.3333}}
+    json.dumps(summary)
+
+
+def test_mixed_value_types_in_one_field(counting):
+    summary = summarize([event(0, accessType="4G"), event(1, accessType=5)])
+    assert summary["access_type_share"] == {5: 0.5, "4G": 0.5}
+
+
+def test_roaming_periods(counting):
+    summary = summarize([
+        event(0),
+        event(1, roaming={"status": "Roaming", "direction": "Outbound", "country": "AR", "operator": "Claro"}),
+        event(2, roaming={"status": "Roaming", "direction": "Outbound", "country": "AR", "operator": "Claro"}),
+        event(3, roaming={"status": "Roaming", "direction": "Outbound", "country": "PE"}),
+        event(4),
+    ])
+    assert summary["roaming_periods"] == [
+        {"start": "2025-06-06T10:01:00", "end": "2025-06-06T10:02:30", "status": "Roaming",
+         "direction": "Outbound", "country": "AR", "operator": "Claro", "events": 2},
+        {"start": "2025-06-06T10:03:00", "end": "2025-06-06T10:03:30", "status": "Roaming",
+         "direction": "Outbound", "country": "PE", "operator": None, "events": 1},
+    ]
+
+
+def test_no_events():
+    summary = summarize([])
+    assert summary["events"] == 0
+    assert summary["failure_rate"] == 0.0
+    assert "first_event" not in summary
+    assert summary["by_transaction"] == {} and summary["roaming_periods"] == []
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+import customer_care_agent_mgr
+from customer_care_mcp_pool import MCPServerSpec, MCPSessionPool
+from customer_care_singleflight import SingleFlight
+
+N = 8
+
+
+def run_duplicates(flights: SingleFlight, key, work, n: int = N) -> list:
+    async def scenario():
+        return await asyncio.gather(*(flights.run(key, work) for _ in range(n)), return_exceptions=True)
+    return asyncio.run(scenario())
+
+
+def test_duplicates_wait_on_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "respuesta"
+
+    assert run_duplicates(flights, "same", work) == ["respuesta"] * N
+    assert len(calls) == 1
+    metrics = flights.metrics.snapshot()
+    assert (metrics["leaders"], metrics["coalesced"]) == (1, N - 1)
+    assert metrics["coalesced_rate"] == pytest.approx((N - 1) / N)
+
+
+def test_failure_reaches_every_waiter_and_the_next_call_retries():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError("servidor caído")
+
+    results = run_duplicates(flights, "same", work)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 1
+    run_duplicates(flights, "same", work, n=1)
+    assert len(calls) == 2
+
+
+def test_followers_take_over_when_the_leader_is_cancelled():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "respuesta"
+
+    async def scenario():
+        leader = asyncio.create_task(flights.run("same", work))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(flights.run("same", work)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(scenario()) == ["respuesta"] * 3
+    # The cancelled leader's call, then one call for the three followers
+    assert len(calls) == 2
+    assert flights.metrics.snapshot()["abandoned"] == 1
+
+
+def test_disabled_or_distinct_keys_do_not_coalesce():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "respuesta"
+
+    run_duplicates(SingleFlight(enabled=False), "same", work)
+    assert len(calls) == N
+
+    async def scenario():
+        flights = SingleFlight()
+        await asyncio.gather(*(flights.run(key, work) for key in ("a", "b", "a")))
+    calls.clear()
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("coalescing, server_calls", [("1", 1), ("0", N)])
+def test_duplicate_tool_calls_reach_the_server_once(monkeypatch, coalescing, server_calls):
+    monkeypatch.setenv("MCP_TOOL_COALESCING", coalescing)
+    stub = MCPServerSpec(name="DelayedStub", plugin_name="stub", script="fixtures/delayed_mcp_server.py",
+                         max_concurrency=N)
+
+    async def scenario():
+        pool = MCPSessionPool(servers=(stub,))
+        try:
+            plugin = (await pool.start())["stub"]
+            await asyncio.gather(*(plugin.call_tool("lookup", key="apple", delay=0.3) for _ in range(N)))
+            # Other arguments are another call
+            await plugin.call_tool("lookup", key="samsung", delay=0.0)
+            count = str((await plugin.call_tool("call_count"))[0])
+            return int(re.search(r'"lookup":\s*(\d+)', count).group(1)), pool.tool_flights.metrics.snapshot()
+        finally:
+            await pool.close()
+
+    lookups, metrics = asyncio.run(scenario())
+    assert lookups == server_calls + 1
+    if coalescing == "1":
+        assert metrics["coalesced"] == N - 1
+
+
+def test_duplicate_questions_cost_the_model_calls_of_one(agent_stack, fake_deployment, two_customers):
+    # Only the brand and model are prefetched into the prompt: a device-scoped question is shared across IMSIs
+    imsis = two_customers
+    question = "puede mi celular usar el eSIM"
+
+    async def scenario():
+        registry = customer_care_agent_mgr.get_registry()
+        await registry.ensure_started()
+        before = fake_deployment.requests
+        await customer_care_agent_mgr.process_question(question, imsis[0])
+        solo = fake_deployment.requests - before
+        before = fake_deployment.requests
+        answers = await asyncio.gather(*(customer_care_agent_mgr.process_question(question, imsis[i % len(imsis)])
+                                         for i in range(N)))
+        return solo, fake_deployment.requests - before, answers, registry.question_flights.metrics.snapshot()
+
+    solo, burst, answers, metrics = agent_stack(scenario)
+    assert burst == solo
+    assert len(set(answers)) == 1
+    assert metrics["coalesced"] == N - 1
+    prompt = json.dumps(fake_deployment.last_messages, ensure_ascii=False)
+    assert "IPHONE 13 PRO MAX" in prompt and '"imei"' not in prompt
+
+
+def test_questions_about_the_customers_line_are_not_shared_across_imsis(agent_stack, two_customers):
+    imsis = two_customers
+
+    async def scenario():
+        registry = customer_care_agent_mgr.get_registry()
+        await asyncio.gather(*(customer_care_agent_mgr.process_question("tengo problemas de señal", imsi)
+                               for imsi in imsis * 2))
+        return registry.question_flights.metrics.snapshot()
+
+    metrics = agent_stack(scenario)
+    assert (metrics["leaders"], metrics["coalesced"]) == (2, 2)
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+import typing
+
+import pytest
+from azurefunctions.extensions.http.fastapi import Request
+
+import customer_care_agent_mgr
+
+
+@pytest.fixture
+def function_app(monkeypatch):
+    # No warm-up thread building a registry behind the tests' back
+    monkeypatch.setenv("COLD_START_WARMUP", "lazy")
+    import function_app
+    return function_app
+
+
+def http_request(imsi: str, question: str, session_id: str | None = None) -> Request:
+    """The request the HTTP streams extension hands to a route for GET .../{imsi}/{pregunta}."""
+    return Request({"type": "http", "method": "GET", "path": f"/api/customer-care/{imsi}/{question}",
+                    "query_string": f"session={session_id}".encode() if session_id else b"", "headers": [],
+                    "path_params": {"imsi": imsi, "pregunta": question}})
+
+
+def parse_sse(text: str) -> list[tuple[str, str]]:
+    """(event, data) of each Server-Sent Event, as a browser's EventSource would see it."""
+    events = []
+    for block in text.split("\n\n"):
+        if not block:
+            continue
+        event, data = "message", []
+        for line in block.split("\n"):
+            field, _, value = line.partition(": ")
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+        events.append((event, "\n".join(data)))
+    return events
+
+
+async def timed_pieces(stream) -> list[tuple[float, str]]:
+    """(seconds since start, text) of every piece an async generator yields."""
+    start = time.perf_counter()
+    return [(time.perf_counter() - start, piece) async for piece in stream]
+
+
+def collect(stream) -> list[tuple[float, str]]:
+    return asyncio.run(timed_pieces(stream))
+
+
+@pytest.mark.parametrize("data", ["<p>Sí</p>", "línea uno\nlínea dos\n", "", "\n\n"])
+def test_sse_event_round_trips_data(function_app, data):
+    text = function_app.sse_event(data, event="chunk")
+    assert text.endswith("\n\n") and "\n\n" not in text[:-2]
+    assert parse_sse(text) == [("chunk", data)]
+
+
+def test_stream_answer_forwards_each_chunk_before_the_next_is_ready(function_app, monkeypatch):
+    chunks = ["<h2>Compatibilidad</h2>", "<p>Sí,\nes compatible.</p>", "<p>Fin</p>"]
+
+    async def slow_stream(question, imsi=None, session_id=None):
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(0.2)
+
+    monkeypatch.setattr(customer_care_agent_mgr, "process_question_stream", slow_stream)
+    pieces = collect(function_app.stream_answer("¿puedo usar eSIM?", "730029988243961"))
+
+    assert pieces[0][0] < 0.1
+    assert pieces[-1][0] >= 0.6
+    events = parse_sse("".join(text for _, text in pieces))
+    assert [data for event, data in events if event == "message"] == chunks
+    assert events[-1] == ("done", json.dumps({"length": sum(map(len, chunks))}))
+
+
+def test_stream_answer_reports_errors_as_an_event(function_app, monkeypatch):
+    async def failing_stream(question, imsi=None, session_id=None):
+        yield "<p>Parcial</p>"
+        raise PermissionError("[Errno 13] Permission denied: 'customers.txt'")
+
+    monkeypatch.setattr(customer_care_agent_mgr, "process_question_stream", failing_stream)
+    events = parse_sse("".join(text for _, text in collect(function_app.stream_answer("hola", "1"))))
+    assert events[0] == ("message", "<p>Parcial</p>")
+    # Any other permission error is a server error, not a session owned by someone else
+    assert events[-1][0] == "error" and "Internal server error" in json.loads(events[-1][1])["error"]
+
+
+def test_session_reused_with_another_imsi_is_rejected(agent_stack, function_app, two_customers):
+    imsis = two_customers
+
+    async def scenario():
+        first = await timed_pieces(function_app.stream_answer("puede mi celular usar el eSIM", imsis[0], "abc"))
+        second = await timed_pieces(function_app.stream_answer("y mi linea esta activa", imsis[1], "abc"))
+        sessions = customer_care_agent_mgr.get_registry().sessions
+        return parse_sse("".join(text for _, text in first)), parse_sse("".join(text for _, text in second)), sessions
+
+    first, second, sessions = agent_stack(scenario)
+    assert first[-1][0] == "done"
+    assert second == [("error", json.dumps({"error": "The session belongs to another customer"}))]
+    assert sessions.metrics.snapshot()["rejected"] == 1
+
+
+def test_first_chunk_arrives_long_before_the_answer_ends(agent_stack, fake_deployment):
+    sentence = "Sí, su iPhone 13 Pro Max es compatible con eSIM. "
+    fake_deployment.script.structured_answer = json.dumps({"title": "Compatibilidad eSIM",
+                                                           "paragraphs": [sentence] * 10})
+    fake_deployment.script.chunk_latency = 0.01
+
+    async def scenario():
+        # MCP servers started up front, so the first chunk isn't timed against their spawn
+        await customer_care_agent_mgr.get_registry().ensure_started()
+        streamed = await timed_pieces(customer_care_agent_mgr.process_question_stream(
+            "puede mi celular usar el eSIM", "730029988243961"))
+        answer = await customer_care_agent_mgr.process_question("puede mi celular usar el eSIM", "730029988243961")
+        return streamed, answer
+
+    streamed, answer = agent_stack(scenario)
+    assert len(streamed) > 10
+    first, last = streamed[0][0], streamed[-1][0]
+    assert first < last / 2
+    assert "".join(text for _, text in streamed) == answer
+    assert answer.count(sentence.strip()) == 10
+
+
+
+def test_every_route_uses_the_http_streams_extension_types(function_app):
+    for function in function_app.app.get_functions():
+        hints = typing.get_type_hints(function.get_user_function())
+        assert hints["req"] is Request, function.get_function_name()
+        assert hints["return"].__module__.startswith("starlette."), function.get_function_name()
+
+
+def test_json_route_answers_and_rejects_a_reused_session(agent_stack, function_app, two_customers):
+    imsis = two_customers
+    handler = function_app.customer_care_func._function.get_user_function()
+
+    async def scenario():
+        answered = await handler(http_request(imsis[0], "puede mi celular usar el eSIM", "abc"))
+        rejected = await handler(http_request(imsis[1], "y mi linea esta activa", "abc"))
+        missing = await handler(http_request("", "hola"))
+        return answered, rejected, missing
+
+    answered, rejected, missing = agent_stack(scenario)
+    assert answered.status_code == 200 and answered.media_type == "application/json"
+    assert json.loads(answered.body)["answer"]
+    assert rejected.status_code == 403
+    assert json.loads(rejected.body) == {"error": "The session belongs to another customer"}
+    assert missing.status_code == 400
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import re
+import sys
+import time
+
+import pytest
+from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
+from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
+from semantic_kernel.contents import ChatHistory
+from semantic_kernel.functions import KernelArguments
+
+from customer_care_agent_mgr import CHAT_HISTORY_PROMPT, create_chat_service
+from customer_care_mcp_pool import PooledMCPStdioPlugin
+from customer_care_tool_calls import OrderedToolCallKernel
+
+STUB_SERVER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "delayed_mcp_server.py")
+
+# Requested in this order by one assistant message; the internet stub gets two of them
+CALLS = [
+    ("internet_stub-lookup", {"key": "apple_page", "delay": 0.6}),
+    ("internet_stub-lookup", {"key": "samsung_page", "delay": 0.4}),
+    ("kb_stub-lookup", {"key": "customer", "delay": 0.2}),
+]
+
+
+def run_turn(fake, max_concurrency: int) -> tuple[float, list[dict]]:
+    """One agent turn whose first model reply asks for every call in CALLS; returns the wall time
+    and the tool results of the follow-up request, in the order they were sent to the model."""
+    fake.script.tool_calls = CALLS
+
+    async def scenario():
+        kernel = OrderedToolCallKernel()
+        kernel.add_service(create_chat_service())
+        settings = AzureChatPromptExecutionSettings()
+        settings.function_choice_behavior = FunctionChoiceBehavior.Auto()
+        plugins = [PooledMCPStdioPlugin(name=name, command=sys.executable, args=[STUB_SERVER],
+                                        max_concurrency=max_concurrency)
+                   for name in ("internet_stub", "kb_stub")]
+        try:
+            for plugin in plugins:
+                await plugin.connect()
+                kernel.add_plugin(plugin, plugin_name=plugin.name)
+            chat_function = kernel.add_function(plugin_name="chat", function_name="respond",
+                                                prompt_template_config=CHAT_HISTORY_PROMPT)
+            history = ChatHistory()
+            history.add_user_message("¿Mi iPhone o mi Samsung son compatibles con eSIM?")
+            start = time.perf_counter()
+            await kernel.invoke(chat_function, arguments=KernelArguments(chat_history=history, settings=settings))
+            return time.perf_counter() - start
+        finally:
+            for plugin in plugins:
+                await plugin.close()
+
+    elapsed = asyncio.run(scenario())
+    results = [tool_result(m["content"]) for m in fake.last_messages if m.get("role") == "tool"]
+    return elapsed, results
+
+
+def tool_result(content: str) -> dict:
+    # The tool message is the repr of the MCP TextContent list, with the stub's JSON inside
+    fields = dict(re.findall(r'"(key|started|finished)": "?([\w.]+)"?', content))
+    return {"key": fields["key"], "started": float(fields["started"]), "finished": float(fields["finished"])}
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 4])
+def test_results_follow_the_request_order(fake_deployment, max_concurrency):
+    _, results = run_turn(fake_deployment, max_concurrency)
+    assert [result["key"] for result in results] == ["apple_page", "samsung_page", "customer"]
+
+
+def test_calls_overlap_so_the_turn_takes_about_the_slowest_call(fake_deployment):
+    elapsed, results = run_turn(fake_deployment, max_concurrency=4)
+    delays = [arguments["delay"] for _, arguments in CALLS]
+    assert elapsed < max(delays) + 0.25 * (sum(delays) - max(delays))
+    # Every call started before any of them finished
+    assert max(result["started"] for result in results) < min(result["finished"] for result in results)
+
+
+def test_per_server_limit_serializes_calls_to_one_server(fake_deployment):
+    elapsed, results = run_turn(fake_deployment, max_concurrency=1)
+    apple, samsung, customer = results
+    # The two internet_stub calls ran one after the other...
+    assert min(apple["finished"], samsung["finished"]) <= max(apple["started"], samsung["started"])
+    assert elapsed >= 0.6 + 0.4
+    # ...while the other server's call still overlapped with them
+    assert customer["started"] < max(apple["finished"], samsung["finished"])
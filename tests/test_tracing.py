@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+import customer_care_agent_mgr
+import customer_care_tracing
+from customer_care_tracing import (
+    NOOP_SPAN, InMemoryExporter, LogExporter, OpenTelemetryExporter, Tracer, record_usage,
+)
+
+
+@pytest.fixture
+def memory():
+    exporter = InMemoryExporter()
+    return Tracer([exporter]), exporter
+
+
+def test_nested_spans_share_the_trace_and_point_at_their_parent(memory):
+    tracer, exporter = memory
+    with tracer.span("request", imsi=True) as request:
+        with tracer.span("route") as route:
+            assert tracer.current_span() is route
+        with tracer.span("agent") as agent:
+            with tracer.span("tool") as tool:
+                pass
+        assert tracer.current_span() is request
+    with tracer.span("next request") as other:
+        pass
+
+    assert [span.name for span in exporter.spans] == ["route", "tool", "agent", "request", "next request"]
+    assert request.parent_id is None and request.attributes == {"imsi": True}
+    assert route.parent_id == agent.parent_id == request.span_id
+    assert tool.parent_id == agent.span_id
+    assert {span.trace_id for span in (request, route, agent, tool)} == {request.trace_id}
+    assert other.parent_id is None and other.trace_id != request.trace_id
+    assert tracer.current_span() is NOOP_SPAN
+
+
+def test_concurrent_tasks_get_their_own_children(memory):
+    tracer, exporter = memory
+
+    async def step(name: str) -> None:
+        with tracer.span(name):
+            await asyncio.sleep(0.01)
+            with tracer.span(f"{name}.inner"):
+                await asyncio.sleep(0.01)
+
+    async def scenario():
+        with tracer.span("request") as request:
+            await asyncio.gather(step("a"), step("b"))
+        return request
+
+    request = asyncio.run(scenario())
+    spans = {span.name: span for span in exporter.spans}
+    assert spans["a"].parent_id == spans["b"].parent_id == request.span_id
+    assert spans["a.inner"].parent_id == spans["a"].span_id
+    assert spans["b.inner"].parent_id == spans["b"].span_id
+
+
+def test_an_exception_marks_the_span_as_failed(memory):
+    tracer, exporter = memory
+    with pytest.raises(ValueError):
+        with tracer.span("tool"):
+            raise ValueError("timeout")
+    span, = exporter.spans
+    assert span.status == "error" and span.attributes["error"] == "ValueError: timeout"
+    assert span.end_ns >= span.start_ns
+
+
+def test_disabled_tracer_hands_out_the_noop_span(monkeypatch):
+    monkeypatch.delenv("CUSTOMER_CARE_TRACING", raising=False)
+    tracer = Tracer.from_env()
+    assert not tracer.enabled
+    with tracer.span("request", imsi=True) as span:
+        assert span is NOOP_SPAN
+        span.set("agent", "AgentCare")
+        span.add("chunks")
+        span.mark("first_chunk_ms")
+        record_usage(span, SimpleNamespace(metadata={"usage": SimpleNamespace(prompt_tokens=5, completion_tokens=2)}))
+        assert tracer.current_span() is NOOP_SPAN
+
+
+def test_exporters_are_picked_from_the_environment(monkeypatch, caplog):
+    pytest.importorskip("opentelemetry.trace")
+    monkeypatch.setenv("CUSTOMER_CARE_TRACING", " log, Memory,,zipkin,otel")
+    with caplog.at_level(logging.WARNING, logger="customer_care_tracing"):
+        tracer = Tracer.from_env()
+    assert [type(exporter) for exporter in tracer.exporters] == [LogExporter, InMemoryExporter, OpenTelemetryExporter]
+    assert "Unknown tracing exporter 'zipkin'" in caplog.text
+
+
+def test_log_exporter_writes_one_json_line_per_span(caplog):
+    tracer = Tracer([LogExporter()])
+    with caplog.at_level(logging.INFO, logger="customer_care_tracing"):
+        with tracer.span("route", agent="AgentCare"):
+            pass
+    line, = [record.getMessage() for record in caplog.records]
+    span = json.loads(line.removeprefix("span "))
+    assert span["name"] == "route" and span["attributes"] == {"agent": "AgentCare"} and span["status"] == "ok"
+
+
+def test_otel_exporter_keeps_the_parent_links(monkeypatch):
+    pytest.importorskip("opentelemetry.sdk.trace")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    provider = TracerProvider()
+    otel_spans = InMemorySpanExporter()
+    provider.add_span_processor(SimpleSpanProcessor(otel_spans))
+    monkeypatch.setattr(customer_care_tracing.otel_trace, "get_tracer", provider.get_tracer)
+    tracer = Tracer([OpenTelemetryExporter()])
+    with tracer.span("request"):
+        with tracer.span("tool", server="knowledge_base", args={"imsi": "1"}):
+            pass
+
+    tool, request = otel_spans.get_finished_spans()
+    assert tool.parent.span_id == request.context.span_id
+    assert tool.attributes["server"] == "knowledge_base" and tool.attributes["args"] == "{'imsi': '1'}"
+
+
+def test_record_usage_adds_up_the_tokens_of_each_model_call(memory):
+    tracer, _ = memory
+    usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+    with tracer.span("agent") as span:
+        record_usage(span, SimpleNamespace(metadata={"usage": usage}))
+        # An agent response wraps the message
+        record_usage(span, SimpleNamespace(message=SimpleNamespace(metadata={"usage": usage})))
+        record_usage(span, SimpleNamespace(metadata={}))
+        record_usage(span, "texto")
+    assert span.attributes == {"llm_calls": 2, "prompt_tokens": 240, "completion_tokens": 60}
+
+
+def test_model_tokens_are_attributed_to_the_spans_that_made_the_calls(agent_stack, fake_deployment, monkeypatch):
+    exporter = InMemoryExporter()
+    monkeypatch.setattr(customer_care_tracing, "_TRACER", Tracer([exporter]))
+
+    async def scenario():
+        await customer_care_agent_mgr.process_question("puede mi celular usar el eSIM", "730029988243961")
+
+    agent_stack(scenario)
+    request, = exporter.by_name("process_question")
+    counted = [span for span in exporter.spans if "llm_calls" in span.attributes]
+    assert counted and all(span.trace_id == request.trace_id for span in counted)
+    assert sum(span.attributes["llm_calls"] for span in counted) == fake_deployment.requests
+    assert sum(span.attributes["completion_tokens"] for span in counted) == fake_deployment.completion_tokens
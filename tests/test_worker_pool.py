@@ -0,0 +1,82 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from customer_care_worker_pool import AgentWorkerPool, WorkerCrashedError
+
+
+def test_cancelled_caller_does_not_stop_the_pool(fake_deployment, monkeypatch):
+    monkeypatch.setenv("RESPONSE_CACHE_SIZE", "0")
+    fake_deployment.script.first_token_latency = 0.5
+    pool = AgentWorkerPool(workers=1, concurrency=4, max_requests=0, timeout=30)
+    try:
+        assert pool.wait_ready(timeout=120)
+
+        async def scenario() -> str:
+            task = asyncio.create_task(pool.answer("¿Cuánto cuesta el plan de 50 gigas?"))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert pool._pending == {}
+            # The cancelled question's answer arrives while nobody waits for it
+            await asyncio.sleep(1.0)
+            return await pool.answer("¿Qué promociones tienen en planes postpago?")
+
+        assert asyncio.run(scenario())
+        assert pool._collector.is_alive()
+        assert pool._pending == {}
+        assert pool.metrics.snapshot()["completed"] == 1
+    finally:
+        pool.close()
+
+
+def test_killed_worker_fails_its_questions_at_once_and_is_replaced(fake_deployment, monkeypatch):
+    monkeypatch.setenv("RESPONSE_CACHE_SIZE", "0")
+    fake_deployment.script.first_token_latency = 20
+    pool = AgentWorkerPool(workers=1, concurrency=4, max_requests=0, timeout=60)
+    try:
+        assert pool.wait_ready(timeout=120)
+        worker_id, process = next(iter(pool._processes.items()))
+
+        async def scenario():
+            tasks = [asyncio.create_task(pool.answer(f"¿Cuánto cuesta el plan de {n} gigas?")) for n in (20, 50)]
+            while len(pool._in_flight[worker_id]) < 2:
+                await asyncio.sleep(0.05)
+            os.kill(process.pid, signal.SIGKILL)
+            start = time.perf_counter()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            return results, time.perf_counter() - start
+
+        results, waited = asyncio.run(scenario())
+        assert all(isinstance(result, WorkerCrashedError) for result in results)
+        assert waited < 5
+        assert pool._pending == {} and pool._worker_of == {} and worker_id not in pool._in_flight
+        metrics = pool.metrics.snapshot()
+        assert metrics["crashed"] == 1 and metrics["failed"] == 2 and metrics["timeouts"] == 0
+
+        # The replacement answers the next question
+        fake_deployment.script.first_token_latency = 0.01
+        assert asyncio.run(pool.answer("¿Qué promociones tienen en planes postpago?", timeout=120))
+        assert worker_id not in pool._processes and len(pool._processes) == 1
+    finally:
+        pool.close()
+
+
+def test_recycled_worker_hands_over_the_queued_questions(fake_deployment, monkeypatch):
+    monkeypatch.setenv("RESPONSE_CACHE_SIZE", "0")
+    pool = AgentWorkerPool(workers=1, concurrency=2, max_requests=2, timeout=120)
+    try:
+        assert pool.wait_ready(timeout=120)
+
+        async def scenario():
+            return await asyncio.gather(*(pool.answer(f"¿Cuánto cuesta el plan de {n} gigas?") for n in range(5)))
+
+        assert all(asyncio.run(scenario()))
+        metrics = pool.metrics.snapshot()
+        assert metrics["completed"] == 5 and metrics["recycled"] >= 2 and metrics["crashed"] == 0
+    finally:
+        pool.close()
@@ -0,0 +1,117 @@
+# Async web page fetching and text extraction for the internet MCP server.
+# One shared keep-alive connection pool, timeouts, a response-size cap and bounded concurrency,
+# so a slow or huge vendor page can't stall the stdio server.
+
+import asyncio
+import importlib.util
+from dataclasses import dataclass, field
+
+import httpx
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # selectolax is optional; fall back to BeautifulSoup
+    HTMLParser = None
+
+# BeautifulSoup itself is imported on the first extraction that needs it, not at server spawn
+BS4_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+USER_AGENT = "Mozilla/5.0 (compatible; TelefonicaCustomerCare/1.0)"
+NON_CONTENT_TAGS = ("script", "style", "noscript", "template")
+
+
+class FetchError(Exception):
+    """A page could not be fetched (network error, timeout...)."""
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status_code: int
+    text: str
+    headers: dict = field(default_factory=dict)
+    truncated: bool = False
+
+
+class WebFetcher:
+    """Shared httpx.AsyncClient with per-request timeouts, a body size cap and a concurrency limit."""
+
+    def __init__(self, timeout: float = 10.0, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_connections: int = 20, max_concurrency: int = 8):
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.max_bytes = max_bytes
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._client
+
+    async def fetch(self, url: str, headers: dict | None = None) -> FetchResult:
+        """GET a page, reading at most max_bytes of the body (the rest is dropped, truncated=True)."""
+        async with self._semaphore:
+            try:
+                async with self._get_client().stream("GET", url, headers=headers) as response:
+                    chunks = []
+                    size = 0
+                    truncated = False
+                    async for chunk in response.aiter_bytes():
+                        if size + len(chunk) > self.max_bytes:
+                            chunks.append(chunk[:self.max_bytes - size])
+                            truncated = True
+                            break
+                        chunks.append(chunk)
+                        size += len(chunk)
+                    text = b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+                    return FetchResult(url=url, status_code=response.status_code, text=text,
+                                       headers=dict(response.headers), truncated=truncated)
+            except (httpx.HTTPError, httpx.InvalidURL) as e:
+                raise FetchError(f"Failed to fetch {url}: {type(e).__name__}: {e}") from e
+
+    async def fetch_many(self, urls: list[str], headers: dict | None = None) -> list[FetchResult | FetchError]:
+        """Fetch several pages concurrently; results (or FetchErrors) come back in the order of urls."""
+        return await asyncio.gather(*(self.fetch(url, headers) for url in urls), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _select(select, selector: str) -> list:
+    try:
+        return select(selector)
+    except Exception as e:
+        # soupsieve and selectolax raise different exception types for bad selectors
+        raise ValueError(f"Invalid CSS selector {selector!r}: {e}") from e
+
+
+def extract_text_lines(html: str, selector: str | None = None) -> list[str]:
+    """Non-empty text lines of a page, optionally only inside the elements matching a CSS selector.
+
+    Uses selectolax when installed, otherwise BeautifulSoup with lxml (or html.parser).
+    Raises ValueError for an invalid selector.
+    """
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        for node in tree.css(", ".join(NON_CONTENT_TAGS)):
+            node.decompose()
+        root = tree.body or tree.root
+        nodes = _select(tree.css, selector) if selector else [root]
+        texts = [node.text(separator="\n") for node in nodes if node is not None]
+    else:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, BS4_PARSER)
+        for node in soup(list(NON_CONTENT_TAGS)):
+            node.decompose()
+        nodes = _select(soup.select, selector) if selector else [soup]
+        texts = [node.get_text(separator="\n") for node in nodes]
+    return [line.strip() for text in texts for line in text.split("\n") if line.strip()]